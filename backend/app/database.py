@@ -3,10 +3,17 @@ Database Configuration
 
 This module sets up the SQLAlchemy database connection.
 The connection URL is read from the DATABASE_URL environment variable.
+
+Besides the synchronous engine used by the CRUD endpoints (which FastAPI
+runs in its threadpool), an asyncio engine on the same database backs the
+`async def` endpoints so they never block the event loop on I/O. Its URL
+is derived from DATABASE_URL unless ASYNC_DATABASE_URL is set.
 """
 
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = os.getenv(
@@ -24,6 +31,36 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# Query parameters asyncpg takes as they are; libpq-only ones are dropped
+_ASYNCPG_QUERY_PARAMS = {"ssl", "prepared_statement_cache_size", "target_session_attrs"}
+
+
+def to_async_database_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto the matching asyncio driver.
+    
+    For PostgreSQL, `sslmode` becomes asyncpg's `ssl` (same values) and
+    other psycopg2/libpq options (client certificates, `connect_timeout`,
+    ...) are dropped, as asyncpg rejects them. Set ASYNC_DATABASE_URL to
+    configure those for the async engine.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if parsed.get_backend_name() != "postgresql":
+        return url
+    query = {key: value for key, value in parsed.query.items() if key in _ASYNCPG_QUERY_PARAMS}
+    if "sslmode" in parsed.query and "ssl" not in query:
+        query["ssl"] = parsed.query["sslmode"]
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_database_url(DATABASE_URL))
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
 def get_database_session():
     """
     Dependency to provide a database session for a request context.
@@ -36,3 +73,17 @@ def get_database_session():
         yield session
     finally:
         session.close()
+
+
+async def get_async_database_session():
+    """
+    Dependency to provide an asyncio database session for a request context.
+    
+    Use from `async def` endpoints; queries are awaited instead of blocking
+    the event loop.
+    
+    Yields:
+        AsyncSession: An asyncio SQLAlchemy database session.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
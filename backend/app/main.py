@@ -6,13 +6,24 @@ Implement your routers and include them here.
 """
 
 import logging
+import os
 from datetime import date, time, timedelta
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from app.routers import rooms, bookings
-from app.database import engine, Base, SessionLocal
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.routers import rooms, bookings, schedule
+from app.database import engine, async_engine, Base, SessionLocal
+from app.migrations import run_migrations
 from app.models import Room, Booking
+from app.services.ai_parser import get_ai_parser, close_ai_parser
+from app.services.booking_suggestions import BookingConflictError
+from app.services.llm_scheduler import LLMOverloadedError
+from app.services.metrics import MetricsMiddleware, instrument_engine
+from app.services.sql_profiler import SQLProfilingMiddleware, enable_sql_profiling
+from app.services.utilization import rebuild_daily_usage
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +33,7 @@ async def lifespan(app: FastAPI):
     """Initialize database and seed data on startup."""
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     
     # Seed sample rooms if empty
     db = SessionLocal()
@@ -66,12 +78,21 @@ async def lifespan(app: FastAPI):
                 ]
                 db.add_all(sample_bookings)
                 db.commit()
+                rebuild_daily_usage(db)
                 logger.info("Seeded sample bookings")
     finally:
         db.close()
     
+    # Warm the shared AI client so the first chat turn skips client setup
+    try:
+        get_ai_parser()
+    except Exception as e:
+        logger.warning(f"AI parser not initialised at startup, will retry on first use: {e}")
+    
     yield  # App runs here
-    # Cleanup on shutdown (if needed)
+    # Cleanup on shutdown
+    await close_ai_parser()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -81,6 +102,21 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in: per-request statement traces and N+1 detection (see sql_profiler)
+if os.getenv("SQL_PROFILING", "false").lower() == "true":
+    enable_sql_profiling(engine)
+    enable_sql_profiling(async_engine.sync_engine)
+    app.add_middleware(
+        SQLProfilingMiddleware,
+        trace_dir=os.getenv("SQL_PROFILE_TRACE_DIR") or None,
+        repeat_threshold=int(os.getenv("SQL_PROFILE_REPEAT_THRESHOLD", "5")),
+        build=os.getenv("SQL_PROFILE_BUILD", "current"),
+    )
+
 # CORS configuration for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -94,9 +130,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-SQL-Profile"],
 )
 
 
+@app.exception_handler(LLMOverloadedError)
+async def handle_llm_overload(request: Request, exc: LLMOverloadedError):
+    """Shed AI requests with 503 so clients back off instead of queueing."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(BookingConflictError)
+async def handle_booking_conflict(request: Request, exc: BookingConflictError):
+    """409 with the usual `detail` plus alternative slots the client can offer."""
+    return JSONResponse(
+        status_code=409,
+        content=jsonable_encoder({"detail": exc.detail, "suggestions": exc.suggestions}),
+    )
+
+
 @app.get("/")
 def check_api_status():
     """
@@ -118,7 +170,14 @@ def perform_health_check():
     """
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+def export_metrics():
+    """Prometheus scrape endpoint (HTTP, database and AI provider metrics)."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Include Routers
 app.include_router(rooms.router, prefix="/api/rooms", tags=["rooms"])
 app.include_router(bookings.router, prefix="/api/bookings", tags=["bookings"])
+app.include_router(schedule.router, prefix="/api/schedule", tags=["schedule"])
 
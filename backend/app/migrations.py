@@ -0,0 +1,104 @@
+"""
+Schema Migrations
+
+`Base.metadata.create_all` creates missing tables but never alters
+existing ones. The steps here bring databases created by older versions
+up to date. Each step checks the live schema first, so running them on
+every startup is safe.
+"""
+
+import logging
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.room import Room
+from app.models.room_amenity import RoomAmenity, normalize_amenity
+from app.services.utilization import rebuild_daily_usage
+
+logger = logging.getLogger(__name__)
+
+
+def _add_booking_series_id(connection):
+    columns = {c["name"] for c in inspect(connection).get_columns("bookings")}
+    if "series_id" not in columns:
+        connection.execute(text(
+            "ALTER TABLE bookings ADD COLUMN series_id INTEGER "
+            "REFERENCES booking_series(id) ON DELETE CASCADE"
+        ))
+        logger.info("Added bookings.series_id")
+
+
+def _add_booking_overlap_exclusion(connection):
+    """PostgreSQL only: reject overlapping bookings of a room in the database."""
+    if connection.dialect.name != "postgresql":
+        return
+    present = connection.execute(text(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'bookings_no_overlap'"
+    )).first()
+    if present:
+        return
+    try:
+        with connection.begin_nested():
+            # btree_gist lets the GiST index handle `room_id WITH =`
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+            connection.execute(text(
+                "ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap EXCLUDE USING gist ("
+                "room_id WITH =, "
+                "tsrange(booking_date + start_time, booking_date + end_time) WITH &&)"
+            ))
+        logger.info("Added bookings_no_overlap exclusion constraint")
+    except DBAPIError as e:
+        # Typically existing overlapping rows or missing privileges for the extension
+        logger.warning(f"Could not add bookings_no_overlap constraint: {e}")
+
+
+def _create_model_indexes(connection):
+    # create_all skips the indexes of tables that already exist
+    for table in (Booking.__table__, Room.__table__):
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _backfill_room_daily_usage(connection):
+    """Build the utilisation rollup once for databases that predate it."""
+    has_usage = connection.execute(text("SELECT 1 FROM room_daily_usage LIMIT 1")).first()
+    has_bookings = connection.execute(text("SELECT 1 FROM bookings LIMIT 1")).first()
+    if has_bookings and not has_usage:
+        session = Session(bind=connection, join_transaction_mode="create_savepoint")
+        logger.info(f"Backfilled {rebuild_daily_usage(session)} room utilisation rows")
+        session.close()
+
+
+def _backfill_room_amenities(connection):
+    """Fill room_amenities from the rooms' JSON amenity lists once."""
+    if connection.execute(select(RoomAmenity.room_id).limit(1)).first():
+        return
+    rooms = Room.__table__
+    rows = {
+        (room_id, normalize_amenity(amenity))
+        for room_id, amenities in connection.execute(select(rooms.c.id, rooms.c.amenities))
+        for amenity in amenities or [] if amenity.strip()
+    }
+    if rows:
+        connection.execute(RoomAmenity.__table__.insert(), [
+            {"room_id": room_id, "amenity": amenity} for room_id, amenity in sorted(rows)
+        ])
+        logger.info(f"Backfilled {len(rows)} room amenities")
+
+
+MIGRATIONS = [
+    _add_booking_series_id,
+    _add_booking_overlap_exclusion,
+    _create_model_indexes,
+    _backfill_room_daily_usage,
+    _backfill_room_amenities,
+]
+
+
+def run_migrations(engine: Engine):
+    """Apply every migration step in order (call after create_all)."""
+    with engine.begin() as connection:
+        for step in MIGRATIONS:
+            step(connection)
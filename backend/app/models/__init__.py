@@ -1,4 +1,8 @@
 from app.models.room import Room
+from app.models.room_amenity import RoomAmenity
 from app.models.booking import Booking
+from app.models.booking_series import BookingSeries
+from app.models.booking_date_version import BookingDateVersion
+from app.models.room_daily_usage import RoomDailyUsage
 
-__all__ = ["Room", "Booking"]
+__all__ = ["Room", "RoomAmenity", "Booking", "BookingSeries", "BookingDateVersion", "RoomDailyUsage"]
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Conflict checks and per-room listings (room, date, then time order)
+        Index("ix_bookings_room_date_start", "room_id", "booking_date", "start_time"),
+        # Day listings, availability loads and keyset pagination order
+        Index("ix_bookings_date_start_id", "booking_date", "start_time", "id"),
+        # "My bookings" listings
+        Index("ix_bookings_booked_by_date", "booked_by", "booking_date", "start_time"),
+        Index("ix_bookings_series_id", "series_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False)
@@ -14,6 +23,9 @@ class Booking(Base):
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+    # Set for occurrences of a recurring booking
+    series_id = Column(Integer, ForeignKey("booking_series.id", ondelete="CASCADE"), nullable=True)
 
     # Relationship to room
     room = relationship("Room", back_populates="bookings")
+    series = relationship("BookingSeries", back_populates="bookings")
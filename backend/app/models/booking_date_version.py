@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Date
+from app.database import Base
+
+class BookingDateVersion(Base):
+    """
+    Change counter per booking date, bumped in the same transaction as any
+    booking write on that date. Lets every worker derive the same ETag for
+    a day's booking listing without reading the bookings themselves.
+    """
+    __tablename__ = "booking_date_versions"
+
+    booking_date = Column(Date, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
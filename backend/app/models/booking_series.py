@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class BookingSeries(Base):
+    """
+    A recurring booking: the rule it was created from plus its expanded
+    occurrences, which are stored as ordinary bookings with `series_id` set.
+    
+    Attributes:
+        frequency: "daily" or "weekly".
+        interval: Repeat every `interval` days or weeks.
+        start_date: Date of the first occurrence.
+        until: Date of the last occurrence.
+        count: Number of occurrences created.
+    """
+    __tablename__ = "booking_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False)
+    title = Column(String(200))
+    booked_by = Column(String(100), nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    frequency = Column(String(10), nullable=False)
+    interval = Column(Integer, nullable=False, default=1)
+    start_date = Column(Date, nullable=False)
+    until = Column(Date, nullable=False)
+    count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    room = relationship("Room")
+    bookings = relationship("Booking", back_populates="series")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.room_amenity import RoomAmenity, normalize_amenity
 
 
 class Room(Base):
@@ -16,6 +17,9 @@ class Room(Base):
         created_at: Timestamp when the room was added to the system.
     """
     __tablename__ = "rooms"
+    __table_args__ = (
+        Index("ix_rooms_capacity", "capacity"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -25,4 +29,15 @@ class Room(Base):
 
     # Relationship to bookings
     bookings = relationship("Booking", back_populates="room")
+    # Indexed copy of `amenities` for filtering
+    amenity_rows = relationship("RoomAmenity", cascade="all, delete-orphan", passive_deletes=True)
+
+    @validates("amenities")
+    def sync_amenity_rows(self, key, amenities):
+        wanted = {normalize_amenity(a) for a in amenities or [] if a.strip()}
+        self.amenity_rows = [r for r in self.amenity_rows if r.amenity in wanted] + [
+            RoomAmenity(amenity=a)
+            for a in sorted(wanted - {r.amenity for r in self.amenity_rows})
+        ]
+        return amenities
 
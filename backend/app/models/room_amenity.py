@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.database import Base
+
+def normalize_amenity(name: str) -> str:
+    """Canonical amenity key: "Video Conferencing" -> "video_conferencing"."""
+    return "_".join(name.strip().lower().replace("-", " ").split())
+
+class RoomAmenity(Base):
+    """
+    One amenity of one room: an indexed, normalised copy of Room.amenities
+    used for filtering. Kept in step by Room's `amenities` validator.
+    """
+    __tablename__ = "room_amenities"
+    __table_args__ = (
+        Index("ix_room_amenities_amenity", "amenity", "room_id"),
+    )
+
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    amenity = Column(String(50), primary_key=True)
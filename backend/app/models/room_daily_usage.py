@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, JSON
+from app.database import Base
+
+class RoomDailyUsage(Base):
+    """
+    Per-room, per-day booking rollup, kept in step with the bookings table
+    by app.services.utilization.
+    
+    Attributes:
+        booked_minutes: Total booked minutes that day.
+        booking_count: Number of bookings that day.
+        hourly_minutes: Booked minutes in each hour of the day (24 ints).
+        peak_hour: Hour (0-23) with the most booked minutes, None if idle.
+    """
+    __tablename__ = "room_daily_usage"
+
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    usage_date = Column(Date, primary_key=True)
+    booked_minutes = Column(Integer, nullable=False, default=0)
+    booking_count = Column(Integer, nullable=False, default=0)
+    hourly_minutes = Column(JSON, nullable=False, default=lambda: [0] * 24)
+    peak_hour = Column(Integer, nullable=True)
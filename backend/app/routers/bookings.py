@@ -1,82 +1,417 @@
+import base64
+import json
+import os
 from typing import List, Optional
-from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
-from app.database import get_database_session
+from app.database import get_database_session, get_async_database_session
 from app.models.booking import Booking
+from app.models.booking_series import BookingSeries
 from app.models.room import Room
-from app.schemas.booking import BookingCreate, BookingRead
-from app.services.ai_parser import AIBookingParser
+from app.schemas.booking import (
+    BookingBatchCreate,
+    BookingBatchItemResult,
+    BookingBatchResult,
+    BookingCreate,
+    BookingRead,
+    BookingSeriesRead,
+)
+from app.services.ai_parser import get_ai_parser
+from app.services.availability import availability_index
+from app.services.booking_suggestions import BookingConflictError, suggest_alternatives
+from app.services.booking_writes import bump_date_versions, date_version, insert_bookings, overlap_filter
+from app.services.etags import etag_matches, not_modified
+from app.services.room_catalog import room_catalog
+from app.services.utilization import record_bookings
+from app.services.conversation_store import ConversationState, get_conversation_store
 
 router = APIRouter()
 
-def get_ai_parser():
-    """Lazy initialization of AI parser to avoid requiring API key at import time."""
-    return AIBookingParser()
+# Columns of a booking listing row, in BookingRead field order
+BOOKING_LISTING_COLUMNS = (
+    Booking.id,
+    Booking.room_id,
+    Booking.title,
+    Booking.booked_by,
+    Booking.booking_date,
+    Booking.start_time,
+    Booking.end_time,
+    Booking.created_at,
+    Room.name.label("room_name"),
+    Booking.series_id,
+)
 
-@router.get("", response_model=List[BookingRead])
-def get_bookings(
+def build_booking_listing_query(
+    db: Session,
     room_id: Optional[int] = None,
     booking_date: Optional[date] = None,
-    db: Session = Depends(get_database_session)
+    booked_by: Optional[str] = None,
 ):
     """
-    List bookings with optional filters.
+    Column query for booking listings, joined to rooms for the room name.
+    
+    Fetches everything a BookingRead needs in a single SELECT, so listing
+    never lazy-loads `Booking.room` row by row. Rows are ordered by
+    (booking_date, start_time, id), the key used for cursor pagination.
     """
-    query = db.query(Booking)
+    query = db.query(*BOOKING_LISTING_COLUMNS).join(Room, Room.id == Booking.room_id)
     
     if room_id:
         query = query.filter(Booking.room_id == room_id)
     if booking_date:
         query = query.filter(Booking.booking_date == booking_date)
+    if booked_by:
+        query = query.filter(Booking.booked_by == booked_by)
         
-    bookings = query.order_by(Booking.booking_date, Booking.start_time).all()
-    
-    # Enrich with room name for UI convenience
-    result = []
-    for b in bookings:
-        b_read = BookingRead.model_validate(b)
-        b_read.room_name = b.room.name
-        result.append(b_read)
-        
-    return result
+    return query.order_by(Booking.booking_date, Booking.start_time, Booking.id)
+
+def encode_cursor(row) -> str:
+    """Opaque cursor pointing just after the given listing row."""
+    key = f"{row.booking_date.isoformat()}|{row.start_time.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises HTTP 400 for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        day, start, booking_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(day), time.fromisoformat(start), int(booking_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def apply_cursor(query, cursor: str):
+    """Keyset filter: rows strictly after the cursor in listing order."""
+    day, start, booking_id = decode_cursor(cursor)
+    return query.filter(or_(
+        Booking.booking_date > day,
+        and_(Booking.booking_date == day, or_(
+            Booking.start_time > start,
+            and_(Booking.start_time == start, Booking.id > booking_id),
+        )),
+    ))
+
+@router.get("", response_model=List[BookingRead])
+def get_bookings(
+    request: Request,
+    response: Response,
+    room_id: Optional[int] = None,
+    booking_date: Optional[date] = None,
+    booked_by: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    collapse_series: bool = False,
+    db: Session = Depends(get_database_session)
+):
+    """
+    List bookings with optional filters.
+    
+    Pass `limit` to page through results; when more rows remain, the
+    `X-Next-Cursor` response header holds the `cursor` for the next page.
+    With `collapse_series`, occurrences of recurring bookings are left out;
+    list those once per series from `/series`.
+    
+    Listings for a `booking_date` carry an ETag tied to that date's change
+    counter and the room catalogue version (rows include `room_name`); a
+    matching `If-None-Match` gets 304 without reading bookings.
+    """
+    if booking_date:
+        # Read before the rows, so a concurrent write can only make the tag older
+        version = date_version(db, booking_date)
+        etag = f'"bookings-{booking_date.isoformat()}-{version}-{room_catalog.get(db).version}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+    query = build_booking_listing_query(db, room_id, booking_date, booked_by)
+    if collapse_series:
+        query = query.filter(Booking.series_id.is_(None))
+    if cursor:
+        query = apply_cursor(query, cursor)
+    if limit is None:
+        rows = query.all()
+    else:
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    # Plain mappings are validated once by the response model
+    return [row._asdict() for row in rows]
+
+EXPORT_BATCH_SIZE = 500
+
+@router.get("/export")
+def export_bookings(
+    room_id: Optional[int] = None,
+    booking_date: Optional[date] = None,
+    booked_by: Optional[str] = None,
+    db: Session = Depends(get_database_session)
+):
+    """
+    Stream bookings as newline-delimited JSON (`application/x-ndjson`).
+    
+    Rows are fetched in batches from a server-side cursor on a dedicated
+    connection and written as they arrive, so memory use does not grow
+    with the size of the export.
+    """
+    statement = build_booking_listing_query(db, room_id, booking_date, booked_by).statement
+    # The request session is closed before the body is streamed, so the
+    # generator opens its own connection on the same engine.
+    bind = db.get_bind()
+
+    def generate_rows():
+        with bind.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=EXPORT_BATCH_SIZE
+            ).execute(statement)
+            for row in result:
+                yield json.dumps(row._asdict(), default=lambda v: v.isoformat()) + "\n"
+
+    return StreamingResponse(generate_rows(), media_type="application/x-ndjson")
 
 @router.post("", response_model=BookingRead)
 def create_booking(booking: BookingCreate, db: Session = Depends(get_database_session)):
     """
     Create a new booking with conflict detection.
+    
+    The conflict check and the insert are a single atomic statement, so
+    concurrent requests for the same slot cannot both succeed. A conflict
+    is answered with 409 and a list of alternative `suggestions`.
     """
     # 1. Check if room exists
     room = db.query(Room).filter(Room.id == booking.room_id).first()
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
+    if booking.recurrence is not None:
+        return create_recurring_booking(booking, room, db)
         
-    # 2. Check for conflicts
-    # Conflict logic: 
-    # (NewStart < ExistingEnd) AND (NewEnd > ExistingStart)
-    conflict = db.query(Booking).filter(
-        Booking.room_id == booking.room_id,
-        Booking.booking_date == booking.booking_date,
-        Booking.start_time < booking.end_time,
-        Booking.end_time > booking.start_time
-    ).first()
-    
-    if conflict:
-        raise HTTPException(
-            status_code=409, 
-            detail=f"Room is already booked from {conflict.start_time} to {conflict.end_time}"
+    # 2. Insert unless it conflicts
+    inserted = insert_bookings(db, [booking.model_dump(exclude={"recurrence"})])
+    if not inserted:
+        db.rollback()
+        conflict = db.query(Booking).filter(overlap_filter(
+            booking.room_id, booking.booking_date, booking.start_time, booking.end_time
+        )).first()
+        raise BookingConflictError(
+            f"Room is already booked from {conflict.start_time} to {conflict.end_time}"
+            if conflict else "Room is already booked at that time",
+            suggest_alternatives(db, room, booking.booking_date, booking.start_time, booking.end_time),
         )
-        
-    new_booking = Booking(**booking.model_dump())
-    db.add(new_booking)
+    record_bookings(db, inserted)
+    bump_date_versions(db, [b.booking_date for b in inserted])
     db.commit()
-    db.refresh(new_booking)
+    new_booking = inserted[0]
+    availability_index.add(new_booking)
     
     # Enrich response
-    response = BookingRead.model_validate(new_booking)
-    response.room_name = room.name
-    return response
+    return {**new_booking._asdict(), "room_name": room.name}
+
+def create_recurring_booking(booking: BookingCreate, room: Room, db: Session):
+    """
+    Expand a recurring booking and store it as a series.
+    
+    All occurrences go in with guarded bulk INSERTs in one transaction; if
+    any of them conflicts the whole series is rolled back. Returns the
+    first occurrence.
+    """
+    dates = booking.recurrence.occurrences(booking.booking_date)
+    fields = booking.model_dump(exclude={"recurrence", "booking_date"})
+    series = BookingSeries(
+        **fields,
+        frequency=booking.recurrence.frequency,
+        interval=booking.recurrence.interval,
+        start_date=dates[0],
+        until=dates[-1],
+        count=len(dates),
+    )
+    db.add(series)
+    db.flush()
+    inserted = insert_bookings(db, [
+        {**fields, "booking_date": day, "series_id": series.id} for day in dates
+    ])
+    if len(inserted) < len(dates):
+        db.rollback()
+        raise HTTPException(status_code=409, detail=describe_series_clashes(db, booking, dates))
+    record_bookings(db, inserted)
+    bump_date_versions(db, [b.booking_date for b in inserted])
+    db.commit()
+
+    for row in inserted:
+        availability_index.add(row)
+    first = min(inserted, key=lambda row: row.booking_date)
+    return {**first._asdict(), "room_name": room.name}
+
+def describe_series_clashes(db: Session, booking: BookingCreate, dates: List[date]) -> str:
+    """Conflict message listing existing bookings that clash with a series."""
+    occurrence_dates = set(dates)
+    # One range query over the span; bookings between occurrences are dropped here
+    clashes = [
+        row for row in db.query(Booking.booking_date, Booking.start_time, Booking.end_time).filter(
+            Booking.room_id == booking.room_id,
+            Booking.booking_date.between(dates[0], dates[-1]),
+            Booking.start_time < booking.end_time,
+            Booking.end_time > booking.start_time,
+        ).order_by(Booking.booking_date, Booking.start_time)
+        if row.booking_date in occurrence_dates
+    ]
+    listed = ", ".join(f"{c.booking_date} {c.start_time}-{c.end_time}" for c in clashes[:10])
+    return f"Room is already booked on {len(clashes)} of {len(dates)} occurrences: {listed}"
+
+@router.get("/series", response_model=List[BookingSeriesRead])
+def get_booking_series(
+    room_id: Optional[int] = None,
+    booking_date: Optional[date] = None,
+    db: Session = Depends(get_database_session)
+):
+    """
+    List recurring bookings, one entry per series.
+    
+    `booking_date` keeps series whose span covers that date.
+    """
+    query = db.query(BookingSeries, Room.name).join(Room, Room.id == BookingSeries.room_id)
+    if room_id:
+        query = query.filter(BookingSeries.room_id == room_id)
+    if booking_date:
+        query = query.filter(BookingSeries.start_date <= booking_date, BookingSeries.until >= booking_date)
+    results = []
+    for series, room_name in query.order_by(BookingSeries.start_date, BookingSeries.id):
+        item = BookingSeriesRead.model_validate(series)
+        item.room_name = room_name
+        results.append(item)
+    return results
+
+@router.delete("/series/{series_id}")
+def cancel_booking_series(series_id: int, db: Session = Depends(get_database_session)):
+    """
+    Cancel every occurrence of a recurring booking.
+    """
+    series = db.query(BookingSeries).filter(BookingSeries.id == series_id).first()
+    if not series:
+        raise HTTPException(status_code=404, detail="Series not found")
+    occurrences = db.query(
+        Booking.id, Booking.room_id, Booking.booking_date, Booking.start_time, Booking.end_time
+    ).filter(Booking.series_id == series_id).all()
+    db.query(Booking).filter(Booking.series_id == series_id).delete(synchronize_session=False)
+    db.delete(series)
+    record_bookings(db, occurrences, cancelled=True)
+    bump_date_versions(db, [b.booking_date for b in occurrences])
+    db.commit()
+    for occurrence in occurrences:
+        availability_index.remove(occurrence)
+    return {"message": f"Cancelled {len(occurrences)} bookings"}
+
+@router.post("/batch", response_model=BookingBatchResult)
+def create_bookings_batch(batch: BookingBatchCreate, db: Session = Depends(get_database_session)):
+    """
+    Create many bookings in one request and one transaction.
+    
+    Every item is validated and checked against existing bookings (one
+    query for all of them) and against earlier items of the same batch.
+    Each item gets its own result; failures do not affect other items
+    unless `atomic` is set, in which case nothing is created.
+    """
+    results = [BookingBatchItemResult(index=i, status="pending") for i in range(len(batch.bookings))]
+    candidates = []
+    for i, item in enumerate(batch.bookings):
+        try:
+            candidate = BookingCreate.model_validate(item)
+        except ValidationError as e:
+            results[i].status = "invalid"
+            results[i].detail = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+                for err in e.errors()
+            )
+            continue
+        if candidate.recurrence is not None:
+            results[i].status = "invalid"
+            results[i].detail = "Recurring bookings cannot be created in a batch"
+            continue
+        candidates.append((i, candidate))
+
+    room_ids = {c.room_id for _, c in candidates}
+    room_names = dict(
+        db.query(Room.id, Room.name).filter(Room.id.in_(room_ids)).all()
+    ) if room_ids else {}
+
+    # Existing bookings on every (room, date) the batch touches, in one query
+    occupied = {}
+    if candidates:
+        existing = db.query(
+            Booking.room_id, Booking.booking_date, Booking.start_time, Booking.end_time
+        ).filter(
+            Booking.room_id.in_(room_ids),
+            Booking.booking_date.in_({c.booking_date for _, c in candidates}),
+        )
+        for row in existing:
+            occupied.setdefault((row.room_id, row.booking_date), []).append(
+                (row.start_time, row.end_time, None)
+            )
+
+    accepted = []
+    for i, candidate in candidates:
+        if candidate.room_id not in room_names:
+            results[i].status = "room_not_found"
+            results[i].detail = "Room not found"
+            continue
+        slots = occupied.setdefault((candidate.room_id, candidate.booking_date), [])
+        # Conflict logic: (NewStart < ExistingEnd) AND (NewEnd > ExistingStart)
+        clash = next(
+            (s for s in slots if candidate.start_time < s[1] and candidate.end_time > s[0]), None
+        )
+        if clash is not None:
+            results[i].status = "conflict"
+            results[i].detail = (
+                f"Room is already booked from {clash[0]} to {clash[1]}" if clash[2] is None
+                else f"Overlaps item {clash[2]} of this batch"
+            )
+            continue
+        slots.append((candidate.start_time, candidate.end_time, i))
+        accepted.append((i, candidate))
+
+    failed = len(results) - len(accepted)
+    if batch.atomic and failed:
+        for i, _ in accepted:
+            results[i].status = "skipped"
+            results[i].detail = "Batch is atomic and other items failed"
+        return BookingBatchResult(created=0, failed=len(results), results=results)
+
+    if accepted:
+        # Bookings made concurrently since the read above are caught here
+        inserted = {
+            (row.room_id, row.booking_date, row.start_time): row for row in insert_bookings(
+                db, [candidate.model_dump(exclude={"recurrence"}) for _, candidate in accepted]
+            )
+        }
+        rolled_back = set()
+        if batch.atomic and len(inserted) < len(accepted):
+            db.rollback()
+            rolled_back, inserted = set(inserted), {}
+        record_bookings(db, inserted.values())
+        bump_date_versions(db, [b.booking_date for b in inserted.values()])
+        db.commit()
+        created = []
+        for i, candidate in accepted:
+            key = (candidate.room_id, candidate.booking_date, candidate.start_time)
+            row = inserted.get(key)
+            if key in rolled_back:
+                results[i].status = "skipped"
+                results[i].detail = "Batch is atomic and another item was booked by a concurrent request"
+                continue
+            if row is None:
+                results[i].status = "conflict"
+                results[i].detail = "Room was booked by a concurrent request"
+                continue
+            availability_index.add(row)
+            results[i].status = "created"
+            results[i].booking = BookingRead(**row._asdict(), room_name=room_names[candidate.room_id])
+            created.append(i)
+        failed = len(results) - len(created)
+        accepted = created
+
+    return BookingBatchResult(created=len(accepted), failed=failed, results=results)
 
 @router.delete("/{booking_id}")
 def cancel_booking(booking_id: int, db: Session = Depends(get_database_session)):
@@ -88,17 +423,20 @@ def cancel_booking(booking_id: int, db: Session = Depends(get_database_session))
         raise HTTPException(status_code=404, detail="Booking not found")
         
     db.delete(booking)
+    record_bookings(db, [booking], cancelled=True)
+    bump_date_versions(db, [booking.booking_date])
     db.commit()
+    availability_index.remove(booking)
     return {"message": "Booking cancelled successfully"}
 
 @router.post("/parse")
-async def analyze_booking_request(text: str, db: Session = Depends(get_database_session)):
+async def analyze_booking_request(text: str, db: AsyncSession = Depends(get_async_database_session)):
     """
     Analyze a natural language booking request using AI (legacy single-shot).
     
     Returns structured data that can be used to create a booking.
     """
-    rooms = db.query(Room).all()
+    rooms = (await room_catalog.get_async(db)).rooms
     room_context = [{"name": r.name, "capacity": r.capacity} for r in rooms]
     
     ai_parser = get_ai_parser()
@@ -106,6 +444,14 @@ async def analyze_booking_request(text: str, db: Session = Depends(get_database_
     return extraction_result
 
 
+@router.get("/ai/stats")
+async def get_ai_stats():
+    """
+    Runtime counters of the shared AI agent (reply cache hits and misses).
+    """
+    return get_ai_parser().stats()
+
+
 from pydantic import BaseModel
 
 class ConversationMessage(BaseModel):
@@ -115,35 +461,99 @@ class ConversationMessage(BaseModel):
 class ConversationRequest(BaseModel):
     message: str
     history: List[ConversationMessage] = []
+    conversation_id: Optional[str] = None
+    # Only offer the agent rooms matching these
+    min_capacity: Optional[int] = None
+    amenities: List[str] = []
+
+async def load_room_context(
+    db: AsyncSession,
+    min_capacity: Optional[int] = None,
+    amenities: Optional[List[str]] = None,
+) -> List[dict]:
+    """Rooms the agent may choose from, as passed to the AI parser."""
+    catalog = await room_catalog.get_async(db)
+    rooms = catalog.filter(min_capacity, amenities) if min_capacity or amenities else catalog.rooms
+    return [
+        {"name": r.name, "capacity": r.capacity, "id": r.id, "amenities": r.amenities or []}
+        for r in rooms
+    ]
+
+# Approximate token budget for the history and summary sent with each turn
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "2000"))
+
+async def load_conversation(request: ConversationRequest) -> Optional[ConversationState]:
+    """
+    Server-side state for this turn.
+    
+    Returns None for legacy clients that resend the full `history` without
+    a `conversation_id`; those keep the stateless behaviour. Without an id a
+    new conversation starts, under an id the server issues; an unknown or
+    expired id is rejected with 404 so ids cannot be chosen by clients.
+    """
+    if request.conversation_id is None:
+        if request.history:
+            return None
+        return ConversationState()
+    state = await get_conversation_store().get(request.conversation_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Conversation not found or expired")
+    return state
+
+async def save_conversation_turn(state: ConversationState, message: str, result: dict):
+    """Record the exchange, compact old turns and tag the reply with the id."""
+    if "error" not in result:
+        state.record_turn(message, result)
+        state.compact(CONVERSATION_TOKEN_BUDGET)
+        await get_conversation_store().save(state)
+    result["conversation_id"] = state.conversation_id
+
+@router.delete("/converse/{conversation_id}")
+async def end_conversation(conversation_id: str):
+    """
+    Discard the server-side state of a conversation.
+    """
+    await get_conversation_store().delete(conversation_id)
+    return {"message": "Conversation ended"}
 
 @router.post("/converse")
 async def converse_with_agent(
     request: ConversationRequest, 
-    db: Session = Depends(get_database_session)
+    db: AsyncSession = Depends(get_async_database_session)
 ):
     """
     Multi-turn conversational booking agent.
     
-    Send a message along with conversation history to get an AI response
-    that either asks clarifying questions or confirms booking is ready.
+    Send a message to get an AI response that either asks clarifying
+    questions or confirms booking is ready. Pass back the returned
+    `conversation_id` on later turns and the server keeps the history;
+    sending the full `history` without an id is still supported.
     
     Returns:
         {
             "message": "AI's conversational response",
             "booking_ready": true/false,
-            "booking_data": {...} when ready
+            "booking_data": {...} when ready,
+            "conversation_id": "..."
         }
     """
-    rooms = db.query(Room).all()
-    room_context = [{"name": r.name, "capacity": r.capacity, "id": r.id} for r in rooms]
+    room_context = await load_room_context(db, request.min_capacity, request.amenities)
     
-    # Convert history to dict format
-    history = [{"role": m.role, "content": m.content} for m in request.history]
+    state = await load_conversation(request)
+    if state is not None:
+        history, context = list(state.turns), state.context()
+    else:
+        # Convert history to dict format
+        history, context = [{"role": m.role, "content": m.content} for m in request.history], None
     
     ai_parser = get_ai_parser()
-    result = await ai_parser.converse(request.message, history, room_context)
-    
-    # If booking is ready, try to resolve room ID
+    result = await ai_parser.converse(request.message, history, room_context, context)
+    if state is not None:
+        await save_conversation_turn(state, request.message, result)
+    return resolve_booking_room(result, room_context)
+
+def resolve_booking_room(result: dict, room_context: List[dict]) -> dict:
+    """If the agent says the booking is ready, attach the matching room ID."""
     if result.get("booking_ready") and result.get("booking_data"):
         booking_data = result["booking_data"]
         room_name = booking_data.get("room_name")
@@ -156,3 +566,54 @@ async def converse_with_agent(
     
     return result
 
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/converse/stream")
+async def stream_conversation_with_agent(
+    request: ConversationRequest,
+    db: AsyncSession = Depends(get_async_database_session)
+):
+    """
+    Streaming (server-sent events) variant of /converse.
+    
+    Emits `message` events carrying `{"delta": "..."}` pieces of the
+    assistant's reply as the model generates them, then a single `done`
+    event whose data is the same object /converse returns.
+    """
+    room_context = await load_room_context(db, request.min_capacity, request.amenities)
+    state = await load_conversation(request)
+    if state is not None:
+        history, context = list(state.turns), state.context()
+    else:
+        history, context = [{"role": m.role, "content": m.content} for m in request.history], None
+    ai_parser = get_ai_parser()
+    stream = ai_parser.converse_stream(request.message, history, room_context, context)
+    # Wait for the first event before the response starts, so a shed
+    # request still gets a 503 instead of a 200 stream
+    first_event = await stream.__anext__()
+
+    async def generate_events():
+        kind, payload = first_event
+        try:
+            while True:
+                if kind == "message":
+                    yield format_sse("message", {"delta": payload})
+                else:
+                    if state is not None:
+                        await save_conversation_turn(state, request.message, payload)
+                    yield format_sse("done", resolve_booking_room(payload, room_context))
+                try:
+                    kind, payload = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+        finally:
+            # A client that disconnects must not keep the model call running
+            await stream.aclose()
+
+    return StreamingResponse(
+        generate_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
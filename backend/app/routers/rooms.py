@@ -1,25 +1,89 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from typing import List, Optional
+from datetime import date, time, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_database_session
 from app.models.room import Room
-from app.schemas.room import RoomRead
+from app.models.room_daily_usage import RoomDailyUsage
+from app.schemas.room import RoomRead, RoomUtilization, UtilizationPeriod
+from app.services.availability import availability_index
+from app.services.etags import etag_matches, not_modified
+from app.services.room_catalog import room_catalog
+from app.services.room_search import room_filter_statement
+from app.services.utilization import peak_hour
 
 router = APIRouter()
 
+# Bookable minutes per day that utilisation is measured against
+WORKDAY_MINUTES = int(os.getenv("UTILIZATION_WORKDAY_MINUTES", "600"))
+MAX_UTILIZATION_DAYS = 366
+
 @router.get("", response_model=List[RoomRead])
-def list_available_rooms(db: Session = Depends(get_database_session)):
+def list_available_rooms(
+    request: Request,
+    min_capacity: Optional[int] = Query(None, ge=1),
+    amenities: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_database_session)
+):
     """
     Retrieve a list of all available meeting rooms.
     
+    Args:
+        min_capacity (int, optional): Only rooms holding at least this many people.
+        amenities (List[str], optional): Required amenities (all must be
+            present); repeat the parameter or pass a comma-separated list.
+    
+    Served from the in-memory room catalogue with a strong ETag; send it
+    back in `If-None-Match` to get 304 Not Modified while rooms are unchanged.
+    
     Returns:
         List[RoomRead]: A list of room objects with their details.
     """
-    rooms = db.query(Room).all()
-    return rooms
+    catalog = room_catalog.get(db)
+    if etag_matches(request, catalog.etag):
+        return not_modified(catalog.etag)
+    headers = {"ETag": catalog.etag}
+    if min_capacity is None and not amenities:
+        return Response(content=catalog.body, media_type="application/json", headers=headers)
+    return JSONResponse(jsonable_encoder(catalog.filter(min_capacity, amenities)), headers=headers)
+
+@router.get("/available", response_model=List[RoomRead])
+def search_available_rooms(
+    booking_date: date = Query(..., alias="date"),
+    start_time: time = Query(...),
+    end_time: time = Query(...),
+    min_capacity: Optional[int] = Query(None, ge=1),
+    amenities: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_database_session)
+):
+    """
+    Find rooms that are free for the whole of a time slot.
+    
+    Occupancy is answered from the in-memory availability index rather than
+    by querying bookings, so the cost is a binary search per candidate room.
+    
+    Args:
+        booking_date (date): Day of the slot (query parameter `date`).
+        start_time (time): Slot start.
+        end_time (time): Slot end.
+        min_capacity (int, optional): Only rooms holding at least this many people.
+        amenities (List[str], optional): Required amenities; repeat the
+            parameter or pass a comma-separated list.
+    """
+    if end_time <= start_time:
+        raise HTTPException(status_code=422, detail="End time must be after start time")
+
+    rooms = db.execute(room_filter_statement(min_capacity, amenities)).scalars().all()
+    free_ids = set(availability_index.free_room_ids(
+        db, [r.id for r in rooms], booking_date, start_time, end_time
+    ))
+    return [r for r in rooms if r.id in free_ids]
 
 @router.get("/{room_id}", response_model=RoomRead)
-def retrieve_room_details(room_id: int, db: Session = Depends(get_database_session)):
+def retrieve_room_details(room_id: int, request: Request, db: Session = Depends(get_database_session)):
     """
     Retrieve detailed information for a specific room.
     
@@ -29,7 +93,76 @@ def retrieve_room_details(room_id: int, db: Session = Depends(get_database_sessi
     Raises:
         HTTPException: If the room is not found.
     """
-    room = db.query(Room).filter(Room.id == room_id).first()
-    if not room:
+    catalog = room_catalog.get(db)
+    room = catalog.by_id.get(room_id)
+    if room is None:
+        # Possibly created by another worker since the catalogue was loaded
+        room = db.query(Room).filter(Room.id == room_id).first()
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
+        return room
+    if etag_matches(request, catalog.etag):
+        return not_modified(catalog.etag)
+    return JSONResponse(jsonable_encoder(room), headers={"ETag": catalog.etag})
+
+@router.get("/{room_id}/utilization", response_model=RoomUtilization)
+def get_room_utilization(
+    room_id: int,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    db: Session = Depends(get_database_session)
+):
+    """
+    Daily and weekly occupancy of a room between two dates (inclusive).
+    
+    Served from the RoomDailyUsage rollup: one row per booked day, so the
+    cost does not depend on how many bookings the room has.
+    
+    Args:
+        room_id (int): The unique identifier of the room.
+        from_date (date): First day (query parameter `from`).
+        to_date (date): Last day (query parameter `to`).
+    """
+    if to_date < from_date:
+        raise HTTPException(status_code=422, detail="`to` must not be before `from`")
+    if (to_date - from_date).days >= MAX_UTILIZATION_DAYS:
+        raise HTTPException(status_code=422, detail=f"Range is limited to {MAX_UTILIZATION_DAYS} days")
+    if not db.query(Room.id).filter(Room.id == room_id).first():
         raise HTTPException(status_code=404, detail="Room not found")
-    return room
+
+    usage = {
+        row.usage_date: row for row in db.query(RoomDailyUsage).filter(
+            RoomDailyUsage.room_id == room_id,
+            RoomDailyUsage.usage_date.between(from_date, to_date),
+        )
+    }
+
+    daily = []
+    for offset in range((to_date - from_date).days + 1):
+        day = from_date + timedelta(days=offset)
+        row = usage.get(day)
+        daily.append((day, row.hourly_minutes if row else [0] * 24, row.booking_count if row else 0))
+
+    # ISO weeks (Monday start), clipped to the requested range
+    weeks = {}
+    for day, hours, count in daily:
+        week_start = max(from_date, day - timedelta(days=day.weekday()))
+        week_hours, week_count, week_days = weeks.get(week_start, ([0] * 24, 0, 0))
+        weeks[week_start] = ([a + b for a, b in zip(week_hours, hours)], week_count + count, week_days + 1)
+
+    return RoomUtilization(
+        room_id=room_id,
+        workday_minutes=WORKDAY_MINUTES,
+        days=[_utilization_period(day, hours, count, 1) for day, hours, count in daily],
+        weeks=[_utilization_period(start, *totals) for start, totals in weeks.items()],
+    )
+
+def _utilization_period(start: date, hourly_minutes: List[int], booking_count: int, length_days: int):
+    booked = sum(hourly_minutes)
+    return UtilizationPeriod(
+        start_date=start,
+        booked_minutes=booked,
+        booking_count=booking_count,
+        utilization=round(booked / (WORKDAY_MINUTES * length_days), 4),
+        peak_hour=peak_hour(hourly_minutes),
+    )
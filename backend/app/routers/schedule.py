@@ -0,0 +1,56 @@
+import base64
+from typing import List, Optional
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database import get_database_session
+from app.schemas.schedule import RoomSchedule, ScheduleRead
+from app.services.availability import availability_index
+
+router = APIRouter()
+
+ALLOWED_GRANULARITIES = (5, 10, 15, 30, 60)
+MAX_SCHEDULE_DAYS = 62
+
+@router.get("", response_model=ScheduleRead)
+def get_schedule(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    granularity: int = Query(15),
+    room_id: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_database_session)
+):
+    """
+    Occupancy grid for calendar views: one packed bitmap per room per day.
+    
+    Each bitmap has one bit per `granularity`-minute slot (96 bits, 16
+    base64 characters, at 15 minutes), set when the slot is booked. Rooms
+    and days without bookings are omitted and should be drawn as free.
+    
+    Args:
+        from_date (date): First day (query parameter `from`).
+        to_date (date): Last day, inclusive (query parameter `to`).
+        granularity (int): Slot length in minutes: 5, 10, 15, 30 or 60.
+        room_id (List[int], optional): Limit to these rooms; repeat the parameter.
+    """
+    if granularity not in ALLOWED_GRANULARITIES:
+        raise HTTPException(status_code=422, detail=f"granularity must be one of {ALLOWED_GRANULARITIES}")
+    if to_date < from_date:
+        raise HTTPException(status_code=422, detail="`to` must not be before `from`")
+    if (to_date - from_date).days >= MAX_SCHEDULE_DAYS:
+        raise HTTPException(status_code=422, detail=f"Range is limited to {MAX_SCHEDULE_DAYS} days")
+
+    dates = [from_date + timedelta(days=i) for i in range((to_date - from_date).days + 1)]
+    bitmaps = availability_index.slot_bitmaps(db, dates, granularity, room_id)
+
+    rooms = {}
+    for (booked_room_id, day), bitmap in sorted(bitmaps.items()):
+        rooms.setdefault(booked_room_id, {})[day] = base64.b64encode(bitmap).decode()
+
+    return ScheduleRead(
+        from_date=from_date,
+        to_date=to_date,
+        granularity=granularity,
+        slots_per_day=24 * 60 // granularity,
+        rooms=[RoomSchedule(room_id=r, days=days) for r, days in rooms.items()],
+    )
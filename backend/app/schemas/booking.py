@@ -1,6 +1,6 @@
-from datetime import date, time, datetime
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, field_validator
+from datetime import date, time, datetime, timedelta
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 class BookingBase(BaseModel):
     room_id: int
@@ -10,7 +10,38 @@ class BookingBase(BaseModel):
     start_time: time
     end_time: time
 
+# Upper bound on the occurrences a single recurring booking may expand to
+MAX_OCCURRENCES = 366
+
+class RecurrenceRule(BaseModel):
+    frequency: Literal["daily", "weekly"]
+    interval: int = Field(1, ge=1, le=52)  # Every N days / weeks
+    until: Optional[date] = None  # Last possible date, inclusive
+    count: Optional[int] = Field(None, ge=1, le=MAX_OCCURRENCES)
+
+    @model_validator(mode="after")
+    def validate_end(self):
+        if self.until is None and self.count is None:
+            raise ValueError("Recurrence needs `until` or `count`")
+        return self
+
+    def occurrences(self, first: date) -> List[date]:
+        """Dates of every occurrence starting at `first`."""
+        step = timedelta(days=self.interval * (7 if self.frequency == "weekly" else 1))
+        dates = []
+        current = first
+        while (self.until is None or current <= self.until) and (
+            self.count is None or len(dates) < self.count
+        ):
+            if len(dates) == MAX_OCCURRENCES:
+                raise ValueError(f"Recurrence expands to more than {MAX_OCCURRENCES} occurrences")
+            dates.append(current)
+            current += step
+        return dates
+
 class BookingCreate(BookingBase):
+    recurrence: Optional[RecurrenceRule] = None
+
     @field_validator("end_time")
     def validate_time_range(cls, v, values):
         if "start_time" in values.data and v <= values.data["start_time"]:
@@ -24,10 +55,20 @@ class BookingCreate(BookingBase):
              raise ValueError("Booking date cannot be in the past")
         return v
 
+    @model_validator(mode="after")
+    def validate_recurrence(self):
+        if self.recurrence is not None:
+            if self.recurrence.until is not None and self.recurrence.until < self.booking_date:
+                raise ValueError("Recurrence `until` is before the booking date")
+            # Fails early for rules that expand to too many occurrences
+            self.recurrence.occurrences(self.booking_date)
+        return self
+
 class BookingRead(BookingBase):
     id: int
     created_at: datetime
     room_name: Optional[str] = None # Enriched field
+    series_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -35,3 +76,36 @@ class BookingUpdate(BaseModel):
     title: Optional[str] = None
     # We generally don't want to change times without conflict checks, so simplify to just title for now per check
     pass
+
+class BookingBatchCreate(BaseModel):
+    # Items are validated one by one so a bad item fails only itself
+    bookings: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000)
+    atomic: bool = False  # All-or-nothing: create nothing if any item fails
+
+class BookingBatchItemResult(BaseModel):
+    index: int
+    status: str  # created | invalid | room_not_found | conflict | skipped
+    booking: Optional[BookingRead] = None
+    detail: Optional[str] = None
+
+class BookingBatchResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BookingBatchItemResult]
+
+class BookingSeriesRead(BaseModel):
+    id: int
+    room_id: int
+    room_name: Optional[str] = None
+    title: Optional[str] = None
+    booked_by: str
+    start_time: time
+    end_time: time
+    frequency: str
+    interval: int
+    start_date: date
+    until: date
+    count: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
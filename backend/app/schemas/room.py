@@ -1,6 +1,6 @@
 from typing import List, Optional
 from pydantic import BaseModel, ConfigDict
-from datetime import datetime
+from datetime import date, datetime
 
 class RoomBase(BaseModel):
     name: str
@@ -12,3 +12,16 @@ class RoomRead(RoomBase):
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
+
+class UtilizationPeriod(BaseModel):
+    start_date: date
+    booked_minutes: int
+    booking_count: int
+    utilization: float  # Booked share of working minutes in the period
+    peak_hour: Optional[int] = None
+
+class RoomUtilization(BaseModel):
+    room_id: int
+    workday_minutes: int
+    days: List[UtilizationPeriod]
+    weeks: List[UtilizationPeriod]  # ISO weeks, clipped to the requested range
@@ -0,0 +1,16 @@
+from datetime import date
+from typing import Dict, List
+from pydantic import BaseModel
+
+class RoomSchedule(BaseModel):
+    room_id: int
+    # Date -> base64 slot bitmap; dates without bookings are omitted
+    days: Dict[date, str]
+
+class ScheduleRead(BaseModel):
+    from_date: date
+    to_date: date
+    granularity: int  # Minutes per slot
+    slots_per_day: int
+    # Slot i is bit (7 - i % 8) of byte i // 8 of the decoded bitmap
+    rooms: List[RoomSchedule]
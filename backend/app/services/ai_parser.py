@@ -2,21 +2,327 @@
 AI Booking Parser Service - Conversational Agent
 
 This module provides a multi-turn conversational AI for room booking.
-Supports both OpenAI/OpenRouter and Ollama as AI providers.
+Supports both OpenAI/OpenRouter and Ollama as AI providers, plus an
+offline stub for load testing.
 """
 
 import os
+import copy
 import json
 import re
+import hashlib
 import logging
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+import httpx
+import openai
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
+from app.services.llm_cache import LLMResponseCache
+from app.services.reply_parsing import StreamingReplyParser, find_json_object
+from app.services.single_flight import SingleFlight
+from app.services.llm_scheduler import LLMScheduler, LLMOverloadedError
+from app.services.metrics import LLM_REPLY_PARSES, LLMMetricsCallback
 
 logger = logging.getLogger(__name__)
 
 
+def _http_pool_limits() -> httpx.Limits:
+    """Keep-alive connection pool limits for the provider HTTP client."""
+    return httpx.Limits(
+        max_connections=int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def _rooms_fingerprint(rooms: List[Dict[str, Any]]) -> str:
+    """Short digest identifying a room catalogue as seen by the agent."""
+    payload = json.dumps(rooms, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+# Rendered room lists kept per agent; several, since room lists filtered
+# per request would otherwise keep evicting each other
+_ROOM_BLOCK_CACHE_SIZE = 8
+
+
+def _create_scheduler() -> LLMScheduler:
+    """Build the model call scheduler from AI_* settings."""
+    return LLMScheduler(
+        max_in_flight=int(os.getenv("AI_MAX_IN_FLIGHT", "8")),
+        max_queue=int(os.getenv("AI_MAX_QUEUE", "32")),
+        deadline_seconds=float(os.getenv("AI_DEADLINE_SECONDS", "30")),
+        hedge=os.getenv("AI_HEDGE_ENABLED", "false").lower() == "true",
+        hedge_min_delay=float(os.getenv("AI_HEDGE_MIN_DELAY", "0.5")),
+    )
+
+
+def _create_response_cache() -> Optional[LLMResponseCache]:
+    """Build the reply cache from AI_CACHE_* settings (None when disabled)."""
+    if os.getenv("AI_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    return LLMResponseCache(
+        max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv("AI_CACHE_TTL_SECONDS", "3600")),
+        disk_path=os.getenv("AI_CACHE_PATH") or None,
+    )
+
+
+# Static part of the agent's system prompt. Everything that varies per
+# request (rooms, date, conversation context) goes after it so the prefix
+# stays byte-identical and provider-side prompt caching can hit.
+SYSTEM_PROMPT_PREFIX = """You are a smart booking assistant. Your goal is to book a meeting room as EFFICIENTLY as possible.
+
+The available rooms and today's date are listed at the end of these instructions.
+
+INSTRUCTIONS:
+1. ANALYZE the user's message and the conversation history.
+2. EXTRACT every piece of information provided (Room, Date, Time, Capacity).
+3. IF user specifies a relative date (e.g., "tomorrow"), CALCULATE the actual YYYY-MM-DD.
+4. IF user says "any room" or doesn't care, PICK the best room based on capacity (or random if not specified). DO NOT ask which room if they said "any".
+5. DO NOT ask for information that has already been provided.
+
+CRITICAL RULES:
+- If user provides ALL needed info (Room/Capacity, Date, Time), set booking_ready=true IMMEDIATELY.
+- If user needs a room for X people, auto-select a room that fits.
+- If user needs an amenity (projector, video conferencing...), only pick rooms that list it.
+- If multiple inputs are given, accept them all at once.
+- Default duration is 1 hour if not specified.
+
+Required Final Output (JSON):
+{
+    "message": "Response text. If booking ready, summarize: 'Booking [Room] for [Date] at [Time]'. If missing info, ask for it.",
+    "booking_ready": boolean,
+    "booking_data": {
+        "room_name": "Selected Room Name (REQUIRED for true)",
+        "date": "YYYY-MM-DD (REQUIRED for true)",
+        "start_time": "HH:MM (REQUIRED for true)",
+        "end_time": "HH:MM",
+        "title": "Topic",
+        "booked_by": "Name"
+    }
+}"""
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+_TIME = r"(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?"
+
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_RELATIVE_DATE_RE = re.compile(r"\b(day after tomorrow|tomorrow|today|in (\d+) days?)\b")
+_WEEKDAY_RE = re.compile(r"\b(?:(on|this|next)\s+)?(" + "|".join(_WEEKDAYS) + r")\b")
+_MONTH_DAY_RE = re.compile(rf"\b(?:{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?|(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH})\b")
+_CAPACITY_RE = re.compile(r"\b(\d+)\s*(?:people|persons?|attendees|guests|participants|pax)\b")
+_DURATION_RE = re.compile(r"\b(?:(half an?)\s+hour|an?\s+hour|(\d+(?:\.\d+)?)\s*-?\s*(hours?|hrs?|minutes?|mins?))\b")
+_TIME_RANGE_RE = re.compile(rf"\b(?:from\s+)?{_TIME}\s*(?:-|–|to|until|till)\s*{_TIME}(?!\w)")
+_SINGLE_TIME_RE = re.compile(rf"(?:\b(?:at|@|from)\s*)?\b{_TIME}(?!\w)|\b(noon|midday)\b")
+# Phrasings where extracted slots cannot be trusted without the model
+_UNSAFE_WORDS_RE = re.compile(r"\b(not|don't|dont|cancel|instead|change|move|except|or)\b")
+
+
+class _Unresolved(Exception):
+    """Raised inside RuleBasedExtractor when a slot is missing or ambiguous."""
+
+
+class RuleBasedExtractor:
+    """
+    Deterministic extractor for fully structured booking requests.
+    
+    Resolves relative and absolute dates, time ranges, durations, head
+    counts and room names (taken from the room context) with regular
+    expressions. It only claims a result when every slot was found
+    unambiguously; anything it cannot account for is left to the LLM.
+    """
+
+    def __init__(self, default_duration_minutes: int = 60):
+        self.default_duration_minutes = default_duration_minutes
+
+    def extract(
+        self,
+        text: str,
+        rooms: List[Dict[str, Any]],
+        now: Optional[datetime] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return booking_data for `text`, or None if it is not fully resolved.
+        """
+        now = now or datetime.now()
+        remaining = " " + text.lower() + " "
+        if _UNSAFE_WORDS_RE.search(remaining):
+            return None
+
+        try:
+            room, remaining = self._match_room(remaining, rooms)
+            booking_date, remaining = self._match_date(remaining, now.date())
+            capacity, remaining = self._match_pattern(_CAPACITY_RE, remaining, lambda m: int(m.group(1)))
+            duration, remaining = self._match_pattern(_DURATION_RE, remaining, self._duration_minutes)
+            times, remaining = self._match_times(remaining)
+        except _Unresolved:
+            return None
+
+        # Unexplained numbers (e.g. "at 2", "room 5") mean we missed something
+        if re.search(r"\d", remaining):
+            return None
+
+        start, end = times
+        if end is None:
+            end_minutes = start.hour * 60 + start.minute + (duration or self.default_duration_minutes)
+            if end_minutes > 24 * 60 - 1:
+                return None
+            end = datetime.min.replace(hour=end_minutes // 60, minute=end_minutes % 60).time()
+        elif duration is not None:
+            return None  # both a range and a duration; let the model reconcile
+        if end <= start or booking_date < now.date():
+            return None
+        if booking_date == now.date() and start < now.time():
+            return None
+
+        if room is None and capacity is not None:
+            fitting = [r for r in rooms if r.get("capacity", 0) >= capacity]
+            room = min(fitting, key=lambda r: r["capacity"]) if fitting else None
+        if room is None or (capacity is not None and room.get("capacity", 0) < capacity):
+            return None
+
+        return {
+            "room_name": room["name"],
+            "date": booking_date.isoformat(),
+            "start_time": start.strftime("%H:%M"),
+            "end_time": end.strftime("%H:%M"),
+            "title": None,
+            "booked_by": None,
+        }
+
+    @staticmethod
+    def _cut(text: str, match: "re.Match") -> str:
+        return text[:match.start()] + " " + text[match.end():]
+
+    def _match_pattern(self, pattern, text, convert):
+        """Extract at most one occurrence of `pattern`."""
+        matches = list(pattern.finditer(text))
+        if not matches:
+            return None, text
+        if len(matches) > 1:
+            raise _Unresolved()
+        return convert(matches[0]), self._cut(text, matches[0])
+
+    def _match_room(self, text: str, rooms: List[Dict[str, Any]]):
+        found = []
+        for room in rooms:
+            match = re.search(r"(?<!\w)" + re.escape(room["name"].lower()) + r"(?!\w)", text)
+            if match:
+                found.append((match, room))
+        if not found:
+            return None, text
+        # Prefer the longest name ("Meeting Room 10" over "Meeting Room 1")
+        found.sort(key=lambda item: item[0].end() - item[0].start(), reverse=True)
+        match, room = found[0]
+        others = [m for m, _ in found[1:] if m.end() <= match.start() or m.start() >= match.end()]
+        if others:
+            raise _Unresolved()
+        return room, self._cut(text, match)
+
+    def _match_date(self, text: str, today: date):
+        candidates = []
+        for match in _ISO_DATE_RE.finditer(text):
+            try:
+                candidates.append((match, date(int(match.group(1)), int(match.group(2)), int(match.group(3)))))
+            except ValueError:
+                raise _Unresolved()
+        for match in _RELATIVE_DATE_RE.finditer(text):
+            word = match.group(1)
+            if word == "today":
+                offset = 0
+            elif word == "tomorrow":
+                offset = 1
+            elif word == "day after tomorrow":
+                offset = 2
+            else:
+                offset = int(match.group(2))
+            candidates.append((match, today + timedelta(days=offset)))
+        for match in _WEEKDAY_RE.finditer(text):
+            if match.group(1) == "next":
+                raise _Unresolved()  # "next Friday" is read both ways; ask the model
+            days_ahead = (_WEEKDAYS.index(match.group(2)) - today.weekday()) % 7 or 7
+            candidates.append((match, today + timedelta(days=days_ahead)))
+        for match in _MONTH_DAY_RE.finditer(text):
+            month_name = match.group(1) or match.group(4)
+            day = int(match.group(2) or match.group(3))
+            try:
+                value = date(today.year, _MONTHS[month_name[:3]], day)
+                if value < today:
+                    value = value.replace(year=today.year + 1)
+            except ValueError:
+                raise _Unresolved()
+            candidates.append((match, value))
+
+        if len({value for _, value in candidates}) != 1:
+            raise _Unresolved()
+        for match, _ in sorted(candidates, key=lambda c: c[0].start(), reverse=True):
+            text = self._cut(text, match)
+        return candidates[0][1], text
+
+    @staticmethod
+    def _duration_minutes(match: "re.Match") -> int:
+        if match.group(1):
+            return 30
+        if match.group(2) is None:
+            return 60
+        amount = float(match.group(2))
+        return int(amount * 60) if match.group(3).startswith("h") else int(amount)
+
+    @staticmethod
+    def _to_time(hour: str, minute: Optional[str], meridiem: Optional[str]):
+        h, m = int(hour), int(minute or 0)
+        if meridiem:
+            if not 1 <= h <= 12:
+                return None
+            h = h % 12 + (12 if meridiem.startswith("p") else 0)
+        if h > 23 or m > 59:
+            return None
+        return datetime.min.replace(hour=h, minute=m).time()
+
+    @staticmethod
+    def _is_explicit(hour: str, minute: Optional[str], meridiem: Optional[str]) -> bool:
+        # "2" alone could be 2am or 2pm; "2pm", "14:00" and "14" are not
+        return bool(meridiem or minute or int(hour) > 12)
+
+    def _match_times(self, text: str):
+        ranges = list(_TIME_RANGE_RE.finditer(text))
+        if len(ranges) > 1:
+            raise _Unresolved()
+        if ranges:
+            match = ranges[0]
+            sh, sm, smer, eh, em, emer = match.groups()
+            if not smer and emer and not sm and int(sh) <= 12:
+                # "2-3pm" -> 14:00-15:00, "11-1pm" -> 11:00-13:00
+                end = self._to_time(eh, em, emer)
+                candidate = self._to_time(sh, sm, emer)
+                smer = emer if candidate and end and candidate < end else "am"
+            if not (self._is_explicit(sh, sm, smer) and self._is_explicit(eh, em, emer)):
+                raise _Unresolved()
+            start, end = self._to_time(sh, sm, smer), self._to_time(eh, em, emer)
+            if start is None or end is None:
+                raise _Unresolved()
+            return (start, end), self._cut(text, match)
+
+        singles = [
+            m for m in _SINGLE_TIME_RE.finditer(text)
+            if m.group(4) or self._is_explicit(m.group(1), m.group(2), m.group(3))
+        ]
+        if len(singles) != 1:
+            raise _Unresolved()
+        match = singles[0]
+        start = datetime.min.replace(hour=12).time() if match.group(4) else self._to_time(*match.groups()[:3])
+        if start is None:
+            raise _Unresolved()
+        return (start, None), self._cut(text, match)
+
+
 class AIBookingParser:
     """
     Conversational AI agent for room booking.
@@ -30,6 +336,15 @@ class AIBookingParser:
     - 'openrouter': Uses OpenRouter API (default)
     - 'openai': Uses OpenAI API directly
     - 'ollama': Uses local Ollama instance
+    - 'stub': Offline scripted replies for load testing (see stub_llm)
+    
+    An instance owns a pooled keep-alive HTTP client for OpenAI-compatible
+    providers and is meant to live for the whole process; see get_ai_parser().
+    Replies are cached per normalised (message, history, rooms, date, model).
+    
+    Model calls go through an LLMScheduler (concurrency cap, deadlines,
+    shedding). AI_FALLBACK_PROVIDER names a secondary provider used when
+    the primary fails or, with AI_HEDGE_ENABLED, when it is slow.
     """
 
     def __init__(self):
@@ -40,92 +355,178 @@ class AIBookingParser:
         self.ollama_model = os.getenv("OLLAMA_MODEL", "gemma3:1b")
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
-        if self.provider == "ollama":
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.llm = self._create_llm(self.provider)
+        self.llm.callbacks = [LLMMetricsCallback(self.model_id)]
+        
+        self.fallback_provider = os.getenv("AI_FALLBACK_PROVIDER", "").lower() or None
+        self.fallback_llm = None
+        if self.fallback_provider:
+            fallback_model = os.getenv("AI_FALLBACK_MODEL") or (
+                self.ollama_model if self.fallback_provider == "ollama" else self.model_name
+            )
+            self.fallback_llm = self._create_llm(self.fallback_provider, fallback_model)
+            self.fallback_llm.callbacks = [LLMMetricsCallback(f"{self.fallback_provider}:{fallback_model}")]
+        self.scheduler = _create_scheduler()
+        self.cache = _create_response_cache()
+        self.fast_path: Optional[RuleBasedExtractor] = None
+        if os.getenv("AI_FAST_PATH_ENABLED", "true").lower() == "true":
+            self.fast_path = RuleBasedExtractor()
+        self.fast_path_hits = 0
+        # Identical turns already waiting on the model share its answer
+        self.single_flight = SingleFlight()
+        self._room_blocks: "OrderedDict[str, str]" = OrderedDict()
+
+    @property
+    def model_id(self) -> str:
+        """Provider-qualified name of the model answering requests."""
+        model = self.ollama_model if self.provider == "ollama" else self.model_name
+        return f"{self.provider}:{model}"
+
+    def _create_llm(self, provider: str, model_name: Optional[str] = None):
+        """Build the LangChain chat model for a provider."""
+        if provider == "stub":
+            from app.services.stub_llm import StubChatModel
+            return StubChatModel.from_env()
+
+        if provider == "ollama":
             from langchain_community.chat_models import ChatOllama
-            self.llm = ChatOllama(
-                model=self.ollama_model,
+            return ChatOllama(
+                model=model_name or self.ollama_model,
                 base_url=self.ollama_base_url
             )
-        elif self.provider == "openrouter":
+
+        if provider == "openrouter":
             # OpenRouter uses OpenAI-compatible API
             api_key = os.getenv("OPENROUTER_API_KEY")
-            self.llm = ChatOpenAI(
-                model=self.model_name,
-                api_key=api_key,
-                base_url="https://openrouter.ai/api/v1"
-            )
+            base_url = "https://openrouter.ai/api/v1"
         else:
             # Default: OpenAI direct
             api_key = os.getenv("OPENAI_API_KEY")
             base_url = os.getenv("OPENAI_BASE_URL")  # Optional custom endpoint
-            self.llm = ChatOpenAI(
-                model=self.model_name,
-                api_key=api_key,
-                base_url=base_url
-            )
 
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=_http_pool_limits(),
+                timeout=float(os.getenv("AI_HTTP_TIMEOUT", "60")),
+            )
+        llm = ChatOpenAI(
+            model=model_name or self.model_name,
+            api_key=api_key,
+            base_url=base_url,
+            async_client=openai.AsyncOpenAI(
+                api_key=api_key or os.getenv("OPENAI_API_KEY"),
+                base_url=base_url,
+                http_client=self._http_client,
+            ).chat.completions,
+        )
+        return llm
 
-    def _build_system_prompt(self, rooms: List[Dict[str, Any]]) -> str:
-        """Construct the system prompt for the conversational agent."""
-        room_list = "\n".join([f"- {r['name']} (capacity: {r['capacity']})" for r in rooms])
-        today = datetime.now().strftime("%Y-%m-%d (%A)")
+    async def aclose(self):
+        """Close pooled provider connections and the reply cache."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        if self.cache is not None:
+            self.cache.close()
 
-        return f"""You are a smart booking assistant. Your goal is to book a meeting room as EFFICIENTLY as possible.
+    def stats(self) -> Dict[str, Any]:
+        """Runtime counters for monitoring."""
+        return {
+            "model": self.model_id,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "fast_path_hits": self.fast_path_hits,
+            "coalesced_requests": self.single_flight.deduplicated,
+            "in_flight_requests": self.single_flight.in_flight,
+            "scheduler": self.scheduler.stats(),
+        }
 
-Available Rooms:
-{room_list}
 
-Today's Date: {today}
+    def _room_block(self, rooms: List[Dict[str, Any]], rooms_key: str) -> str:
+        """Rendered room list, rebuilt only when the rooms (`rooms_key`) change."""
+        block = self._room_blocks.get(rooms_key)
+        if block is None:
+            block = "\n".join([
+                f"- {r['name']} (capacity: {r['capacity']}"
+                + (f"; amenities: {', '.join(r['amenities'])}" if r.get("amenities") else "")
+                + ")"
+                for r in rooms
+            ])
+            self._room_blocks[rooms_key] = block
+            if len(self._room_blocks) > _ROOM_BLOCK_CACHE_SIZE:
+                self._room_blocks.popitem(last=False)
+        else:
+            self._room_blocks.move_to_end(rooms_key)
+        return block
 
-INSTRUCTIONS:
-1. ANALYZE the user's message and the conversation history.
-2. EXTRACT every piece of information provided (Room, Date, Time, Capacity).
-3. IF user specifies a relative date (e.g., "tomorrow"), CALCULATE the actual YYYY-MM-DD.
-4. IF user says "any room" or doesn't care, PICK the best room based on capacity (or random if not specified). DO NOT ask which room if they said "any".
-5. DO NOT ask for information that has already been provided.
+    def _build_system_prompt(self, rooms: List[Dict[str, Any]], rooms_key: Optional[str] = None) -> str:
+        """
+        Construct the system prompt for the conversational agent.
+        
+        The instructions come first and never change, so providers that
+        cache prompt prefixes can reuse them; the room list and date follow.
+        `rooms_key` is the rooms' fingerprint, when the caller has it already.
+        """
+        today = datetime.now().strftime("%Y-%m-%d (%A)")
+        return f"""{SYSTEM_PROMPT_PREFIX}
 
-CRITICAL RULES:
-- If user provides ALL needed info (Room/Capacity, Date, Time), set booking_ready=true IMMEDIATELY.
-- If user needs a room for X people, auto-select a room that fits.
-- If multiple inputs are given, accept them all at once.
-- Default duration is 1 hour if not specified.
+Available Rooms:
+{self._room_block(rooms, rooms_key or _rooms_fingerprint(rooms))}
 
-Required Final Output (JSON):
-{{
-    "message": "Response text. If booking ready, summarize: 'Booking [Room] for [Date] at [Time]'. If missing info, ask for it.",
-    "booking_ready": boolean,
-    "booking_data": {{
-        "room_name": "Selected Room Name (REQUIRED for true)",
-        "date": "YYYY-MM-DD (REQUIRED for true)",
-        "start_time": "HH:MM (REQUIRED for true)",
-        "end_time": "HH:MM",
-        "title": "Topic",
-        "booked_by": "Name"
-    }}
-}}"""
+Today's Date: {today}"""
 
-    async def converse(
-        self, 
-        message: str, 
-        history: List[Dict[str, str]], 
-        rooms: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
+    async def _resolve_locally(
+        self,
+        message: str,
+        history: List[Dict[str, str]],
+        rooms: List[Dict[str, Any]],
+        rooms_key: str,
+        context: Optional[str] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
-        Process a conversation turn.
+        Try to answer a turn without the model.
         
-        Args:
-            message: The user's latest message
-            history: Previous conversation turns [{"role": "user/assistant", "content": "..."}]
-            rooms: List of available rooms
-            
-        Returns:
-            {
-                "message": "AI's response",
-                "booking_ready": bool,
-                "booking_data": {...} or None
-            }
+        Returns (reply, request_key): the reply from the rule-based fast
+        path or the cache if there is one; otherwise the key identifying this
+        turn, under which the model's reply is coalesced and cached.
         """
-        system_prompt = self._build_system_prompt(rooms)
+        # Fully structured opening requests are resolved without the model
+        if self.fast_path is not None and not history and not context:
+            booking_data = self.fast_path.extract(message, rooms)
+            if booking_data is not None:
+                self.fast_path_hits += 1
+                return {
+                    "message": (
+                        f"Booking {booking_data['room_name']} for {booking_data['date']} "
+                        f"at {booking_data['start_time']}-{booking_data['end_time']}."
+                    ),
+                    "booking_ready": True,
+                    "booking_data": booking_data,
+                    "source": "rules",
+                }, None
+
+        keyed_history = history + [{"role": "system", "content": context}] if context else history
+        request_key = LLMResponseCache.make_key(
+            message, keyed_history, rooms_key, date.today().isoformat(), self.model_id
+        )
+        if self.cache is not None:
+            cached = await self.cache.aget(request_key)
+            if cached is not None:
+                return cached, None
+        return None, request_key
+
+    def _build_messages(
+        self,
+        message: str,
+        history: List[Dict[str, str]],
+        rooms: List[Dict[str, Any]],
+        rooms_key: str,
+        context: Optional[str] = None,
+    ) -> List[BaseMessage]:
+        """Assemble the chat messages sent to the model for one turn."""
+        system_prompt = self._build_system_prompt(rooms, rooms_key)
+        if context:
+            system_prompt = f"{system_prompt}\n\nCONVERSATION CONTEXT:\n{context}"
         
         # Build message list from history
         messages = []
@@ -152,41 +553,135 @@ Required Final Output (JSON):
                 if isinstance(msg, HumanMessage):
                     msg.content = f"SYSTEM INSTRUCTIONS:\n{system_prompt}\n\nUSER REQUEST:\n{msg.content}"
                     break
+        return messages
+
+    @staticmethod
+    def _error_reply(error: Exception) -> Dict[str, Any]:
+        logger.warning(f"AI Conversation Error: {error}")
+        return {
+            "message": "I'm sorry, I had trouble understanding that. Could you rephrase your request?",
+            "booking_ready": False,
+            "booking_data": None,
+            "error": str(error)
+        }
+
+    async def converse(
+        self, 
+        message: str, 
+        history: List[Dict[str, str]], 
+        rooms: List[Dict[str, Any]],
+        context: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process a conversation turn.
+        
+        Args:
+            message: The user's latest message
+            history: Previous conversation turns [{"role": "user/assistant", "content": "..."}]
+            rooms: List of available rooms
+            context: Optional summary of earlier turns and gathered booking details
+            
+        Returns:
+            {
+                "message": "AI's response",
+                "booking_ready": bool,
+                "booking_data": {...} or None
+            }
+        """
+        rooms_key = _rooms_fingerprint(rooms)
+        result, request_key = await self._resolve_locally(message, history, rooms, rooms_key, context)
+        if result is not None:
+            return result
 
+        messages = self._build_messages(message, history, rooms, rooms_key, context)
+        result = await self.single_flight.do(
+            request_key, lambda: self._ask_model(messages, request_key)
+        )
+        # Coalesced callers each get their own copy to enrich
+        return copy.deepcopy(result)
+
+    async def _ask_model(self, messages: List[BaseMessage], request_key: str) -> Dict[str, Any]:
+        """One model round trip for a turn, cached on success."""
         try:
-            response = await self.llm.ainvoke(messages)
+            response = await self.scheduler.invoke(messages, self.llm, self.fallback_llm)
             content = response.content
             
             # Parse JSON from response
             result = self._parse_response(content)
-            return result
             
+        except LLMOverloadedError:
+            raise
         except Exception as e:
-            logger.warning(f"AI Conversation Error: {e}")
-            return {
-                "message": "I'm sorry, I had trouble understanding that. Could you rephrase your request?",
-                "booking_ready": False,
-                "booking_data": None,
-                "error": str(e)
-            }
+            return self._error_reply(e)
+
+        if self.cache is not None:
+            await self.cache.aset(request_key, result)
+        return result
+
+    async def converse_stream(
+        self,
+        message: str,
+        history: List[Dict[str, str]],
+        rooms: List[Dict[str, Any]],
+        context: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of converse().
+        
+        Yields ("message", text) events with pieces of the assistant message
+        as the model produces them, then one ("result", reply) event with
+        the same structure converse() returns. Like converse(), raises
+        LLMOverloadedError when the call is shed; that happens before the
+        first event, so callers can still answer 503.
+        """
+        rooms_key = _rooms_fingerprint(rooms)
+        result, request_key = await self._resolve_locally(message, history, rooms, rooms_key, context)
+        if result is not None:
+            yield "message", result.get("message", "")
+            yield "result", result
+            return
+
+        messages = self._build_messages(message, history, rooms, rooms_key, context)
+        reply = StreamingReplyParser()
+        chunks = self.scheduler.stream(messages, self.llm, self.fallback_llm)
+        try:
+            async for chunk in chunks:
+                delta = reply.feed(chunk.content)
+                if delta:
+                    yield "message", delta
+            result = self._parse_response(reply.content)
+        except LLMOverloadedError:
+            raise
+        except Exception as e:
+            yield "result", self._error_reply(e)
+            return
+        finally:
+            # Release the model call and its scheduler slot as soon as the
+            # consumer goes away, not when the generator is collected
+            await chunks.aclose()
+
+        if self.cache is not None:
+            await self.cache.aset(request_key, result)
+        yield "result", result
 
     def _parse_response(self, content: str) -> Dict[str, Any]:
         """Extract structured data from AI response."""
         try:
             # Try direct JSON parse
-            return json.loads(content)
+            result = json.loads(content)
+            LLM_REPLY_PARSES.labels("json").inc()
+            return result
         except json.JSONDecodeError:
             pass
         
-        # Try to find JSON in the response
-        json_match = re.search(r'\{(?:[^{}]|\{(?:[^{}]|\{[^{}]*\})*\})*\}', content, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
+        # Try to find JSON in the response (e.g. wrapped in prose or fences)
+        result = find_json_object(content)
+        if result is not None:
+            LLM_REPLY_PARSES.labels("extracted").inc()
+            return result
         
         # Fallback: treat entire response as the message
+        LLM_REPLY_PARSES.labels("raw").inc()
         return {
             "message": content,
             "booking_ready": False,
@@ -210,3 +705,27 @@ Required Final Output (JSON):
             "confidence": "high" if result.get("booking_ready") else "low",
             "clarification_needed": result.get("message") if not result.get("booking_ready") else None
         }
+
+
+_shared_parser: Optional[AIBookingParser] = None
+
+
+def get_ai_parser() -> AIBookingParser:
+    """
+    Return the process-wide parser, creating it on first use.
+    
+    Creation is lazy so that importing the app does not require an API key;
+    the lifespan hook warms it at startup when configuration allows.
+    """
+    global _shared_parser
+    if _shared_parser is None:
+        _shared_parser = AIBookingParser()
+    return _shared_parser
+
+
+async def close_ai_parser():
+    """Release the shared parser and its connection pool (on shutdown)."""
+    global _shared_parser
+    if _shared_parser is not None:
+        parser, _shared_parser = _shared_parser, None
+        await parser.aclose()
@@ -0,0 +1,333 @@
+"""
+Room Availability Index
+
+Keeps the booked intervals of every (room, date) pair in memory, sorted by
+start time, so that "is this room free between X and Y?" becomes a binary
+search instead of a query.
+
+A date is loaded from the bookings table (one indexed query for that date)
+the first time it is asked for, and is then kept current by the booking
+router on create and cancel. Loaded dates are evicted least-recently-used
+once more than `max_dates` are held.
+
+Free gaps between bookings are derived from the same intervals, which is
+how alternative slots are suggested when a requested slot is taken.
+
+Each (room, date) also memoises its occupancy as a packed slot bitmap per
+granularity, for the schedule grid; a write to that room and date drops it.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.booking import Booking
+
+
+def _minute_of_day(value: time, round_up: bool = False) -> int:
+    minute = value.hour * 60 + value.minute
+    return minute + 1 if round_up and (value.second or value.microsecond) else minute
+
+
+def _to_time(minute: int) -> time:
+    return time(minute // 60, minute % 60)
+
+
+class _DaySchedule:
+    """Sorted booked intervals of one room on one day."""
+
+    __slots__ = ("intervals", "max_ends", "bitmaps")
+
+    def __init__(self):
+        # (start_time, end_time, booking_id), ordered by start_time
+        self.intervals: List[Tuple[time, time, int]] = []
+        # max_ends[i] is the latest end among intervals[0..i]; keeps the
+        # overlap test correct even if legacy rows overlap each other.
+        self.max_ends: List[time] = []
+        # granularity (minutes) -> packed slot bitmap
+        self.bitmaps: Dict[int, bytes] = {}
+
+    def _rebuild_max_ends(self):
+        self.bitmaps = {}
+        self.max_ends = []
+        latest = None
+        for _, end, _ in self.intervals:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def add(self, start: time, end: time, booking_id: int):
+        entry = (start, end, booking_id)
+        if entry in self.intervals:
+            return
+        self.intervals.insert(bisect_left(self.intervals, entry), entry)
+        self._rebuild_max_ends()
+
+    def remove(self, booking_id: int):
+        self.intervals = [i for i in self.intervals if i[2] != booking_id]
+        self._rebuild_max_ends()
+
+    def is_free(self, start: time, end: time) -> bool:
+        # Intervals before `idx` start strictly before `end`; one of them
+        # overlaps only if the latest of their ends is after `start`.
+        idx = bisect_left(self.intervals, (end,))
+        return idx == 0 or self.max_ends[idx - 1] <= start
+
+    def free_gaps(self, open_minute: int, close_minute: int) -> List[Tuple[int, int]]:
+        """Unbooked (start, end) minute-of-day ranges between open and close."""
+        gaps = []
+        cursor = open_minute
+        for start, end, _ in self.intervals:
+            start_minute, end_minute = _minute_of_day(start), _minute_of_day(end, round_up=True)
+            if start_minute > cursor:
+                gaps.append((cursor, min(start_minute, close_minute)))
+            cursor = max(cursor, end_minute)
+            if cursor >= close_minute:
+                break
+        if cursor < close_minute:
+            gaps.append((cursor, close_minute))
+        return [(start, end) for start, end in gaps if end > start]
+
+    def bitmap(self, granularity: int) -> bytes:
+        """
+        Occupancy of the day in `granularity`-minute slots, one bit per slot,
+        most significant bit first; a slot is set if any booking overlaps it.
+        """
+        cached = self.bitmaps.get(granularity)
+        if cached is None:
+            slots = 24 * 60 // granularity
+            bits = bytearray((slots + 7) // 8)
+            for start, end, _ in self.intervals:
+                first = _minute_of_day(start) // granularity
+                last = min(slots, -(-_minute_of_day(end, round_up=True) // granularity))
+                for slot in range(first, last):
+                    bits[slot >> 3] |= 0x80 >> (slot & 7)
+            cached = self.bitmaps[granularity] = bytes(bits)
+        return cached
+
+
+class AvailabilityIndex:
+    """
+    Process-wide per-(room, date) interval index over the bookings table.
+
+    Safe to share between the threadpool workers that run sync endpoints.
+    """
+
+    def __init__(self, max_dates: int = 366):
+        self.max_dates = max_dates
+        self._lock = threading.Lock()
+        self._dates: "OrderedDict[date, Dict[int, _DaySchedule]]" = OrderedDict()
+        # Bumped on writes to a cached or loading date so a load racing with
+        # a write is discarded; dropped once the date is neither
+        self._generations: Dict[date, int] = {}
+        # Loads in flight per date
+        self._loading: Dict[date, int] = {}
+
+    def clear(self):
+        """Drop everything; dates are reloaded on next access."""
+        with self._lock:
+            self._dates.clear()
+            self._generations.clear()
+
+    def _start_loading(self, dates: List[date]) -> Dict[date, int]:
+        """Register loads of `dates` and return their generations. Call with the lock held."""
+        for booking_date in dates:
+            self._loading[booking_date] = self._loading.get(booking_date, 0) + 1
+        return {d: self._generations.get(d, 0) for d in dates}
+
+    def _finish_loading(self, dates: List[date]):
+        """Unregister loads of `dates`. Call with the lock held."""
+        for booking_date in dates:
+            self._loading[booking_date] -= 1
+            if not self._loading[booking_date]:
+                del self._loading[booking_date]
+                if booking_date not in self._dates:
+                    self._generations.pop(booking_date, None)
+
+    def _evict(self):
+        """Drop least recently used dates over the limit. Call with the lock held."""
+        while len(self._dates) > self.max_dates:
+            booking_date, _ = self._dates.popitem(last=False)
+            if booking_date not in self._loading:
+                self._generations.pop(booking_date, None)
+
+    def _written(self, booking_date: date):
+        """Note a write to `booking_date`. Call with the lock held."""
+        # A date neither cached nor loading is read fresh on next access
+        if booking_date in self._dates or booking_date in self._loading:
+            self._generations[booking_date] = self._generations.get(booking_date, 0) + 1
+
+    def _load_day(self, db: Session, booking_date: date) -> Dict[int, _DaySchedule]:
+        for _ in range(3):
+            with self._lock:
+                day = self._dates.get(booking_date)
+                if day is not None:
+                    self._dates.move_to_end(booking_date)
+                    return day
+                generation = self._start_loading([booking_date])[booking_date]
+
+            try:
+                day = self._query_days(db, [booking_date])[booking_date]
+                with self._lock:
+                    # Only publish if no booking was written for this date meanwhile
+                    if self._generations.get(booking_date, 0) == generation:
+                        self._dates[booking_date] = day
+                        self._evict()
+                        return day
+            finally:
+                with self._lock:
+                    self._finish_loading([booking_date])
+        # Under sustained writes to this date, answer from the freshest read
+        return day
+
+    def _load_days(self, db: Session, dates: List[date]) -> Dict[date, Dict[int, _DaySchedule]]:
+        """Like _load_day for several dates, reading all missing ones in one query."""
+        with self._lock:
+            days = {}
+            for booking_date in dates:
+                if booking_date in self._dates:
+                    self._dates.move_to_end(booking_date)
+                    days[booking_date] = self._dates[booking_date]
+            missing = [d for d in dates if d not in days]
+            if not missing:
+                return days
+            generations = self._start_loading(missing)
+
+        try:
+            loaded = self._query_days(db, missing)
+            with self._lock:
+                for booking_date, day in loaded.items():
+                    days[booking_date] = day
+                    # Dates written to meanwhile are served once but not published
+                    if self._generations.get(booking_date, 0) == generations[booking_date]:
+                        self._dates[booking_date] = day
+                self._evict()
+        finally:
+            with self._lock:
+                self._finish_loading(missing)
+        return days
+
+    @staticmethod
+    def _query_days(db: Session, dates: List[date]) -> Dict[date, Dict[int, _DaySchedule]]:
+        query = db.query(
+            Booking.booking_date, Booking.room_id, Booking.start_time, Booking.end_time, Booking.id
+        )
+        if len(dates) == 1:
+            query = query.filter(Booking.booking_date == dates[0])
+        else:
+            query = query.filter(Booking.booking_date.in_(dates))
+
+        days: Dict[date, Dict[int, _DaySchedule]] = {d: {} for d in dates}
+        for booking_date, room_id, start, end, booking_id in query:
+            days[booking_date].setdefault(room_id, _DaySchedule()).intervals.append(
+                (start, end, booking_id)
+            )
+        for day in days.values():
+            for schedule in day.values():
+                schedule.intervals.sort()
+                schedule._rebuild_max_ends()
+        return days
+
+    def add(self, booking: Booking):
+        """Record a newly committed booking."""
+        with self._lock:
+            self._written(booking.booking_date)
+            day = self._dates.get(booking.booking_date)
+            if day is not None:
+                day.setdefault(booking.room_id, _DaySchedule()).add(
+                    booking.start_time, booking.end_time, booking.id
+                )
+
+    def remove(self, booking: Booking):
+        """Forget a cancelled booking."""
+        with self._lock:
+            self._written(booking.booking_date)
+            day = self._dates.get(booking.booking_date)
+            if day is not None and booking.room_id in day:
+                day[booking.room_id].remove(booking.id)
+
+    def free_room_ids(
+        self,
+        db: Session,
+        room_ids: List[int],
+        booking_date: date,
+        start_time: time,
+        end_time: time,
+    ) -> List[int]:
+        """
+        Return the subset of `room_ids` with no booking overlapping the slot.
+
+        Costs O(len(room_ids) * log(bookings per room)) once the date is loaded.
+        """
+        day = self._load_day(db, booking_date)
+        with self._lock:
+            return [
+                room_id for room_id in room_ids
+                if room_id not in day or day[room_id].is_free(start_time, end_time)
+            ]
+
+
+    def nearest_free_slots(
+        self,
+        db: Session,
+        room_id: int,
+        booking_date: date,
+        start_time: time,
+        end_time: time,
+        open_time: time,
+        close_time: time,
+        not_before: Optional[time] = None,
+        limit: int = 3,
+    ) -> List[Tuple[time, time]]:
+        """
+        Free slots as long as start..end in the room on that date, within
+        opening hours, nearest to the requested start first (at most one per
+        free gap).
+        """
+        day = self._load_day(db, booking_date)
+        open_minute = _minute_of_day(open_time)
+        if not_before is not None:
+            open_minute = max(open_minute, _minute_of_day(not_before, round_up=True))
+        close_minute = _minute_of_day(close_time)
+        with self._lock:
+            schedule = day.get(room_id)
+            gaps = schedule.free_gaps(open_minute, close_minute) if schedule else [(open_minute, close_minute)]
+
+        requested = _minute_of_day(start_time)
+        duration = _minute_of_day(end_time, round_up=True) - requested
+        starts = [
+            min(max(requested, gap_start), gap_end - duration)
+            for gap_start, gap_end in gaps if gap_end - gap_start >= duration
+        ]
+        starts.sort(key=lambda start: (abs(start - requested), start))
+        return [(_to_time(start), _to_time(start + duration)) for start in starts[:limit]]
+
+    def slot_bitmaps(
+        self,
+        db: Session,
+        dates: List[date],
+        granularity: int,
+        room_ids: Optional[Iterable[int]] = None,
+    ) -> Dict[Tuple[int, date], bytes]:
+        """
+        Packed occupancy bitmaps (see _DaySchedule.bitmap) for every room with
+        at least one booking on each date, optionally limited to `room_ids`.
+
+        Bitmaps are computed once per (room, date, granularity) and reused
+        until a booking for that room and date is written.
+        """
+        days = self._load_days(db, dates)
+        wanted = None if room_ids is None else set(room_ids)
+        with self._lock:
+            return {
+                (room_id, booking_date): schedule.bitmap(granularity)
+                for booking_date, day in days.items()
+                for room_id, schedule in day.items()
+                if schedule.intervals and (wanted is None or room_id in wanted)
+            }
+
+
+availability_index = AvailabilityIndex()
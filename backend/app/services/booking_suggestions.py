@@ -0,0 +1,75 @@
+"""
+Booking Alternatives
+
+When a requested slot is taken, suggest the nearest slots that would work
+instead, so users (and the chat agent) can pick one rather than guess and
+retry. Occupancy comes from the in-memory availability index; the only
+query is for the candidate rooms.
+"""
+
+import os
+from datetime import date, datetime, time
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+from app.models.room import Room
+from app.services.availability import availability_index
+
+# Suggestions stay within these hours
+OPEN_TIME = time.fromisoformat(os.getenv("BOOKING_HOURS_START", "08:00"))
+CLOSE_TIME = time.fromisoformat(os.getenv("BOOKING_HOURS_END", "20:00"))
+
+
+class BookingConflictError(Exception):
+    """A requested slot is taken; carries alternative slots for the 409 response."""
+
+    def __init__(self, detail: str, suggestions: List[Dict[str, Any]]):
+        super().__init__(detail)
+        self.detail = detail
+        self.suggestions = suggestions
+
+
+def suggest_alternatives(
+    db: Session,
+    room: Room,
+    booking_date: date,
+    start_time: time,
+    end_time: time,
+    limit: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Up to `limit` free slots in the same room at other times of the day,
+    followed by up to `limit` other rooms at least as large that are free
+    at the requested time (closest in size first).
+    """
+    not_before = datetime.now().time() if booking_date == date.today() else None
+    suggestions = [
+        {
+            "room_id": room.id,
+            "room_name": room.name,
+            "booking_date": booking_date,
+            "start_time": start,
+            "end_time": end,
+        }
+        for start, end in availability_index.nearest_free_slots(
+            db, room.id, booking_date, start_time, end_time,
+            OPEN_TIME, CLOSE_TIME, not_before=not_before, limit=limit,
+        )
+    ]
+
+    rooms = db.query(Room.id, Room.name).filter(
+        Room.id != room.id, Room.capacity >= room.capacity
+    ).order_by(Room.capacity, Room.id).all()
+    free_ids = set(availability_index.free_room_ids(
+        db, [r.id for r in rooms], booking_date, start_time, end_time
+    ))
+    suggestions.extend(
+        {
+            "room_id": r.id,
+            "room_name": r.name,
+            "booking_date": booking_date,
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        for r in [r for r in rooms if r.id in free_ids][:limit]
+    )
+    return suggestions
@@ -0,0 +1,137 @@
+"""
+Booking Writes
+
+Conflict-safe inserts for bookings. The overlap check and the write are
+one statement (INSERT ... SELECT ... WHERE NOT EXISTS), so there is no
+window between checking for a conflict and inserting:
+
+- SQLite serializes writers, so the statement is atomic on its own
+- on PostgreSQL two transactions can still both pass NOT EXISTS; the
+  `bookings_no_overlap` exclusion constraint (see app.migrations) rejects
+  the second one, which is reported here like any other conflict
+
+Every booking write also bumps the per-date change counter in
+BookingDateVersion, which the listing endpoint turns into an ETag.
+"""
+
+from datetime import date, time
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import and_, exists, insert, literal, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.booking_date_version import BookingDateVersion
+
+# PostgreSQL SQLSTATE for exclusion_violation
+EXCLUSION_VIOLATION = "23P01"
+
+# Rows per INSERT, well under SQLite's bound parameter limit
+INSERT_CHUNK_SIZE = 200
+
+bookings_table = Booking.__table__
+
+
+def overlap_filter(room_id: int, booking_date: date, start_time: time, end_time: time):
+    """Bookings of the room overlapping the given slot on the given date."""
+    # Conflict logic: (NewStart < ExistingEnd) AND (NewEnd > ExistingStart)
+    return and_(
+        Booking.room_id == room_id,
+        Booking.booking_date == booking_date,
+        Booking.start_time < end_time,
+        Booking.end_time > start_time,
+    )
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    """True if the error is the PostgreSQL no-overlap constraint firing."""
+    return getattr(error.orig, "pgcode", None) == EXCLUSION_VIOLATION
+
+
+def _guarded_row(values: Dict[str, Any], columns: List[str]):
+    row = select(*[literal(values[name], bookings_table.c[name].type) for name in columns])
+    return row.where(~exists().where(overlap_filter(
+        values["room_id"], values["booking_date"], values["start_time"], values["end_time"]
+    )))
+
+
+def _insert_guarded(db: Session, rows: List[Dict[str, Any]], columns: List[str]) -> list:
+    selects = [_guarded_row(values, columns) for values in rows]
+    source = selects[0] if len(selects) == 1 else union_all(*selects)
+    statement = insert(bookings_table).from_select(columns, source).returning(*bookings_table.c)
+    return db.execute(statement).all()
+
+
+def insert_bookings(db: Session, rows: List[Dict[str, Any]]) -> list:
+    """
+    Insert each row unless it overlaps an existing booking.
+    
+    Returns the inserted bookings as full table rows; rows that conflicted
+    are left out. The rows must not overlap each other.
+    
+    On PostgreSQL each chunk runs in a SAVEPOINT. If the database
+    constraint rejects a chunk (a concurrent booking won the race), its rows
+    are retried one by one, so only the rows that clashed are dropped.
+    """
+    columns = list(rows[0])
+    # Only PostgreSQL has the constraint; pysqlite's SAVEPOINT handling
+    # would also end the surrounding transaction early
+    if db.get_bind().dialect.name != "postgresql":
+        inserted = []
+        for offset in range(0, len(rows), INSERT_CHUNK_SIZE):
+            inserted.extend(_insert_guarded(db, rows[offset:offset + INSERT_CHUNK_SIZE], columns))
+        return inserted
+
+    inserted = []
+    for offset in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[offset:offset + INSERT_CHUNK_SIZE]
+        try:
+            with db.begin_nested():
+                inserted.extend(_insert_guarded(db, chunk, columns))
+            continue
+        except IntegrityError as e:
+            if not is_overlap_violation(e):
+                raise
+        for values in chunk:
+            try:
+                with db.begin_nested():
+                    inserted.extend(_insert_guarded(db, [values], columns))
+            except IntegrityError as e:
+                if not is_overlap_violation(e):
+                    raise
+    return inserted
+
+
+def bump_date_versions(db: Session, dates: Iterable[date]):
+    """
+    Increment the change counter of each date; call in the transaction
+    that writes the bookings, before commit.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_ = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert_(BookingDateVersion).values([{"booking_date": d, "version": 1} for d in dates])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[BookingDateVersion.booking_date],
+            set_={"version": BookingDateVersion.version + 1},
+        ))
+        return
+    known = {d for (d,) in db.query(BookingDateVersion.booking_date).filter(
+        BookingDateVersion.booking_date.in_(dates)
+    )}
+    db.execute(update(BookingDateVersion).where(BookingDateVersion.booking_date.in_(known)).values(
+        version=BookingDateVersion.version + 1
+    ))
+    db.add_all(BookingDateVersion(booking_date=d, version=1) for d in dates if d not in known)
+    db.flush()
+
+
+def date_version(db: Session, booking_date: date) -> int:
+    """Current change counter of a date (0 if never written)."""
+    version = db.query(BookingDateVersion.version).filter(
+        BookingDateVersion.booking_date == booking_date
+    ).scalar()
+    return version or 0
@@ -0,0 +1,159 @@
+"""
+Conversation State Store
+
+Keeps multi-turn booking conversations on the server so clients send only
+their latest message and a conversation id. Each conversation holds the
+recent turns verbatim, a compacted summary of older ones and the booking
+slots gathered so far, so the context sent to the model stays within a
+fixed token budget however long the conversation runs.
+
+The default backend is in-process. CONVERSATION_STORE may instead name a
+`module:Class` implementing ConversationStore (e.g. backed by Redis).
+"""
+
+import importlib
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Rough size of English text in model tokens
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN + _TOKENS_PER_MESSAGE
+
+
+class ConversationState(BaseModel):
+    """Everything the server remembers about one conversation."""
+    conversation_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    turns: List[Dict[str, str]] = []
+    summary: str = ""
+    slots: Dict[str, Any] = {}
+    updated_at: float = Field(default_factory=time.time)
+
+    def record_turn(self, user_message: str, reply: Dict[str, Any]):
+        """
+        Append a user/assistant exchange and merge any booking slots.
+        
+        A reply that completes a booking moves its slots into the summary,
+        so the next booking in the conversation starts from empty slots.
+        """
+        self.turns.append({"role": "user", "content": user_message})
+        self.turns.append({"role": "assistant", "content": reply.get("message") or ""})
+        for key, value in (reply.get("booking_data") or {}).items():
+            if value not in (None, ""):
+                self.slots[key] = value
+        if reply.get("booking_ready"):
+            details = ", ".join(f"{k}={v}" for k, v in self.slots.items() if k != "room_id")
+            self.summary = " | ".join(filter(None, [self.summary, f"Completed booking: {details}"]))
+            self.slots = {}
+        self.updated_at = time.time()
+
+    def compact(self, token_budget: int):
+        """
+        Fold the oldest turns into the summary until the verbatim turns fit
+        in three quarters of `token_budget`; the summary keeps the rest.
+        """
+        turn_budget = token_budget * 3 // 4
+        used = sum(estimate_tokens(t["content"]) for t in self.turns)
+        folded = []
+        # Always keep the latest exchange verbatim
+        while len(self.turns) > 2 and used > turn_budget:
+            turn = self.turns.pop(0)
+            used -= estimate_tokens(turn["content"])
+            folded.append(f"{turn['role']}: {' '.join(turn['content'].split())}")
+        if folded:
+            summary = " | ".join(filter(None, [self.summary, *folded]))
+            max_chars = (token_budget - turn_budget) * _CHARS_PER_TOKEN
+            # Oldest context is the least relevant; trim from the front
+            self.summary = summary[-max_chars:] if len(summary) > max_chars else summary
+
+    def context(self) -> Optional[str]:
+        """Summary and gathered slots, rendered for the model (None if empty)."""
+        parts = []
+        if self.slots:
+            details = ", ".join(f"{k}={v}" for k, v in self.slots.items() if k != "room_id")
+            parts.append(f"Booking details gathered so far: {details}.")
+        if self.summary:
+            parts.append(f"Earlier in this conversation: {self.summary}")
+        return "\n".join(parts) or None
+
+
+class ConversationStore(ABC):
+    """Backend interface for conversation state."""
+
+    @abstractmethod
+    async def get(self, conversation_id: str) -> Optional[ConversationState]:
+        """Return the stored state, or None if unknown or expired."""
+
+    @abstractmethod
+    async def save(self, state: ConversationState):
+        """Create or replace the state for `state.conversation_id`."""
+
+    @abstractmethod
+    async def delete(self, conversation_id: str):
+        """Forget a conversation (no error if it does not exist)."""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Per-process store with idle expiry and a cap on live conversations.
+
+    Conversations do not survive restarts and are not shared between
+    workers; use a pluggable backend for that.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_conversations: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_conversations = max_conversations
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+
+    async def get(self, conversation_id: str) -> Optional[ConversationState]:
+        state = self._states.get(conversation_id)
+        if state is None:
+            return None
+        if state.updated_at + self.ttl_seconds < time.time():
+            del self._states[conversation_id]
+            return None
+        self._states.move_to_end(conversation_id)
+        return state.model_copy(deep=True)
+
+    async def save(self, state: ConversationState):
+        self._states[state.conversation_id] = state.model_copy(deep=True)
+        self._states.move_to_end(state.conversation_id)
+        while len(self._states) > self.max_conversations:
+            self._states.popitem(last=False)
+
+    async def delete(self, conversation_id: str):
+        self._states.pop(conversation_id, None)
+
+
+def create_conversation_store() -> ConversationStore:
+    """Build the store named by CONVERSATION_STORE ("memory" or "module:Class")."""
+    backend = os.getenv("CONVERSATION_STORE", "memory")
+    if backend == "memory":
+        return InMemoryConversationStore(
+            ttl_seconds=float(os.getenv("CONVERSATION_TTL_SECONDS", "3600")),
+            max_conversations=int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000")),
+        )
+    module_name, _, class_name = backend.partition(":")
+    store_class = getattr(importlib.import_module(module_name), class_name)
+    return store_class()
+
+
+_shared_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Return the process-wide conversation store, creating it on first use."""
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = create_conversation_store()
+    return _shared_store
@@ -0,0 +1,24 @@
+"""
+ETags and Conditional Requests
+
+Helpers for answering `If-None-Match` with 304 Not Modified, so clients
+that already hold the current representation skip both the body and the
+work of building it.
+"""
+
+from fastapi import Request, Response
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match covers `etag` (weak comparison, per RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,187 @@
+"""
+LLM Response Cache
+
+Caches conversational agent replies so that identical turns (same message,
+same history, same room catalogue, same day, same model) are answered
+without another round trip to the provider.
+
+Entries live in an in-process LRU with a TTL. When a path is configured, a
+local SQLite file is used as a second tier so that entries survive
+restarts. Async callers use aget()/aset(), which run that disk tier in a
+worker thread so it never blocks the event loop.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _normalise_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a chat message."""
+    return " ".join(text.lower().split())
+
+
+class LLMResponseCache:
+    """
+    LRU + TTL cache of agent replies, optionally backed by a SQLite file.
+
+    Values are stored and returned as deep copies, so callers may mutate
+    what they get back.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        disk_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # The SQLite connection is shared by worker threads
+        self._disk_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._disk.commit()
+
+    @staticmethod
+    def make_key(
+        message: str,
+        history: List[Dict[str, str]],
+        rooms_version: str,
+        today: str,
+        model: str,
+    ) -> str:
+        """Digest of the normalised inputs that determine a reply."""
+        payload = json.dumps([
+            _normalise_text(message),
+            [[turn["role"], _normalise_text(turn["content"])] for turn in history],
+            rooms_version,
+            today,
+            model,
+        ])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _memory_get(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            return entry
+
+    def _finish_get(self, key: str, entry, from_disk: bool) -> Optional[Dict[str, Any]]:
+        """Count the lookup and return a copy of its value."""
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if from_disk:
+                self._store(key, entry)
+            else:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached reply, or None on miss or expiry."""
+        now = time.time()
+        entry = self._memory_get(key, now)
+        if entry is None and self._disk is not None:
+            entry = self._disk_get(key, now)
+            return self._finish_get(key, entry, from_disk=True)
+        return self._finish_get(key, entry, from_disk=False)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Like get(), reading the disk tier off the event loop."""
+        now = time.time()
+        entry = self._memory_get(key, now)
+        if entry is None and self._disk is not None:
+            entry = await asyncio.to_thread(self._disk_get, key, now)
+            return self._finish_get(key, entry, from_disk=True)
+        return self._finish_get(key, entry, from_disk=False)
+
+    def _memory_set(self, key: str, value: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+        entry = (time.time() + self.ttl_seconds, copy.deepcopy(value))
+        with self._lock:
+            self._store(key, entry)
+        return entry
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Cache a reply for `ttl_seconds`."""
+        entry = self._memory_set(key, value)
+        if self._disk is not None:
+            self._disk_put(key, entry)
+
+    async def aset(self, key: str, value: Dict[str, Any]):
+        """Like set(), writing the disk tier off the event loop."""
+        entry = self._memory_set(key, value)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk_put, key, entry)
+
+    def _store(self, key: str, entry: Tuple[float, Dict[str, Any]]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT expires_at, value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] <= now:
+                self._disk.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._disk.commit()
+                return None
+            return row[0], json.loads(row[1])
+
+    def _disk_put(self, key: str, entry: Tuple[float, Dict[str, Any]]):
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, entry[0], json.dumps(entry[1])),
+            )
+            self._disk.commit()
+
+    def clear(self):
+        """Drop all entries (memory and disk) and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM llm_cache")
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
@@ -0,0 +1,189 @@
+"""
+LLM Call Scheduler
+
+Bounds how the booking agent uses its model providers so that one slow
+provider cannot stall a worker:
+
+- at most `max_in_flight` calls run at once; further calls queue, and once
+  `max_queue` are already waiting new calls are shed immediately
+- every call has a deadline covering both queueing and the provider call
+- with a secondary provider configured, a failed primary call falls back
+  to it, and with hedging enabled a second request is fired at it once the
+  primary has taken longer than the recent p95 latency; whichever answers
+  first wins
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a call is shed because too many calls are already queued."""
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a call misses its deadline."""
+
+
+class LLMScheduler:
+    """Concurrency cap, deadlines, load shedding and hedging for model calls."""
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        max_queue: int = 32,
+        deadline_seconds: float = 30.0,
+        hedge: bool = False,
+        hedge_min_delay: float = 0.5,
+        hedge_quantile: float = 0.95,
+        latency_window: int = 200,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_quantile = hedge_quantile
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._running = 0
+        self._waiting = 0
+        self._latencies: deque = deque(maxlen=latency_window)
+        self.counters = {
+            "calls": 0,
+            "shed": 0,
+            "timeouts": 0,
+            "fallbacks": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+        }
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary before hedging: its recent p95."""
+        if len(self._latencies) < 20:
+            return max(self.hedge_min_delay, self.deadline_seconds / 4)
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_quantile))
+        return max(self.hedge_min_delay, ordered[index])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "running": self._running,
+            "queued": self._waiting,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3),
+        }
+
+    async def _acquire(self, deadline: float):
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending
+            await self._semaphore.acquire()
+            self._running += 1
+            return
+        if self._waiting >= self.max_queue:
+            self.counters["shed"] += 1
+            raise LLMOverloadedError("Too many AI requests queued, try again shortly")
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise LLMTimeoutError("Timed out waiting for an AI request slot")
+        finally:
+            self._waiting -= 1
+        self._running += 1
+
+    def _release(self):
+        self._running -= 1
+        self._semaphore.release()
+
+    async def invoke(self, messages: List[Any], primary, secondary=None):
+        """Run `primary.ainvoke(messages)` under the scheduling policy."""
+        self.counters["calls"] += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        await self._acquire(deadline)
+        try:
+            return await asyncio.wait_for(
+                self._invoke(messages, primary, secondary), deadline - time.monotonic()
+            )
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise LLMTimeoutError(f"AI request exceeded {self.deadline_seconds}s deadline")
+        finally:
+            self._release()
+
+    async def _invoke(self, messages: List[Any], primary, secondary):
+        started = time.monotonic()
+        primary_call = asyncio.ensure_future(primary.ainvoke(messages))
+        if secondary is None:
+            result = await primary_call
+            self._latencies.append(time.monotonic() - started)
+            return result
+
+        calls = {primary_call}
+        try:
+            if self.hedge:
+                done, _ = await asyncio.wait(calls, timeout=self.hedge_delay())
+                if not done:
+                    self.counters["hedged"] += 1
+                    calls.add(asyncio.ensure_future(secondary.ainvoke(messages)))
+
+            error: Optional[BaseException] = None
+            while calls:
+                done, calls = await asyncio.wait(calls, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    if call.exception() is None:
+                        # A hedge win still tells us the primary took at least this long
+                        self._latencies.append(time.monotonic() - started)
+                        if call is not primary_call and self.hedge and error is None:
+                            self.counters["hedge_wins"] += 1
+                        return call.result()
+                    error = call.exception()
+                    if call is primary_call and not calls:
+                        # Primary failed before any hedge: fall back now
+                        self.counters["fallbacks"] += 1
+                        calls.add(asyncio.ensure_future(secondary.ainvoke(messages)))
+            raise error
+        finally:
+            for call in calls:
+                call.cancel()
+
+    async def stream(self, messages: List[Any], primary, secondary=None) -> AsyncIterator[Any]:
+        """
+        Stream `primary.astream(messages)` under the concurrency cap and deadline.
+        
+        With `secondary`, a primary that fails before its first chunk falls
+        back to it; once chunks have been yielded the stream cannot switch.
+        """
+        self.counters["calls"] += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        await self._acquire(deadline)
+        chunks = None
+        try:
+            provider = primary
+            chunks = provider.astream(messages).__aiter__()
+            started = False
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), deadline - time.monotonic())
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.counters["timeouts"] += 1
+                    raise LLMTimeoutError(f"AI request exceeded {self.deadline_seconds}s deadline")
+                except Exception:
+                    if started or secondary is None or provider is secondary:
+                        raise
+                    self.counters["fallbacks"] += 1
+                    provider = secondary
+                    chunks = provider.astream(messages).__aiter__()
+                    continue
+                started = True
+                yield chunk
+        finally:
+            try:
+                if chunks is not None and hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+            finally:
+                self._release()
@@ -0,0 +1,225 @@
+"""
+Prometheus Metrics
+
+Collects the runtime measures exposed on `/metrics`:
+
+- HTTP: latency histogram and in-flight gauge per route template
+- database: pool checkout wait and pool occupancy, plus query count and
+  query time per request, from SQLAlchemy engine and pool events
+- AI provider calls: latency, token usage and errors (a LangChain callback
+  attached to every chat model) and how replies had to be parsed
+
+Metrics live in the default prometheus_client registry, per process.
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from app.services.conversation_store import estimate_tokens
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ["method", "route"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per HTTP request", ["route"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting to check a connection out of the pool", ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds", "AI provider call latency", ["model", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens used by AI provider calls (estimated when the provider reports none)",
+    ["model", "kind", "source"],
+)
+LLM_PROVIDER_ERRORS = Counter(
+    "llm_provider_errors_total", "Failed AI provider calls", ["model", "error"],
+)
+LLM_REPLY_PARSES = Counter(
+    "llm_reply_parse_total", "AI replies by how they were parsed (json, extracted or raw text)", ["method"],
+)
+
+
+class _QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set per HTTP request; threadpool endpoints see the same object
+_request_queries: contextvars.ContextVar[Optional[_QueryStats]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+def _route_template(app, scope) -> str:
+    """Path template of the route serving `scope`, to keep label values bounded."""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request and counting its SQL statements."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope["app"], scope)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        queries = _QueryStats()
+        token = _request_queries.set(queries)
+        in_flight = HTTP_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(method, route, str(status["code"])).observe(time.perf_counter() - started)
+            in_flight.dec()
+            REQUEST_DB_QUERIES.labels(route).observe(queries.count)
+            REQUEST_DB_SECONDS.labels(route).observe(queries.seconds)
+            _request_queries.reset(token)
+
+
+class _PoolCollector:
+    """Reads pool occupancy of the instrumented engines at scrape time."""
+
+    def __init__(self):
+        self.engines: Dict[str, Engine] = {}
+
+    def collect(self):
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["engine"])
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["engine"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections open beyond the pool size", labels=["engine"])
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            # Only QueuePool reports occupancy
+            if hasattr(pool, "checkedout"):
+                size.add_metric([name], pool.size())
+                checked_out.add_metric([name], pool.checkedout())
+                overflow.add_metric([name], max(0, pool.overflow()))
+        return [size, checked_out, overflow]
+
+
+_pool_collector = _PoolCollector()
+REGISTRY.register(_pool_collector)
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Attach query timing and pool checkout metrics to a (sync) engine."""
+    if name in _pool_collector.engines:
+        return
+    _pool_collector.engines[name] = engine
+    query_seconds = DB_QUERY_SECONDS.labels(name)
+    checkout_wait = DB_POOL_CHECKOUT_SECONDS.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        query_seconds.observe(elapsed)
+        stats = _request_queries.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _drop_failed_query(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    # The pool has no event before a checkout starts waiting, so its
+    # connect() is timed directly
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            checkout_wait.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records latency, tokens and errors of every call to one chat model."""
+
+    # Cheap enough to run on the event loop instead of an executor
+    run_inline = True
+
+    def __init__(self, model: str):
+        self.model = model
+        self._calls: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        prompt = sum(estimate_tokens(str(m.content)) for batch in messages for m in batch)
+        self._calls[run_id] = (time.perf_counter(), prompt)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        started, prompt_estimate = self._calls.pop(run_id, (None, 0))
+        if started is not None:
+            LLM_CALL_SECONDS.labels(self.model, "ok").observe(time.perf_counter() - started)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage.get("prompt_tokens") is not None:
+            LLM_TOKENS.labels(self.model, "prompt", "reported").inc(usage["prompt_tokens"])
+            LLM_TOKENS.labels(self.model, "completion", "reported").inc(usage.get("completion_tokens") or 0)
+            return
+        completion = sum(estimate_tokens(g.text) for batch in response.generations for g in batch)
+        LLM_TOKENS.labels(self.model, "prompt", "estimated").inc(prompt_estimate)
+        LLM_TOKENS.labels(self.model, "completion", "estimated").inc(completion)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        started, _ = self._calls.pop(run_id, (None, 0))
+        # Hedged calls that lose and calls past their deadline are cancelled
+        outcome = "cancelled" if isinstance(error, asyncio.CancelledError) else "error"
+        if started is not None:
+            LLM_CALL_SECONDS.labels(self.model, outcome).observe(time.perf_counter() - started)
+        if outcome == "error":
+            LLM_PROVIDER_ERRORS.labels(self.model, type(error).__name__).inc()
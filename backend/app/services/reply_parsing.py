@@ -0,0 +1,163 @@
+"""
+Agent Reply Parsing
+
+Helpers for pulling the agent's JSON reply out of model output, both after
+the fact (find_json_object) and while the reply is still being streamed
+(StreamingReplyParser), so the "message" text can be shown token by token.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# Give up waiting for a "{" after this many characters of a code fence
+_MAX_PREAMBLE = 32
+
+
+def find_json_object(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the first parseable top-level JSON object embedded in `content`.
+
+    Braces are matched with a scanner that understands strings and escapes,
+    so braces inside string values and objects nested to any depth are
+    handled.
+    """
+    start = content.find("{")
+    while start != -1:
+        depth = 0
+        in_string = escape = False
+        for index in range(start, len(content)):
+            char = content[index]
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == "\\":
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        value = json.loads(content[start:index + 1])
+                    except json.JSONDecodeError:
+                        break
+                    if isinstance(value, dict):
+                        return value
+                    break
+        start = content.find("{", start + 1)
+    return None
+
+
+class StreamingReplyParser:
+    """
+    Incrementally extracts the top-level "message" string of a JSON reply.
+
+    Feed it chunks as they arrive; each call returns the newly decoded part
+    of the message value. Replies that are not JSON at all are passed
+    through as message text. The accumulated output is in `content`, to be
+    parsed as a whole once the stream ends.
+    """
+
+    def __init__(self):
+        self.content = ""
+        self._mode: Optional[str] = None  # "json" or "text"
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._unicode: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._key_chars: List[str] = []
+        self._key: Optional[str] = None
+        self._after_colon = False
+        self._in_message = False
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk of model output; return new message text."""
+        self.content += chunk
+        if self._mode is None:
+            self._detect_mode()
+            if self._mode is None:
+                return ""
+            if self._mode == "text":
+                return self.content
+        elif self._mode == "text":
+            return chunk
+
+        output: List[str] = []
+        while self._position < len(self.content):
+            self._consume(self.content[self._position], output)
+            self._position += 1
+        return "".join(output)
+
+    def _detect_mode(self):
+        stripped = self.content.lstrip()
+        if not stripped:
+            return
+        brace = self.content.find("{")
+        if stripped.startswith("{") or (stripped.startswith("`") and brace != -1):
+            self._mode = "json"
+            self._position = brace
+        elif not stripped.startswith("`") or len(stripped) > _MAX_PREAMBLE:
+            self._mode = "text"
+
+    def _emit(self, text: str, output: List[str]):
+        if self._in_message:
+            output.append(text)
+        elif self._depth == 1 and not self._after_colon:
+            self._key_chars.append(text)
+
+    def _consume(self, char: str, output: List[str]):
+        if self._in_string:
+            if self._unicode is not None:
+                self._unicode += char
+                if len(self._unicode) == 4:
+                    self._emit_code_point(int(self._unicode, 16), output)
+                    self._unicode = None
+            elif self._escape:
+                self._escape = False
+                if char == "u":
+                    self._unicode = ""
+                else:
+                    self._emit(_ESCAPES.get(char, char), output)
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._in_message:
+                    self._in_message = False
+                elif self._depth == 1 and not self._after_colon:
+                    self._key = "".join(self._key_chars)
+            else:
+                self._emit(char, output)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._key_chars = []
+            if self._depth == 1 and self._after_colon and self._key == "message":
+                self._in_message = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+        elif char == ":" and self._depth == 1:
+            self._after_colon = True
+        elif char == "," and self._depth == 1:
+            self._after_colon = False
+            self._key = None
+
+    def _emit_code_point(self, code: int, output: List[str]):
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._emit(chr(code), output)
@@ -0,0 +1,127 @@
+"""
+Room Catalogue Cache
+
+Rooms are read on nearly every request but change rarely, so a snapshot
+of the whole catalogue is kept per process and served from memory.
+
+- The snapshot's version is a hash of its content, so every worker derives
+  the same strong ETag for the same catalogue.
+- Commits that write rooms (or their amenities) through an ORM session
+  invalidate the snapshot; a TTL bounds staleness for writes made by other
+  processes or outside the ORM.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.models.room_amenity import RoomAmenity, normalize_amenity
+from app.schemas.room import RoomRead
+from app.services.room_search import parse_amenities
+
+
+class RoomCatalogSnapshot:
+    """Immutable view of every room at one point in time, ordered by id."""
+
+    def __init__(self, rooms: List[RoomRead]):
+        self.rooms = rooms
+        self.by_id = {room.id: room for room in rooms}
+        self._amenities = {room.id: {normalize_amenity(a) for a in room.amenities} for room in rooms}
+        # Serialised once; the unfiltered listing is returned as-is
+        self.body = json.dumps(jsonable_encoder(rooms), separators=(",", ":")).encode()
+        self.version = hashlib.sha1(self.body).hexdigest()[:16]
+        self.etag = f'"rooms-{self.version}"'
+
+    def filter(
+        self,
+        min_capacity: Optional[int] = None,
+        amenities: Optional[Iterable[str]] = None,
+    ) -> List[RoomRead]:
+        """Same rule as room_filter_statement, answered from memory."""
+        required = set(parse_amenities(amenities))
+        matches = [
+            room for room in self.rooms
+            if (not min_capacity or room.capacity >= min_capacity)
+            and required <= self._amenities[room.id]
+        ]
+        return sorted(matches, key=lambda room: (room.capacity, room.id))
+
+
+class RoomCatalog:
+    """Process-wide holder of the current RoomCatalogSnapshot."""
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[RoomCatalogSnapshot] = None
+        self._loaded_at = 0.0
+        # Bumped on invalidation so a load racing with a room write is discarded
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _cached(self):
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self._snapshot, self._generation
+            return None, self._generation
+
+    def _publish(self, rooms: List[Room], generation: int) -> RoomCatalogSnapshot:
+        snapshot = RoomCatalogSnapshot([RoomRead.model_validate(room) for room in rooms])
+        with self._lock:
+            if self._generation == generation:
+                self._snapshot = snapshot
+                self._loaded_at = time.monotonic()
+        return snapshot
+
+    def get(self, db: Session) -> RoomCatalogSnapshot:
+        """Current snapshot, loading it with `db` if missing or expired."""
+        snapshot, generation = self._cached()
+        if snapshot is None:
+            snapshot = self._publish(db.query(Room).order_by(Room.id).all(), generation)
+        return snapshot
+
+    async def get_async(self, db: AsyncSession) -> RoomCatalogSnapshot:
+        """Like get() for async sessions."""
+        snapshot, generation = self._cached()
+        if snapshot is None:
+            rooms = (await db.execute(select(Room).order_by(Room.id))).scalars().all()
+            snapshot = self._publish(rooms, generation)
+        return snapshot
+
+
+room_catalog = RoomCatalog(ttl_seconds=float(os.getenv("ROOM_CATALOG_TTL_SECONDS", "60")))
+
+_DIRTY_KEY = "room_catalog_dirty"
+
+
+@event.listens_for(Session, "after_flush")
+def _note_room_writes(session: Session, flush_context):
+    # The session's new/dirty/deleted sets still hold the flushed objects here
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (Room, RoomAmenity)):
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_room_commit(session: Session):
+    if session.info.pop(_DIRTY_KEY, False):
+        room_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_room_writes(session: Session, previous_transaction):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,45 @@
+"""
+Room Search
+
+Capacity and amenity filtering for rooms, done in SQL against the indexed
+`room_amenities` table rather than by loading the catalogue and checking
+the JSON `amenities` column in Python. The statement works with both the
+sync and async sessions, so the rooms API and the booking agent share it.
+"""
+
+from typing import Iterable, List, Optional
+from sqlalchemy import Select, func, select
+from app.models.room import Room
+from app.models.room_amenity import RoomAmenity, normalize_amenity
+
+
+def parse_amenities(values: Optional[Iterable[str]]) -> List[str]:
+    """Normalised amenities from repeated and/or comma-separated parameters."""
+    amenities = {
+        normalize_amenity(part)
+        for value in values or []
+        for part in value.split(",") if part.strip()
+    }
+    return sorted(amenities)
+
+
+def room_filter_statement(
+    min_capacity: Optional[int] = None,
+    amenities: Optional[Iterable[str]] = None,
+) -> Select:
+    """
+    SELECT of rooms holding at least `min_capacity` people and having every
+    one of `amenities`, smallest rooms first.
+    """
+    statement = select(Room)
+    if min_capacity:
+        statement = statement.where(Room.capacity >= min_capacity)
+    required = parse_amenities(amenities)
+    if required:
+        statement = statement.where(Room.id.in_(
+            select(RoomAmenity.room_id)
+            .where(RoomAmenity.amenity.in_(required))
+            .group_by(RoomAmenity.room_id)
+            .having(func.count() == len(required))
+        ))
+    return statement.order_by(Room.capacity, Room.id)
@@ -0,0 +1,42 @@
+"""
+Single-Flight Request Coalescing
+
+When several coroutines ask for the same thing at the same time, only the
+first one does the work; the others await its result. Used to collapse
+bursts of identical AI requests into one provider call.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share a key.
+
+    The shared call runs as its own task, so a caller that goes away (for
+    example a disconnected client) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.deduplicated = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `func()` unless a call for `key` is already in flight; return its result."""
+        call = self._calls.get(key)
+        if call is not None:
+            self.deduplicated += 1
+        else:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._forget(key, call))
+        return await asyncio.shield(call)
+
+    def _forget(self, key: str, call: "asyncio.Future[Any]"):
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,191 @@
+"""
+Per-Request SQL Profiling
+
+Opt-in (SQL_PROFILING=true) middleware that records every statement a
+request runs: its normalised SQL, duration and row count. Statement shapes
+repeated at least SQL_PROFILE_REPEAT_THRESHOLD times within one request are
+flagged as likely N+1 patterns, and a summary is added to the response:
+
+    X-SQL-Profile: queries=14; time_ms=6.21; repeated=1; trace=v1.4/GET-api_bookings_booking_id-0003
+
+With SQL_PROFILE_TRACE_DIR set, each request also writes a JSON trace file
+under that name: a directory per build (SQL_PROFILE_BUILD) and, inside it,
+method, route template and a per-route sequence number. Replaying the same requests
+against two builds therefore gives pairs of files with the same name to
+diff. Statements run after the response has started (streaming
+bodies) appear in the trace but not in the header. Row counts come from the
+DB driver and are null where it does not report them (SQLite SELECTs).
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|\$\d+|%s")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS_RE = re.compile(r"(\(\?(?:\.\.\.)?\))(?:\s*,\s*\(\?(?:\.\.\.)?\))+")
+_SPACE_RE = re.compile(r"\s+")
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement shape: literals and parameters become `?`, lists collapse."""
+    shape = _STRING_RE.sub("?", statement)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _SPACE_RE.sub(" ", shape).strip()
+    shape = _IN_LIST_RE.sub("(?...)", shape)
+    return _ROWS_RE.sub(r"\1, ...", shape)
+
+
+class RequestProfile:
+    """Statements run while serving one request."""
+
+    def __init__(self, method: str, path: str, trace_id: Optional[str] = None):
+        self.method = method
+        self.path = path
+        self.trace_id = trace_id
+        self.started_at = datetime.now(timezone.utc)
+        self.statements: List[Dict[str, Any]] = []
+
+    def record(self, statement: str, seconds: float, rows: Optional[int]):
+        self.statements.append({
+            "sql": normalize_sql(statement),
+            "duration_ms": round(seconds * 1000, 3),
+            "rows": rows,
+        })
+
+    def repeated(self, threshold: int) -> List[Dict[str, Any]]:
+        """Shapes run at least `threshold` times, most frequent first."""
+        counts = Counter(s["sql"] for s in self.statements)
+        return [
+            {"sql": sql, "count": count}
+            for sql, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            if count >= threshold
+        ]
+
+    def header(self, threshold: int) -> str:
+        total_ms = sum(s["duration_ms"] for s in self.statements)
+        parts = [
+            f"queries={len(self.statements)}",
+            f"time_ms={total_ms:.2f}",
+            f"repeated={len(self.repeated(threshold))}",
+        ]
+        if self.trace_id:
+            parts.append(f"trace={self.trace_id}")
+        return "; ".join(parts)
+
+    def trace(self, threshold: int, status: int) -> Dict[str, Any]:
+        return {
+            "request": {"method": self.method, "path": self.path, "status": status},
+            "started_at": self.started_at.isoformat(),
+            "query_count": len(self.statements),
+            "total_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+            "repeated_shapes": self.repeated(threshold),
+            "statements": self.statements,
+        }
+
+
+_current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "sql_profile", default=None
+)
+
+
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_profile_started", []).append(time.perf_counter())
+
+
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["sql_profile_started"].pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        rows = cursor.rowcount
+        profile.record(statement, elapsed, rows if rows is not None and rows >= 0 else None)
+
+
+def _drop_failed_statement(context):
+    if context.connection is not None:
+        started = context.connection.info.get("sql_profile_started")
+        if started:
+            started.pop()
+
+
+def enable_sql_profiling(engine: Engine):
+    """Record statements run on `engine` (a sync engine) into the current request's profile."""
+    if event.contains(engine, "after_cursor_execute", _end_statement):
+        return
+    event.listen(engine, "before_cursor_execute", _start_statement)
+    event.listen(engine, "after_cursor_execute", _end_statement)
+    event.listen(engine, "handle_error", _drop_failed_statement)
+
+
+class SQLProfilingMiddleware:
+    """ASGI middleware collecting a RequestProfile per HTTP request."""
+
+    def __init__(
+        self,
+        app,
+        trace_dir: Optional[str] = None,
+        repeat_threshold: int = 5,
+        build: str = "current",
+    ):
+        self.app = app
+        self.trace_dir = trace_dir
+        self.repeat_threshold = repeat_threshold
+        self.build = build
+        # Next sequence number per method and route template
+        self._sequences: Dict[str, "itertools.count[int]"] = {}
+        if trace_dir:
+            os.makedirs(os.path.join(trace_dir, build), exist_ok=True)
+
+    def _next_trace_id(self, scope) -> str:
+        # Route templates keep the names (and sequences) bounded; the
+        # route is only known once routing has run
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        name = f"{scope['method']}-{_SLUG_RE.sub('_', route).strip('_') or 'root'}"
+        sequence = next(self._sequences.setdefault(name, itertools.count(1)))
+        return f"{self.build}/{name}-{sequence:04d}"
+
+    def _write_trace(self, profile: RequestProfile, status: int):
+        path = os.path.join(self.trace_dir, f"{profile.trace_id}.json")
+        with open(path, "w") as f:
+            json.dump(profile.trace(self.repeat_threshold, status), f, indent=2)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        status = {"code": 500}
+
+        async def send_with_summary(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.trace_dir:
+                    profile.trace_id = self._next_trace_id(scope)
+                summary = profile.header(self.repeat_threshold)
+                message = {**message, "headers": [*message.get("headers", []), (b"x-sql-profile", summary.encode())]}
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            _current_profile.reset(token)
+            if self.trace_dir:
+                if profile.trace_id is None:
+                    profile.trace_id = self._next_trace_id(scope)
+                await asyncio.to_thread(self._write_trace, profile, status["code"])
@@ -0,0 +1,180 @@
+"""
+Offline Stub Chat Model
+
+A LangChain chat model that answers without any network access, used with
+AI_PROVIDER=stub to load-test the conversational endpoints for free. It
+replies with templated booking JSON after a latency drawn from a
+configurable distribution, and fails a configurable fraction of calls.
+
+Settings:
+- AI_STUB_LATENCY: "fixed:MS", "uniform:LO,HI", "lognormal:MEDIAN,SIGMA"
+  or "exponential:MEAN", in milliseconds (default "lognormal:300,0.5")
+- AI_STUB_ERROR_RATE: fraction of calls that raise (default 0)
+- AI_STUB_REPLIES: JSON file with a list of reply objects, one per user
+  turn (the last repeats); "{room}", "{date}" and "{turn}" in string values
+  are filled in
+- AI_STUB_SEED: seed for reproducible latencies and errors
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+
+# Default script: gather the date, then the time, then confirm
+DEFAULT_REPLIES: List[Dict[str, Any]] = [
+    {
+        "message": "Which day would you like to book {room}?",
+        "booking_ready": False,
+        "booking_data": {"room_name": "{room}"},
+    },
+    {
+        "message": "What time should the meeting on {date} start?",
+        "booking_ready": False,
+        "booking_data": {"room_name": "{room}", "date": "{date}"},
+    },
+    {
+        "message": "Booking {room} for {date} at 10:00",
+        "booking_ready": True,
+        "booking_data": {
+            "room_name": "{room}",
+            "date": "{date}",
+            "start_time": "10:00",
+            "end_time": "11:00",
+            "title": "Meeting",
+            "booked_by": "Load Test",
+        },
+    },
+]
+
+_ROOM_LINE_RE = re.compile(r"^- (.+?) \(capacity", re.MULTILINE)
+
+
+class StubProviderError(RuntimeError):
+    """Injected provider failure."""
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Turn an AI_STUB_LATENCY spec into a sampler returning seconds."""
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",")] if args else []
+        if kind == "fixed" and len(values) == 1:
+            seconds = values[0] / 1000
+            return lambda rng: seconds
+        if kind == "uniform" and len(values) == 2:
+            low, high = values[0] / 1000, values[1] / 1000
+            return lambda rng: rng.uniform(low, high)
+        if kind == "lognormal" and len(values) == 2:
+            # Median in ms; sigma is dimensionless
+            median, sigma = values[0] / 1000, values[1]
+            return lambda rng: rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        if kind == "exponential" and len(values) == 1:
+            mean = values[0] / 1000
+            return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid stub latency spec {spec!r}")
+
+
+def _render(template: Any, values: Dict[str, str]) -> Any:
+    if isinstance(template, str):
+        for name, value in values.items():
+            template = template.replace("{" + name + "}", value)
+        return template
+    if isinstance(template, dict):
+        return {key: _render(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [_render(value, values) for value in template]
+    return template
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model returning scripted JSON replies after a simulated delay."""
+
+    latency: str = "lognormal:300,0.5"
+    error_rate: float = 0.0
+    replies: List[Dict[str, Any]] = DEFAULT_REPLIES
+    seed: Optional[int] = None
+    stream_chunk_chars: int = 16
+
+    _rng: random.Random = PrivateAttr()
+    _sample_latency: Callable[[random.Random], float] = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+        self._sample_latency = parse_latency(self.latency)
+
+    @classmethod
+    def from_env(cls) -> "StubChatModel":
+        replies = DEFAULT_REPLIES
+        if os.getenv("AI_STUB_REPLIES"):
+            with open(os.environ["AI_STUB_REPLIES"]) as f:
+                replies = json.load(f)
+        seed = os.getenv("AI_STUB_SEED")
+        return cls(
+            latency=os.getenv("AI_STUB_LATENCY", "lognormal:300,0.5"),
+            error_rate=float(os.getenv("AI_STUB_ERROR_RATE", "0")),
+            replies=replies,
+            seed=int(seed) if seed else None,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _maybe_fail(self):
+        if self._rng.random() < self.error_rate:
+            raise StubProviderError("Injected stub provider failure")
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        turn = sum(isinstance(m, HumanMessage) for m in messages)
+        prompt = "\n".join(str(m.content) for m in messages)
+        room = _ROOM_LINE_RE.search(prompt)
+        template = self.replies[min(turn, len(self.replies)) - 1]
+        return json.dumps(_render(template, {
+            "room": room.group(1) if room else "any room",
+            "date": (date.today() + timedelta(days=1)).isoformat(),
+            "turn": str(turn),
+        }))
+
+    def _chunks(self, messages: List[BaseMessage]) -> Iterator[ChatGenerationChunk]:
+        reply = self._reply(messages)
+        for i in range(0, len(reply), self.stream_chunk_chars):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=reply[i:i + self.stream_chunk_chars]))
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._sample_latency(self._rng))
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._sample_latency(self._rng))
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        # The latency is time to first token; the rest arrives at once
+        time.sleep(self._sample_latency(self._rng))
+        self._maybe_fail()
+        yield from self._chunks(messages)
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self._sample_latency(self._rng))
+        self._maybe_fail()
+        for chunk in self._chunks(messages):
+            yield chunk
+            await asyncio.sleep(0)
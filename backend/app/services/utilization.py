@@ -0,0 +1,127 @@
+"""
+Room Utilisation Rollups
+
+Maintains RoomDailyUsage, one row per room per day with booked minutes,
+booking count and an hourly breakdown, so utilisation reports read at
+most one row per day instead of scanning bookings.
+
+The create and cancel paths call record_bookings() inside their own
+transaction, so the rollup commits or rolls back with the bookings.
+rebuild_daily_usage() recomputes it from scratch, e.g. after bookings
+were changed outside the API:
+
+    python -m app.services.utilization
+"""
+
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.booking import Booking
+from app.models.room_daily_usage import RoomDailyUsage
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def hourly_minutes(start_time: time, end_time: time) -> List[int]:
+    """Minutes of [start_time, end_time) falling in each hour of the day."""
+    start, end = _minute_of_day(start_time), _minute_of_day(end_time)
+    return [max(0, min(end, (h + 1) * 60) - max(start, h * 60)) for h in range(24)]
+
+
+def peak_hour(hours: List[int]) -> Optional[int]:
+    """Busiest hour of the day for hourly minutes, or None when nothing is booked."""
+    peak = max(range(24), key=lambda h: hours[h])
+    return peak if hours[peak] > 0 else None
+
+
+def _aggregate(bookings: Iterable) -> Dict[Tuple[int, date], Tuple[int, List[int]]]:
+    """(room_id, date) -> (booking count, hourly minutes) for the given bookings."""
+    totals: Dict[Tuple[int, date], Tuple[int, List[int]]] = {}
+    for booking in bookings:
+        key = (booking.room_id, booking.booking_date)
+        count, hours = totals.get(key, (0, [0] * 24))
+        booking_hours = hourly_minutes(booking.start_time, booking.end_time)
+        totals[key] = (count + 1, [a + b for a, b in zip(hours, booking_hours)])
+    return totals
+
+
+def _ensure_rows(db: Session, keys: List[Tuple[int, date]]):
+    """Create empty rollup rows for keys that have none, ignoring races."""
+    dialect = db.get_bind().dialect.name
+    values = [
+        {"room_id": room_id, "usage_date": day, "booked_minutes": 0,
+         "booking_count": 0, "hourly_minutes": [0] * 24}
+        for room_id, day in keys
+    ]
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(insert(RoomDailyUsage).values(values).on_conflict_do_nothing())
+        return
+    existing = set(db.query(RoomDailyUsage.room_id, RoomDailyUsage.usage_date).filter(
+        tuple_(RoomDailyUsage.room_id, RoomDailyUsage.usage_date).in_(keys)
+    ).all())
+    db.add_all(RoomDailyUsage(**v) for v in values if (v["room_id"], v["usage_date"]) not in existing)
+    db.flush()
+
+
+def record_bookings(db: Session, bookings: Iterable, cancelled: bool = False):
+    """
+    Add (or, with `cancelled`, subtract) bookings to the daily rollup.
+    
+    Call inside the transaction that writes the bookings, before commit.
+    The touched rows are locked (FOR UPDATE where supported) so concurrent
+    writers to the same room and day apply their changes one at a time.
+    """
+    totals = _aggregate(bookings)
+    if not totals:
+        return
+    keys = sorted(totals)
+    sign = -1 if cancelled else 1
+    _ensure_rows(db, keys)
+    rows = db.query(RoomDailyUsage).filter(
+        tuple_(RoomDailyUsage.room_id, RoomDailyUsage.usage_date).in_(keys)
+    ).with_for_update().populate_existing().all()
+    for row in rows:
+        count, hours = totals[(row.room_id, row.usage_date)]
+        # Assign a new list so the JSON column is marked dirty
+        row.hourly_minutes = [max(0, a + sign * b) for a, b in zip(row.hourly_minutes, hours)]
+        row.booked_minutes = sum(row.hourly_minutes)
+        row.booking_count = max(0, row.booking_count + sign * count)
+        row.peak_hour = peak_hour(row.hourly_minutes)
+    db.flush()
+
+
+def rebuild_daily_usage(db: Session, batch_size: int = 1000) -> int:
+    """
+    Recompute the whole rollup from the bookings table and commit.
+    
+    Returns the number of rollup rows written.
+    """
+    db.query(RoomDailyUsage).delete(synchronize_session=False)
+    bookings = db.query(
+        Booking.room_id, Booking.booking_date, Booking.start_time, Booking.end_time
+    ).yield_per(batch_size)
+    rows = [
+        RoomDailyUsage(
+            room_id=room_id, usage_date=day, booking_count=count,
+            hourly_minutes=hours, booked_minutes=sum(hours), peak_hour=peak_hour(hours),
+        )
+        for (room_id, day), (count, hours) in _aggregate(bookings).items()
+    ]
+    db.add_all(rows)
+    db.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt {rebuild_daily_usage(session)} room/day rollup rows")
+    finally:
+        session.close()
@@ -0,0 +1 @@
+"""Performance benchmarks for the booking API (see benchmarks.api_bench)."""
@@ -0,0 +1,367 @@
+"""
+API Latency Benchmarks
+
+Seeds a synthetic dataset (rooms x days x bookings per room per day) into a
+scratch database, drives the booking API in-process and reports p50/p95/p99
+latency and throughput per scenario:
+
+- create_booking without and with a conflict
+- get_bookings filtered by room, date and booker
+- room listing, unfiltered and by capacity/amenity
+
+Results can be saved as a baseline JSON file and later runs compared with
+it; the run exits non-zero when any scenario regresses past the threshold,
+or when the baseline has no entry for a scenario (save one first).
+
+    python -m benchmarks.api_bench --save-baseline
+    python -m benchmarks.api_bench --database postgresql://bench@localhost/bench_db
+
+Each --database gets its tables dropped and recreated, so never point it at
+real data. "sqlite" (the default) uses a temporary file.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, time as clock, timedelta
+from typing import Callable, Dict, List, Optional
+
+# Importing the app builds its default engines; keep those off PostgreSQL
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_async_database_session, get_database_session, to_async_database_url
+from app.main import app
+from app.migrations import run_migrations
+from app.models import Booking, Room
+from app.services.availability import availability_index
+from app.services.room_catalog import room_catalog
+from app.services.utilization import rebuild_daily_usage
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+AMENITIES = ["projector", "whiteboard", "video_conferencing", "catering", "microphone"]
+BOOKERS = 50
+# Seeded bookings are 30 minutes long, back to back from 08:00
+FIRST_SLOT_MINUTE = 8 * 60
+SLOT_MINUTES = 30
+# p99 is reported but too noisy at a few hundred samples to gate on
+GATED_METRICS = ("p50_ms", "p95_ms")
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of `samples`."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _slot(index: int) -> clock:
+    minute = FIRST_SLOT_MINUTE + index * SLOT_MINUTES
+    return clock(minute // 60, minute % 60)
+
+
+class Dataset:
+    """Shape of the synthetic data; also the key baselines are stored under."""
+
+    def __init__(self, rooms: int, days: int, bookings_per_day: int, seed: int = 1):
+        if not 1 <= bookings_per_day <= 24:
+            raise ValueError("bookings_per_day must be between 1 and 24")
+        self.rooms = rooms
+        self.days = days
+        self.bookings_per_day = bookings_per_day
+        self.seed = seed
+        # Booking dates must not be in the past
+        self.first_day = date.today() + timedelta(days=1)
+
+    @property
+    def key(self) -> str:
+        return f"{self.rooms}x{self.days}x{self.bookings_per_day}"
+
+    def day(self, offset: int) -> date:
+        return self.first_day + timedelta(days=offset)
+
+    def seed_into(self, session_factory):
+        rng = random.Random(self.seed)
+        db = session_factory()
+        try:
+            rooms = [
+                Room(
+                    name=f"Room {i}",
+                    capacity=rng.choice([4, 6, 8, 10, 12, 20, 30]),
+                    amenities=rng.sample(AMENITIES, rng.randint(0, 3)),
+                )
+                for i in range(self.rooms)
+            ]
+            db.add_all(rooms)
+            db.commit()
+            for offset in range(self.days):
+                rows = [
+                    {
+                        "room_id": room.id,
+                        "title": "Seeded",
+                        "booked_by": f"user{rng.randrange(BOOKERS)}@example.com",
+                        "booking_date": self.day(offset),
+                        "start_time": _slot(slot),
+                        "end_time": _slot(slot + 1),
+                    }
+                    for room in rooms
+                    for slot in range(self.bookings_per_day)
+                ]
+                db.execute(insert(Booking), rows)
+            db.commit()
+            rebuild_daily_usage(db)
+            return [room.id for room in rooms]
+        finally:
+            db.close()
+
+
+class Target:
+    """A scratch database wired into the app through dependency overrides."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tempdir = None
+        if name == "sqlite":
+            self._tempdir = tempfile.TemporaryDirectory()
+            url = f"sqlite:///{os.path.join(self._tempdir.name, 'bench.db')}"
+        else:
+            url = name
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        self.backend = url.split(":")[0].split("+")[0]
+        self.engine = create_engine(url, connect_args=connect_args)
+        self.async_engine = create_async_engine(to_async_database_url(url))
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_session_factory = async_sessionmaker(bind=self.async_engine, expire_on_commit=False)
+
+    def __enter__(self):
+        Base.metadata.drop_all(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        run_migrations(self.engine)
+        availability_index.clear()
+        room_catalog.invalidate()
+
+        def get_db():
+            db = self.session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def get_async_db():
+            async with self.async_session_factory() as db:
+                yield db
+
+        self._previous_overrides = dict(app.dependency_overrides)
+        app.dependency_overrides[get_database_session] = get_db
+        app.dependency_overrides[get_async_database_session] = get_async_db
+        return self
+
+    def __exit__(self, *exc_info):
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(self._previous_overrides)
+        availability_index.clear()
+        room_catalog.invalidate()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+
+def measure(call: Callable[[int], object], requests: int, warmup: int) -> Dict[str, float]:
+    """Run `call(i)` sequentially and summarise its latency."""
+    for i in range(warmup):
+        call(i)
+    samples = []
+    started = time.perf_counter()
+    for i in range(warmup, warmup + requests):
+        begin = time.perf_counter()
+        call(i)
+        samples.append((time.perf_counter() - begin) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+    }
+
+
+def _expect(response, status: int):
+    if response.status_code != status:
+        raise RuntimeError(
+            f"{response.request.method} {response.request.url} returned "
+            f"{response.status_code}, expected {status}: {response.text[:200]}"
+        )
+    return response
+
+
+def run_scenarios(client: TestClient, dataset: Dataset, room_ids: List[int], requests: int, warmup: int):
+    rooms = len(room_ids)
+    # Free slots run from the last seeded booking of the day to 23:30
+    free_slots = (24 * 60 - FIRST_SLOT_MINUTE) // SLOT_MINUTES - 1 - dataset.bookings_per_day
+
+    def create_free(i):
+        slot, rest = divmod(i, rooms * dataset.days)
+        if slot >= free_slots:
+            raise RuntimeError("Dataset too small for the requested no-conflict bookings")
+        day, room = divmod(rest, rooms)
+        start = dataset.bookings_per_day + slot
+        _expect(client.post("/api/bookings", json={
+            "room_id": room_ids[room],
+            "booked_by": "bench@example.com",
+            "booking_date": dataset.day(day).isoformat(),
+            "start_time": _slot(start).isoformat(),
+            "end_time": _slot(start + 1).isoformat(),
+        }), 200)
+
+    def create_conflict(i):
+        day, room = divmod(i % (rooms * dataset.days), rooms)
+        _expect(client.post("/api/bookings", json={
+            "room_id": room_ids[room],
+            "booked_by": "bench@example.com",
+            "booking_date": dataset.day(day).isoformat(),
+            "start_time": "08:15",
+            "end_time": "08:45",
+        }), 409)
+
+    def get(path, params: Callable[[int], dict]):
+        return lambda i: _expect(client.get(path, params=params(i)), 200)
+
+    scenarios = {
+        "create_booking_no_conflict": create_free,
+        "create_booking_conflict": create_conflict,
+        "get_bookings_by_room": get("/api/bookings", lambda i: {
+            "room_id": room_ids[i % rooms], "limit": 100,
+        }),
+        "get_bookings_by_date": get("/api/bookings", lambda i: {
+            "booking_date": dataset.day(i % dataset.days).isoformat(),
+        }),
+        "get_bookings_by_booker": get("/api/bookings", lambda i: {
+            "booked_by": f"user{i % BOOKERS}@example.com", "limit": 100,
+        }),
+        "list_rooms": get("/api/rooms", lambda i: {}),
+        "list_rooms_filtered": get("/api/rooms", lambda i: {
+            "min_capacity": 8, "amenities": AMENITIES[i % len(AMENITIES)],
+        }),
+    }
+    return {name: measure(call, requests, warmup) for name, call in scenarios.items()}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Regressions of `results` against `baseline` (both keyed by run key, then
+    scenario). A gated latency regresses when it grows by more than `threshold`
+    (a fraction) and by at least `min_delta_ms`; throughput when it drops by
+    more than `threshold`.
+    """
+    regressions = []
+    for run_key, scenarios in results.items():
+        for scenario, current in scenarios.items():
+            previous = baseline.get(run_key, {}).get(scenario)
+            if previous is None:
+                continue
+            for metric in GATED_METRICS:
+                limit = previous[metric] * (1 + threshold)
+                if current[metric] > limit and current[metric] - previous[metric] >= min_delta_ms:
+                    regressions.append(
+                        f"{run_key} {scenario} {metric}: {current[metric]} > {previous[metric]} (+{threshold:.0%})"
+                    )
+            floor = previous["throughput_rps"] * (1 - threshold)
+            if current["throughput_rps"] < floor:
+                regressions.append(
+                    f"{run_key} {scenario} throughput_rps: {current['throughput_rps']} < {previous['throughput_rps']} (-{threshold:.0%})"
+                )
+    return regressions
+
+
+def missing_from_baseline(results: Dict, baseline: Dict) -> List[str]:
+    """Run key / scenario pairs of `results` that `baseline` has no entry for."""
+    return [
+        f"{run_key} {scenario}"
+        for run_key, scenarios in results.items()
+        for scenario in scenarios
+        if scenario not in baseline.get(run_key, {})
+    ]
+
+
+def run(databases: List[str], dataset: Dataset, requests: int, warmup: int) -> Dict:
+    results = {}
+    client = TestClient(app)
+    for database in databases:
+        with Target(database) as target:
+            room_ids = dataset.seed_into(target.session_factory)
+            results[f"{target.backend}:{dataset.key}"] = run_scenarios(
+                client, dataset, room_ids, requests, warmup
+            )
+    return results
+
+
+def _print_table(results: Dict):
+    print(f"{'run / scenario':<52}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}")
+    for run_key, scenarios in results.items():
+        for scenario, r in scenarios.items():
+            print(f"{run_key + ' ' + scenario:<52}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['throughput_rps']:>9}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--database", action="append",
+                        help='"sqlite" or a scratch database URL; repeat for several (default: sqlite)')
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--bookings-per-day", type=int, default=8, help="per room")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="merge this run into the baseline file instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed regression as a fraction (default 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="ignore latency increases smaller than this")
+    parser.add_argument("--output", help="also write this run's results to this JSON file")
+    args = parser.parse_args(argv)
+
+    dataset = Dataset(args.rooms, args.days, args.bookings_per_day)
+    results = run(args.database or ["sqlite"], dataset, args.requests, args.warmup)
+    _print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    missing = missing_from_baseline(results, baseline)
+    if missing:
+        print(
+            f"No baseline in {args.baseline} for: {', '.join(missing)}. "
+            "Run with --save-baseline on a known-good build first.",
+            file=sys.stderr,
+        )
+        return 2
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
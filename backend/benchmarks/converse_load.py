@@ -0,0 +1,232 @@
+"""
+Conversational Load Harness
+
+Runs many concurrent multi-turn conversations against
+/api/bookings/converse (or /converse/stream) and reports turn throughput,
+latency percentiles, outcomes and event-loop lag.
+
+By default the app runs in this process on a scratch SQLite database with
+AI_PROVIDER=stub, so the measured loop lag is the server's own; the stub's
+latency and error rate come from --latency/--error-rate (the reply cache is
+off unless --cache is given), and the scheduler
+limits from the usual AI_MAX_IN_FLIGHT / AI_MAX_QUEUE variables. With --url
+it drives a running server instead (start that with AI_PROVIDER=stub) and
+the lag is only the harness's.
+
+    python -m benchmarks.converse_load --conversations 2000 --concurrency 500
+    python -m benchmarks.converse_load --url http://localhost:8000 --stream
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.api_bench import Dataset, Target, percentile
+
+# Later turns answer the stub's default script: date, then time
+TURNS = [
+    "I need a room for the {topic} sync",
+    "tomorrow please",
+    "at 10am for an hour",
+]
+
+
+class LoadRun:
+    """Per-run measurements shared by all simulated conversations."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.first_token: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.lag: List[float] = []
+
+
+async def _turn(client: httpx.AsyncClient, body: dict, stream: bool, run: LoadRun) -> Optional[dict]:
+    started = time.perf_counter()
+    try:
+        if not stream:
+            response = await client.post("/api/bookings/converse", json=body)
+            run.latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                run.outcomes["shed" if response.status_code == 503 else f"http_{response.status_code}"] += 1
+                return None
+            result = response.json()
+        else:
+            result, event, first_token = None, None, None
+            async with client.stream("POST", "/api/bookings/converse/stream", json=body) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    run.latencies.append(time.perf_counter() - started)
+                    run.outcomes["shed" if response.status_code == 503 else f"http_{response.status_code}"] += 1
+                    return None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        if event == "message" and first_token is None:
+                            first_token = time.perf_counter() - started
+                            run.first_token.append(first_token)
+                    elif line.startswith("data: ") and event == "done":
+                        result = json.loads(line[len("data: "):])
+            run.latencies.append(time.perf_counter() - started)
+    except httpx.HTTPError as e:
+        run.latencies.append(time.perf_counter() - started)
+        run.outcomes[f"exception_{type(e).__name__}"] += 1
+        return None
+    run.outcomes["model_error" if not result or "error" in result else "ok"] += 1
+    return result
+
+
+async def _conversation(client, number: int, turns: int, stream: bool, run: LoadRun, slots: asyncio.Semaphore):
+    async with slots:
+        conversation_id = None
+        for i in range(turns):
+            message = TURNS[min(i, len(TURNS) - 1)].format(topic=f"team {number}")
+            result = await _turn(client, {"message": message, "conversation_id": conversation_id}, stream, run)
+            # Failed turns are not stored, so the id may not exist server-side
+            if result is None or "error" in result:
+                return
+            # Ids are issued by the server on the first turn
+            conversation_id = result["conversation_id"]
+
+
+async def _monitor_lag(interval: float, run: LoadRun, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        run.lag.append(max(0.0, loop.time() - started - interval))
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    return {
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    conversations: int,
+    concurrency: int,
+    turns: int,
+    stream: bool = False,
+    lag_interval: float = 0.01,
+) -> Dict:
+    """Run the conversations through `client` and summarise them."""
+    run = LoadRun()
+    stop = asyncio.Event()
+    monitor = asyncio.ensure_future(_monitor_lag(lag_interval, run, stop))
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _conversation(client, n, turns, stream, run, slots) for n in range(conversations)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    report = {
+        "conversations": conversations,
+        "concurrency": concurrency,
+        "turns": len(run.latencies),
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_turns_per_second": round(len(run.latencies) / elapsed, 1),
+        "latency": _summary(run.latencies),
+        "outcomes": dict(run.outcomes),
+        "event_loop_lag": _summary(run.lag),
+    }
+    if stream:
+        report["time_to_first_token"] = _summary(run.first_token)
+    return report
+
+
+@contextmanager
+def _environment(overrides: Dict[str, str]):
+    """Apply environment overrides, restoring the previous values on exit."""
+    saved = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+async def run_in_process(args) -> Dict:
+    from app.main import app
+    from app.services.ai_parser import close_ai_parser, get_ai_parser
+
+    stub_settings = {
+        "AI_PROVIDER": "stub",
+        "AI_STUB_LATENCY": args.latency,
+        "AI_STUB_ERROR_RATE": str(args.error_rate),
+        # Measure the model path, not reply-cache bookkeeping
+        "AI_CACHE_ENABLED": "true" if args.cache else "false",
+    }
+    with _environment(stub_settings), Target("sqlite") as target:
+        Dataset(rooms=args.rooms, days=1, bookings_per_day=1).seed_into(target.session_factory)
+        # Rebuilt so the parser picks up the stub settings above
+        await close_ai_parser()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+                report = await drive(
+                    client, args.conversations, args.concurrency, args.turns, args.stream, args.lag_interval_ms / 1000
+                )
+            report["scheduler"] = get_ai_parser().stats()["scheduler"]
+        finally:
+            await close_ai_parser()
+    return report
+
+
+async def run_remote(args) -> Dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        return await drive(
+            client, args.conversations, args.concurrency, args.turns, args.stream, args.lag_interval_ms / 1000
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", help="drive a running server instead of an in-process app")
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200, help="conversations in flight at once")
+    parser.add_argument("--turns", type=int, default=3, help="turns per conversation")
+    parser.add_argument("--stream", action="store_true", help="use /converse/stream")
+    parser.add_argument("--latency", default="lognormal:300,0.5", help="stub latency spec (in-process)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub failure rate (in-process)")
+    parser.add_argument("--cache", action="store_true", help="keep the AI reply cache on (in-process)")
+    parser.add_argument("--rooms", type=int, default=20, help="rooms seeded (in-process)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="HTTP timeout with --url")
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+    # Injected stub failures would otherwise log one warning each
+    logging.basicConfig(level=logging.ERROR)
+
+    report = asyncio.run(run_remote(args) if args.url else run_in_process(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,25 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from unittest.mock import patch
+from datetime import date, time
 import os
 
 # Mock the database URL to use SQLite
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["OPENAI_API_KEY"] = "test-key"
 
-from app.database import Base, get_database_session
+from app.database import Base, get_database_session, get_async_database_session
 from app.main import app
+from app.services.availability import availability_index
+from app.services.room_catalog import room_catalog
 
-# Setup in-memory SQLite database
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Setup in-memory SQLite database, shared between the sync and async engines
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:test_api?mode=memory&cache=shared&uri=true"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///file:test_api?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -23,6 +28,9 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 # Override the database dependency
 def override_get_db():
     try:
@@ -31,13 +39,20 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_database_session] = override_get_db
+app.dependency_overrides[get_async_database_session] = override_get_async_db
 
 client = TestClient(app)
 
 @pytest.fixture(autouse=True)
 def setup_db():
     Base.metadata.create_all(bind=engine)
+    availability_index.clear()
+    room_catalog.invalidate()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -137,3 +152,757 @@ def test_past_date_booking():
     }
     response = client.post("/api/bookings/", json=booking_data)
     assert response.status_code == 422 # Validation Error
+
+def test_available_rooms_search():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    small = Room(name="Small Room", capacity=4, amenities=["whiteboard"])
+    large = Room(name="Large Room", capacity=12, amenities=["projector", "video_conferencing"])
+    db.add_all([small, large])
+    db.commit()
+    small_id, large_id = small.id, large.id
+    db.close()
+
+    params = {"date": "2030-01-01", "start_time": "10:00", "end_time": "11:00"}
+    response = client.get("/api/rooms/available", params=params)
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()] == [small_id, large_id]
+
+    booking = client.post("/api/bookings/", json={
+        "room_id": small_id,
+        "booked_by": "user1",
+        "booking_date": "2030-01-01",
+        "start_time": "09:30",
+        "end_time": "10:30"
+    }).json()
+
+    response = client.get("/api/rooms/available", params=params)
+    assert [r["id"] for r in response.json()] == [large_id]
+
+    # Adjacent slot is still free
+    response = client.get("/api/rooms/available", params={**params, "start_time": "10:30"})
+    assert [r["id"] for r in response.json()] == [small_id, large_id]
+
+    response = client.get(
+        "/api/rooms/available",
+        params={**params, "start_time": "12:00", "end_time": "13:00", "min_capacity": 10}
+    )
+    assert [r["id"] for r in response.json()] == [large_id]
+
+    response = client.get(
+        "/api/rooms/available",
+        params={**params, "start_time": "12:00", "end_time": "13:00", "amenities": "whiteboard"}
+    )
+    assert [r["id"] for r in response.json()] == [small_id]
+
+    client.delete(f"/api/bookings/{booking['id']}")
+    response = client.get("/api/rooms/available", params=params)
+    assert [r["id"] for r in response.json()] == [small_id, large_id]
+
+def test_list_bookings_query_count_is_constant():
+    from sqlalchemy import event
+    from datetime import date, time
+    from app.models.room import Room
+    from app.models.booking import Booking
+
+    def seed(count):
+        db = TestingSessionLocal()
+        rooms = [Room(name=f"Room {i}", capacity=4) for i in range(count)]
+        db.add_all(rooms)
+        db.flush()
+        db.add_all([
+            Booking(room_id=room.id, booked_by="user", booking_date=date(2030, 1, 1),
+                    start_time=time(9, 0), end_time=time(10, 0))
+            for room in rooms
+        ])
+        db.commit()
+        db.close()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def list_bookings():
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            response = client.get("/api/bookings", params={"booking_date": "2030-01-01"})
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        assert response.status_code == 200
+        return response.json(), len(statements)
+
+    seed(2)
+    data, few_queries = list_bookings()
+    assert len(data) == 2
+    assert data[0]["room_name"] == "Room 0"
+
+    seed(30)
+    data, many_queries = list_bookings()
+    assert len(data) == 32
+    # The bookings query plus the date's ETag version, and the room
+    # catalogue (reloaded because seeding added rooms)
+    assert many_queries == few_queries == 3
+
+def _seed_bookings_for_listing(count):
+    from datetime import date, time
+    from app.models.room import Room
+    from app.models.booking import Booking
+
+    db = TestingSessionLocal()
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.flush()
+    db.add_all([
+        Booking(room_id=room.id, booked_by=f"user{i}", booking_date=date(2030, 1, 1 + i // 3),
+                start_time=time(9, 0), end_time=time(10, 0))
+        for i in range(count)
+    ])
+    db.commit()
+    db.close()
+
+def test_list_bookings_keyset_pagination():
+    _seed_bookings_for_listing(7)
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/bookings", params=params)
+        assert response.status_code == 200
+        seen.extend(b["id"] for b in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert seen == [b["id"] for b in client.get("/api/bookings").json()]
+    assert len(set(seen)) == 7
+
+    response = client.get("/api/bookings", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_export_bookings_ndjson():
+    import json
+    _seed_bookings_for_listing(5)
+
+    response = client.get("/api/bookings/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["id"] for r in rows] == [b["id"] for b in client.get("/api/bookings").json()]
+    assert rows[0]["room_name"] == "Test Room"
+    assert rows[0]["start_time"] == "09:00:00"
+
+def test_converse_reads_rooms_through_async_session():
+    from unittest.mock import AsyncMock
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Board Room", capacity=20)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    parser = AsyncMock()
+    parser.converse.return_value = {
+        "message": "Booking Board Room for 2030-01-01 at 10:00",
+        "booking_ready": True,
+        "booking_data": {"room_name": "board room", "date": "2030-01-01", "start_time": "10:00"},
+    }
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        response = client.post("/api/bookings/converse", json={"message": "Board room tomorrow 10am"})
+
+    assert response.status_code == 200
+    assert response.json()["booking_data"]["room_id"] == room_id
+    rooms = parser.converse.call_args.args[2]
+    assert rooms == [{"name": "Board Room", "capacity": 20, "id": room_id, "amenities": []}]
+
+def test_ai_parser_is_shared_per_process():
+    import asyncio
+    from app.services import ai_parser as ai_parser_module
+
+    with patch.dict(os.environ, {"AI_PROVIDER": "openai"}):
+        first = ai_parser_module.get_ai_parser()
+        assert ai_parser_module.get_ai_parser() is first
+
+        asyncio.run(ai_parser_module.close_ai_parser())
+        second = ai_parser_module.get_ai_parser()
+        assert second is not first
+        asyncio.run(ai_parser_module.close_ai_parser())
+
+def test_converse_stream_emits_deltas_then_result():
+    import json
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Board Room", capacity=20)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    async def fake_stream(message, history, rooms, context=None):
+        yield "message", "Booking Board "
+        yield "message", "Room"
+        yield "result", {
+            "message": "Booking Board Room",
+            "booking_ready": True,
+            "booking_data": {"room_name": "Board Room"},
+        }
+
+    parser = type("FakeParser", (), {"converse_stream": staticmethod(fake_stream)})()
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        response = client.post("/api/bookings/converse/stream", json={"message": "Board room"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    assert events[:2] == [("message", {"delta": "Booking Board "}), ("message", {"delta": "Room"})]
+    assert events[2][0] == "done"
+    assert events[2][1]["booking_data"]["room_id"] == room_id
+
+def test_converse_sheds_load_with_503():
+    from unittest.mock import AsyncMock
+    from app.services.llm_scheduler import LLMOverloadedError
+
+    parser = AsyncMock()
+    parser.converse.side_effect = LLMOverloadedError("Too many AI requests queued")
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        response = client.post("/api/bookings/converse", json={"message": "hello"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_converse_stream_sheds_load_with_503():
+    from app.services.llm_scheduler import LLMOverloadedError
+
+    async def shed_stream(message, history, rooms, context=None):
+        raise LLMOverloadedError("Too many AI requests queued")
+        yield
+
+    parser = type("FakeParser", (), {"converse_stream": staticmethod(shed_stream)})()
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        response = client.post("/api/bookings/converse/stream", json={"message": "hello"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_converse_keeps_history_on_the_server():
+    from unittest.mock import AsyncMock
+
+    parser = AsyncMock()
+    parser.converse.return_value = {
+        "message": "Which day?",
+        "booking_ready": False,
+        "booking_data": {"room_name": "Board Room"},
+    }
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        first = client.post("/api/bookings/converse", json={"message": "Book the board room"}).json()
+        conversation_id = first["conversation_id"]
+        second = client.post(
+            "/api/bookings/converse",
+            json={"message": "Tomorrow", "conversation_id": conversation_id},
+        ).json()
+
+    assert second["conversation_id"] == conversation_id
+    message, history, _, context = parser.converse.call_args.args
+    assert message == "Tomorrow"
+    assert history == [
+        {"role": "user", "content": "Book the board room"},
+        {"role": "assistant", "content": "Which day?"},
+    ]
+    assert "room_name=Board Room" in context
+
+    response = client.delete(f"/api/bookings/converse/{conversation_id}")
+    assert response.status_code == 200
+
+def test_converse_rejects_unknown_conversation_ids():
+    from unittest.mock import AsyncMock
+
+    parser = AsyncMock()
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        response = client.post(
+            "/api/bookings/converse", json={"message": "Hi", "conversation_id": "made-up"}
+        )
+    assert response.status_code == 404
+    parser.converse.assert_not_awaited()
+
+def test_second_booking_in_a_conversation_starts_fresh():
+    from unittest.mock import AsyncMock
+
+    parser = AsyncMock()
+    parser.converse.side_effect = [
+        {"message": "Booking Board Room for 2030-01-01 at 10:00", "booking_ready": True,
+         "booking_data": {"room_name": "Board Room", "date": "2030-01-01", "start_time": "10:00", "end_time": "11:00"}},
+        {"message": "Which day?", "booking_ready": False, "booking_data": {"room_name": "Annex"}},
+        {"message": "What time?", "booking_ready": False, "booking_data": {"date": "2030-02-01"}},
+    ]
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        first = client.post("/api/bookings/converse", json={"message": "Board room 2030-01-01 10am"}).json()
+        conversation_id = first["conversation_id"]
+        for message in ("Now the annex", "February 1st"):
+            client.post("/api/bookings/converse", json={"message": message, "conversation_id": conversation_id})
+
+    _, _, _, context = parser.converse.call_args_list[1].args
+    assert "gathered so far" not in context
+    assert "Completed booking: room_name=Board Room" in context
+    _, _, _, context = parser.converse.call_args_list[2].args
+    assert "Booking details gathered so far: room_name=Annex." in context
+    assert "10:00" not in context.split("Earlier in this conversation")[0]
+
+def test_batch_create_reports_each_item():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    client.post("/api/bookings/", json={
+        "room_id": room_id, "booked_by": "user1", "booking_date": "2030-01-01",
+        "start_time": "09:00", "end_time": "10:00",
+    })
+
+    def item(start, end, **overrides):
+        return {"room_id": room_id, "booked_by": "sync", "booking_date": "2030-01-01",
+                "start_time": start, "end_time": end, **overrides}
+
+    response = client.post("/api/bookings/batch", json={"bookings": [
+        item("10:00", "11:00"),
+        item("09:30", "10:30"),                # overlaps the existing booking
+        item("10:30", "11:30"),                # overlaps item 0
+        item("12:00", "11:00"),                # invalid time range
+        item("12:00", "13:00", room_id=9999),  # unknown room
+        item("11:00", "12:00"),
+    ]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 4)
+    assert [r["status"] for r in data["results"]] == [
+        "created", "conflict", "conflict", "invalid", "room_not_found", "created",
+    ]
+    assert "09:00" in data["results"][1]["detail"]
+    assert "item 0" in data["results"][2]["detail"]
+    assert data["results"][0]["booking"]["room_name"] == "Test Room"
+    assert len(client.get("/api/bookings").json()) == 3
+
+    # The availability index sees the batch-created bookings
+    available = client.get("/api/rooms/available", params={
+        "date": "2030-01-01", "start_time": "11:15", "end_time": "11:45",
+    }).json()
+    assert available == []
+
+def test_batch_create_atomic_creates_nothing_on_failure():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    response = client.post("/api/bookings/batch", json={"atomic": True, "bookings": [
+        {"room_id": room_id, "booked_by": "sync", "booking_date": "2030-01-01",
+         "start_time": "10:00", "end_time": "11:00"},
+        {"room_id": room_id, "booked_by": "sync", "booking_date": "2030-01-01",
+         "start_time": "10:00", "end_time": "11:00"},
+    ]})
+
+    data = response.json()
+    assert data["created"] == 0
+    assert [r["status"] for r in data["results"]] == ["skipped", "conflict"]
+    assert client.get("/api/bookings").json() == []
+
+def test_batch_create_atomic_blames_only_the_item_that_lost_a_race():
+    db = TestingSessionLocal()
+    from app.models.booking import Booking
+    from app.models.room import Room
+    from app.services.booking_writes import insert_bookings
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+
+    def insert_after_concurrent_write(session, rows):
+        # Another request books the second item's slot after the batch's read
+        db.add(Booking(room_id=room_id, booked_by="other", booking_date=date(2030, 1, 1),
+                       start_time=time(14, 0), end_time=time(15, 0)))
+        db.commit()
+        return insert_bookings(session, rows)
+
+    with patch("app.routers.bookings.insert_bookings", insert_after_concurrent_write):
+        response = client.post("/api/bookings/batch", json={"atomic": True, "bookings": [
+            {"room_id": room_id, "booked_by": "sync", "booking_date": "2030-01-01",
+             "start_time": "10:00", "end_time": "11:00"},
+            {"room_id": room_id, "booked_by": "sync", "booking_date": "2030-01-01",
+             "start_time": "14:00", "end_time": "15:00"},
+        ]})
+    db.close()
+
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["skipped", "conflict"]
+    assert "concurrent" in results[1]["detail"]
+    assert results[0]["detail"].startswith("Batch is atomic")
+    assert [b["booked_by"] for b in client.get("/api/bookings").json()] == ["other"]
+
+def test_recurring_booking_creates_series():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    client.post("/api/bookings/", json={
+        "room_id": room_id, "booked_by": "user1", "booking_date": "2030-01-02",
+        "start_time": "09:00", "end_time": "10:00",
+    })
+    response = client.post("/api/bookings/", json={
+        "room_id": room_id, "booked_by": "team", "title": "Weekly sync",
+        "booking_date": "2030-01-07", "start_time": "09:00", "end_time": "09:30",
+        "recurrence": {"frequency": "weekly", "count": 13},
+    })
+    assert response.status_code == 200
+    first = response.json()
+    assert first["booking_date"] == "2030-01-07"
+    assert first["series_id"] is not None
+
+    bookings = client.get("/api/bookings", params={"room_id": room_id}).json()
+    assert len(bookings) == 14
+    assert bookings[-1]["booking_date"] == "2030-04-01"
+
+    collapsed = client.get("/api/bookings", params={"collapse_series": True}).json()
+    assert [b["booking_date"] for b in collapsed] == ["2030-01-02"]
+    series = client.get("/api/bookings/series").json()
+    assert len(series) == 1
+    assert (series[0]["count"], series[0]["until"], series[0]["room_name"]) == (13, "2030-04-01", "Test Room")
+
+    # One clashing occurrence rejects the whole series
+    response = client.post("/api/bookings/", json={
+        "room_id": room_id, "booked_by": "team", "booking_date": "2030-01-01",
+        "start_time": "09:15", "end_time": "09:45",
+        "recurrence": {"frequency": "daily", "until": "2030-01-10"},
+    })
+    assert response.status_code == 409
+    assert "2 of 10 occurrences" in response.json()["detail"]
+
+    response = client.delete(f"/api/bookings/series/{first['series_id']}")
+    assert response.status_code == 200
+    assert len(client.get("/api/bookings").json()) == 1
+    assert client.get("/api/bookings/series").json() == []
+
+def test_recurrence_requires_an_end():
+    response = client.post("/api/bookings/", json={
+        "room_id": 1, "booked_by": "team", "booking_date": "2030-01-07",
+        "start_time": "09:00", "end_time": "09:30",
+        "recurrence": {"frequency": "daily"},
+    })
+    assert response.status_code == 422
+
+def test_list_bookings_filters_by_booker():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    for booker, start in (("alice", "09:00"), ("bob", "10:00"), ("alice", "11:00")):
+        client.post("/api/bookings/", json={
+            "room_id": room_id, "booked_by": booker, "booking_date": "2030-01-01",
+            "start_time": start, "end_time": start.replace(":00", ":30"),
+        })
+
+    bookings = client.get("/api/bookings", params={"booked_by": "alice"}).json()
+    assert [b["start_time"] for b in bookings] == ["09:00:00", "11:00:00"]
+
+def test_room_utilization_tracks_creates_and_cancels():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    def book(day, start, end):
+        return client.post("/api/bookings/", json={
+            "room_id": room_id, "booked_by": "user", "booking_date": day,
+            "start_time": start, "end_time": end,
+        }).json()
+
+    book("2030-01-01", "09:30", "11:00")     # Tuesday
+    extra = book("2030-01-01", "14:00", "15:00")
+    book("2030-01-07", "10:00", "10:30")     # following Monday
+    client.post("/api/bookings/", json={
+        "room_id": room_id, "booked_by": "user", "booking_date": "2030-01-02",
+        "start_time": "10:00", "end_time": "11:00",
+        "recurrence": {"frequency": "daily", "count": 2},
+    })
+    client.delete(f"/api/bookings/{extra['id']}")
+
+    response = client.get(f"/api/rooms/{room_id}/utilization", params={"from": "2029-12-31", "to": "2030-01-07"})
+    assert response.status_code == 200
+    data = response.json()
+    days = {d["start_date"]: d for d in data["days"]}
+    assert len(days) == 8
+    assert (days["2030-01-01"]["booked_minutes"], days["2030-01-01"]["booking_count"]) == (90, 1)
+    assert days["2030-01-01"]["peak_hour"] == 10
+    assert days["2030-01-03"]["booked_minutes"] == 60
+    assert days["2029-12-31"] == {"start_date": "2029-12-31", "booked_minutes": 0,
+                                  "booking_count": 0, "utilization": 0.0, "peak_hour": None}
+
+    weeks = data["weeks"]
+    assert [w["start_date"] for w in weeks] == ["2029-12-31", "2030-01-07"]
+    assert (weeks[0]["booked_minutes"], weeks[0]["booking_count"]) == (210, 3)
+    assert weeks[1]["utilization"] == round(30 / data["workday_minutes"], 4)
+
+def test_room_utilization_rebuild_matches_incremental():
+    from app.services.utilization import rebuild_daily_usage
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    client.post("/api/bookings/", json={
+        "room_id": room_id, "booked_by": "user", "booking_date": "2030-01-01",
+        "start_time": "09:00", "end_time": "10:00",
+        "recurrence": {"frequency": "weekly", "count": 3},
+    })
+    params = {"from": "2030-01-01", "to": "2030-01-31"}
+    incremental = client.get(f"/api/rooms/{room_id}/utilization", params=params).json()
+
+    assert rebuild_daily_usage(db) == 3
+    db.close()
+    assert client.get(f"/api/rooms/{room_id}/utilization", params=params).json() == incremental
+
+def test_schedule_returns_slot_bitmaps():
+    import base64
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    other = Room(name="Other Room", capacity=4)
+    db.add_all([room, other])
+    db.commit()
+    room_id, other_id = room.id, other.id
+    db.close()
+
+    def book(rid, day, start, end):
+        return client.post("/api/bookings/", json={
+            "room_id": rid, "booked_by": "user", "booking_date": day,
+            "start_time": start, "end_time": end,
+        }).json()
+
+    book(room_id, "2030-01-01", "00:00", "00:30")
+    book(room_id, "2030-01-01", "09:10", "10:00")
+    book(other_id, "2030-01-02", "23:00", "23:59")
+
+    params = {"from": "2030-01-01", "to": "2030-01-03", "granularity": 15}
+    data = client.get("/api/schedule", params=params).json()
+    assert data["slots_per_day"] == 96
+    rooms = {r["room_id"]: r["days"] for r in data["rooms"]}
+    assert set(rooms) == {room_id, other_id}
+    assert list(rooms[room_id]) == ["2030-01-01"]
+
+    bits = base64.b64decode(rooms[room_id]["2030-01-01"])
+    booked = [i for i in range(96) if bits[i // 8] & (0x80 >> (i % 8))]
+    assert booked == [0, 1, 36, 37, 38, 39]
+    other_bits = base64.b64decode(rooms[other_id]["2030-01-02"])
+    assert other_bits[-1] == 0x0F
+
+    # Cached bitmaps follow new bookings
+    book(room_id, "2030-01-01", "12:00", "12:15")
+    data = client.get("/api/schedule", params={**params, "room_id": room_id}).json()
+    assert [r["room_id"] for r in data["rooms"]] == [room_id]
+    bits = base64.b64decode(data["rooms"][0]["days"]["2030-01-01"])
+    assert bits[48 // 8] & (0x80 >> (48 % 8))
+
+    assert client.get("/api/schedule", params={**params, "granularity": 7}).status_code == 422
+
+def test_conflict_suggests_alternative_slots():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Test Room", capacity=10)
+    bigger = Room(name="Big Room", capacity=12)
+    smaller = Room(name="Small Room", capacity=4)
+    db.add_all([room, bigger, smaller])
+    db.commit()
+    room_id, bigger_id = room.id, bigger.id
+    db.close()
+
+    def book(start, end, rid=room_id):
+        return client.post("/api/bookings/", json={
+            "room_id": rid, "booked_by": "user", "booking_date": "2030-01-01",
+            "start_time": start, "end_time": end,
+        })
+
+    book("09:00", "10:00")
+    book("10:30", "11:00")
+    response = book("09:30", "10:30")
+
+    assert response.status_code == 409
+    data = response.json()
+    assert "booked" in data["detail"].lower()
+    assert [(s["room_id"], s["start_time"], s["end_time"]) for s in data["suggestions"]] == [
+        (room_id, "08:00:00", "09:00:00"),
+        (room_id, "11:00:00", "12:00:00"),
+        (bigger_id, "09:30:00", "10:30:00"),
+    ]
+    assert book("11:00", "12:00").status_code == 200
+
+def test_rooms_filter_by_amenities_and_capacity():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    rooms = [
+        Room(name="Huddle", capacity=4, amenities=["whiteboard"]),
+        Room(name="Studio", capacity=12, amenities=["Video Conferencing", "projector"]),
+        Room(name="Hall", capacity=40, amenities=["video_conferencing"]),
+    ]
+    db.add_all(rooms)
+    db.commit()
+    huddle_id, studio_id, hall_id = [r.id for r in rooms]
+
+    def names(**params):
+        return [r["name"] for r in client.get("/api/rooms", params=params).json()]
+
+    assert names() == ["Huddle", "Studio", "Hall"]
+    assert names(amenities="video_conferencing", min_capacity=12) == ["Studio", "Hall"]
+    assert names(amenities="video_conferencing,projector") == ["Studio"]
+    assert names(amenities=["projector", "whiteboard"]) == []
+    assert names(min_capacity=13) == ["Hall"]
+
+    # Changing a room's amenities updates the index
+    hall = db.get(Room, hall_id)
+    hall.amenities = ["projector", "video_conferencing"]
+    db.commit()
+    db.close()
+    assert names(amenities="projector") == ["Studio", "Hall"]
+
+def test_converse_offers_only_matching_rooms():
+    from unittest.mock import AsyncMock
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    db.add_all([
+        Room(name="Huddle", capacity=4, amenities=["whiteboard"]),
+        Room(name="Studio", capacity=12, amenities=["video_conferencing"]),
+    ])
+    db.commit()
+    db.close()
+
+    parser = AsyncMock()
+    parser.converse.return_value = {"message": "Which day?", "booking_ready": False, "booking_data": None}
+    with patch("app.routers.bookings.get_ai_parser", return_value=parser):
+        client.post("/api/bookings/converse", json={"message": "A room with video", "amenities": ["video_conferencing"]})
+
+    rooms = parser.converse.call_args.args[2]
+    assert [r["name"] for r in rooms] == ["Studio"]
+
+
+def test_rooms_listing_has_etag_until_rooms_change():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Board Room", capacity=20, amenities=["projector"])
+    db.add(room)
+    db.commit()
+
+    first = client.get("/api/rooms")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert client.get("/api/rooms", headers={"If-None-Match": etag}).status_code == 304
+    detail = client.get(f"/api/rooms/{room.id}", headers={"If-None-Match": etag})
+    assert detail.status_code == 304
+
+    # Writing a room through the ORM invalidates the catalogue
+    room.capacity = 25
+    db.commit()
+    db.close()
+    second = client.get("/api/rooms", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+    assert second.json()[0]["capacity"] == 25
+
+
+def test_bookings_for_a_date_have_etag_until_that_date_changes():
+    db = TestingSessionLocal()
+    from app.models.room import Room
+    room = Room(name="Board Room", capacity=20, amenities=[])
+    db.add(room)
+    db.commit()
+    room_id = room.id
+    db.close()
+
+    first = client.get("/api/bookings", params={"booking_date": "2030-01-07"})
+    etag = first.headers["etag"]
+    assert client.get(
+        "/api/bookings", params={"booking_date": "2030-01-07"}, headers={"If-None-Match": etag}
+    ).status_code == 304
+
+    # Bookings on another date leave this date's tag alone
+    client.post("/api/bookings", json={
+        "room_id": room_id, "booked_by": "Ann", "booking_date": "2030-01-08",
+        "start_time": "09:00", "end_time": "10:00",
+    })
+    assert client.get(
+        "/api/bookings", params={"booking_date": "2030-01-07"}, headers={"If-None-Match": etag}
+    ).status_code == 304
+
+    created = client.post("/api/bookings", json={
+        "room_id": room_id, "booked_by": "Ann", "booking_date": "2030-01-07",
+        "start_time": "09:00", "end_time": "10:00",
+    })
+    assert created.status_code == 200
+    second = client.get(
+        "/api/bookings", params={"booking_date": "2030-01-07"}, headers={"If-None-Match": etag}
+    )
+    assert second.status_code == 200
+    assert len(second.json()) == 1
+
+    client.delete(f"/api/bookings/{created.json()['id']}")
+    third = client.get("/api/bookings", params={"booking_date": "2030-01-07"})
+    assert third.headers["etag"] not in (etag, second.headers["etag"])
+
+    # Rows carry room_name, so renaming a room changes the tag too
+    db = TestingSessionLocal()
+    db.get(Room, room_id).name = "Renamed Room"
+    db.commit()
+    db.close()
+    fourth = client.get(
+        "/api/bookings", params={"booking_date": "2030-01-07"}, headers={"If-None-Match": third.headers["etag"]}
+    )
+    assert fourth.status_code == 200
+
+
+def test_metrics_endpoint_reports_routes_and_queries():
+    from prometheus_client import REGISTRY
+    from app.services.metrics import instrument_engine
+    instrument_engine(engine, "test")
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    queries_before = sample("http_request_db_queries_count", route="/api/bookings")
+    total_before = sample("http_request_db_queries_sum", route="/api/bookings")
+    assert client.get("/api/bookings").status_code == 200
+    assert client.get("/api/rooms/12345").status_code == 404
+
+    assert sample("http_request_db_queries_count", route="/api/bookings") == queries_before + 1
+    assert sample("http_request_db_queries_sum", route="/api/bookings") > total_before
+    assert sample("http_requests_in_flight", method="GET", route="/api/bookings") == 0
+
+    body = client.get("/metrics").text
+    assert 'route="/api/rooms/{room_id}",status="404"' in body
+    assert 'db_query_duration_seconds_count{engine="test"}' in body
+    assert "db_pool_checkout_wait_seconds" in body
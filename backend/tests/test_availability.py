@@ -0,0 +1,70 @@
+"""
+Tests for the in-process availability index.
+"""
+
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Booking, Room
+from app.services.availability import AvailabilityIndex
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Room(id=1, name="Test Room", capacity=10))
+    session.commit()
+    yield session
+    session.close()
+
+
+def book(db, index, day, start=9):
+    booking = Booking(room_id=1, booked_by="user", booking_date=day,
+                      start_time=time(start), end_time=time(start + 1))
+    db.add(booking)
+    db.commit()
+    index.add(booking)
+
+
+def test_write_bookkeeping_is_bounded_by_cached_dates(db):
+    index = AvailabilityIndex(max_dates=2)
+    days = [date(2030, 1, 1) + timedelta(days=i) for i in range(10)]
+
+    for day in days:
+        assert index.free_room_ids(db, [1], day, time(9), time(10)) == [1]
+        book(db, index, day)
+    # Dates never read are not tracked at all
+    book(db, index, date(2031, 1, 1))
+
+    assert list(index._dates) == days[-2:]
+    assert set(index._generations) <= set(days[-2:])
+    assert index._loading == {}
+    # Evicted dates are reloaded with their bookings
+    assert index.free_room_ids(db, [1], days[0], time(9), time(10)) == []
+
+
+def test_load_racing_a_write_is_not_published(db, monkeypatch):
+    index = AvailabilityIndex()
+    day = date(2030, 1, 1)
+    query_days = AvailabilityIndex._query_days
+    reads = []
+
+    def query_then_write(db, dates):
+        days = query_days(db, dates)
+        if not reads:
+            book(db, index, day)
+        reads.append(dates)
+        return days
+
+    monkeypatch.setattr(index, "_query_days", query_then_write)
+
+    # The read that missed the booking is dropped and the date read again
+    assert index.free_room_ids(db, [1], day, time(9), time(10)) == []
+    assert len(reads) == 2
+    assert index._loading == {}
@@ -0,0 +1,82 @@
+"""
+Smoke tests for the API benchmark suite: a tiny run must exercise every
+scenario, and the baseline comparison must flag only real regressions.
+"""
+
+from benchmarks.api_bench import Dataset, compare, main, missing_from_baseline, percentile, run
+
+
+def _result(p50=1.0, p95=2.0, p99=3.0, rps=500.0):
+    return {"requests": 100, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "throughput_rps": rps}
+
+
+def test_percentile_nearest_rank():
+    samples = list(range(1, 101))
+    assert percentile(samples, 0.50) == 50
+    assert percentile(samples, 0.95) == 95
+    assert percentile(samples, 0.99) == 99
+    assert percentile([7.0], 0.99) == 7.0
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {"sqlite:1x1x1": {"list_rooms": _result()}}
+
+    assert compare({"sqlite:1x1x1": {"list_rooms": _result(p95=2.4)}}, baseline, 0.25, 0.1) == []
+    regressions = compare(
+        {"sqlite:1x1x1": {"list_rooms": _result(p95=3.0, rps=300.0)}}, baseline, 0.25, 0.1
+    )
+    assert len(regressions) == 2
+    assert "p95_ms" in regressions[0] and "throughput_rps" in regressions[1]
+
+
+def test_compare_ignores_small_deltas_and_unknown_runs():
+    baseline = {"sqlite:1x1x1": {"list_rooms": _result(p50=0.1)}}
+    assert compare({"sqlite:1x1x1": {"list_rooms": _result(p50=0.3)}}, baseline, 0.25, 0.5) == []
+    assert compare({"sqlite:9x9x9": {"list_rooms": _result(p50=99.0)}}, baseline, 0.25, 0.5) == []
+
+
+def test_missing_baseline_fails_the_run(tmp_path, capsys):
+    baseline = {"sqlite:1x1x1": {"list_rooms": _result()}}
+    results = {"sqlite:1x1x1": {"list_rooms": _result(), "list_rooms_filtered": _result()}}
+    assert missing_from_baseline(results, baseline) == ["sqlite:1x1x1 list_rooms_filtered"]
+
+    args = ["--rooms", "2", "--days", "2", "--bookings-per-day", "2", "--requests", "3", "--warmup", "0"]
+    path = str(tmp_path / "baseline.json")
+    assert main(args + ["--baseline", path]) == 2
+    assert "No baseline" in capsys.readouterr().err
+    assert main(args + ["--baseline", path, "--save-baseline"]) == 0
+    # Loose threshold: only the gating logic is under test here
+    assert main(args + ["--baseline", path, "--threshold", "100"]) == 0
+
+
+def test_tiny_run_covers_every_scenario():
+    results = run(["sqlite"], Dataset(rooms=2, days=2, bookings_per_day=2), requests=5, warmup=1)
+
+    scenarios = results["sqlite:2x2x2"]
+    assert set(scenarios) == {
+        "create_booking_no_conflict", "create_booking_conflict",
+        "get_bookings_by_room", "get_bookings_by_date", "get_bookings_by_booker",
+        "list_rooms", "list_rooms_filtered",
+    }
+    assert all(r["requests"] == 5 and r["p50_ms"] <= r["p99_ms"] for r in scenarios.values())
+
+
+def test_converse_load_harness_runs_against_stub():
+    import argparse
+    import asyncio
+    import os
+    from benchmarks.converse_load import run_in_process
+
+    before = {name: os.environ.get(name) for name in ("AI_PROVIDER", "AI_STUB_LATENCY", "AI_CACHE_ENABLED")}
+    args = argparse.Namespace(
+        conversations=20, concurrency=10, turns=3, stream=False, latency="fixed:1",
+        error_rate=0.0, rooms=2, lag_interval_ms=5.0, cache=False,
+    )
+    report = asyncio.run(run_in_process(args))
+
+    assert report["turns"] == 60
+    assert report["outcomes"] == {"ok": 60}
+    assert report["latency"]["p50_ms"] > 0
+    assert report["event_loop_lag"]
+    # The stub settings do not leak into the rest of the process
+    assert {name: os.environ.get(name) for name in before} == before
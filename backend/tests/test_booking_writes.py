@@ -0,0 +1,80 @@
+"""
+Tests for conflict-safe booking inserts.
+"""
+
+from datetime import date, time
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Booking, Room
+from app.services.booking_writes import insert_bookings
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Room(id=1, name="Test Room", capacity=10))
+    session.commit()
+    yield session
+    session.close()
+
+
+def booking(start, end, day=date(2030, 1, 1)):
+    return {"room_id": 1, "booked_by": "user", "booking_date": day,
+            "start_time": time(*start), "end_time": time(*end)}
+
+
+def test_insert_skips_rows_overlapping_existing_bookings(db):
+    first = insert_bookings(db, [booking((9, 0), (10, 0))])
+    assert len(first) == 1
+    assert first[0].id is not None
+    assert first[0].created_at is not None
+
+    inserted = insert_bookings(db, [
+        booking((9, 30), (10, 30)),
+        booking((10, 0), (11, 0)),  # adjacent, not overlapping
+        booking((9, 0), (10, 0), day=date(2030, 1, 2)),
+    ])
+    db.commit()
+
+    assert sorted((r.booking_date, r.start_time) for r in inserted) == [
+        (date(2030, 1, 1), time(10, 0)),
+        (date(2030, 1, 2), time(9, 0)),
+    ]
+    assert db.query(Booking).count() == 3
+
+
+def _postgres_session():
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = "postgresql"
+    # Let exceptions propagate out of the SAVEPOINT block
+    session.begin_nested.return_value.__exit__.return_value = False
+    return session
+
+
+def test_exclusion_violation_drops_only_the_clashing_rows():
+    violation = IntegrityError("INSERT", {}, MagicMock(pgcode="23P01"))
+    kept = MagicMock(name="kept row")
+    session = _postgres_session()
+    # The chunk is rejected, then rows are retried one by one
+    session.execute.side_effect = [violation, MagicMock(all=lambda: [kept]), violation]
+
+    inserted = insert_bookings(session, [booking((9, 0), (10, 0)), booking((11, 0), (12, 0))])
+
+    assert inserted == [kept]
+    assert session.begin_nested.call_count == 3
+    session.rollback.assert_not_called()
+
+
+def test_other_integrity_errors_propagate():
+    session = _postgres_session()
+    session.execute.side_effect = IntegrityError("INSERT", {}, MagicMock(pgcode="23502"))
+    with pytest.raises(IntegrityError):
+        insert_bookings(session, [booking((9, 0), (10, 0))])
@@ -0,0 +1,85 @@
+"""
+Tests for server-side conversation state.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from app.services.conversation_store import ConversationState, InMemoryConversationStore
+
+
+def test_record_turn_merges_booking_slots():
+    state = ConversationState()
+    state.record_turn("Board room please", {"message": "Which day?", "booking_data": {"room_name": "Board Room"}})
+    state.record_turn("Tomorrow", {"message": "What time?", "booking_data": {"date": "2030-01-01", "room_name": None}})
+
+    assert len(state.turns) == 4
+    assert state.slots == {"room_name": "Board Room", "date": "2030-01-01"}
+    assert "room_name=Board Room" in state.context()
+
+
+def test_compact_folds_old_turns_into_summary():
+    state = ConversationState()
+    for i in range(20):
+        state.record_turn(f"message number {i} " + "x" * 40, {"message": f"reply {i}"})
+    state.compact(token_budget=100)
+
+    assert state.turns[-1] == {"role": "assistant", "content": "reply 19"}
+    assert len(state.turns) < 40
+    assert state.summary
+    assert len(state.summary) <= 25 * 4
+    assert "Earlier in this conversation" in state.context()
+
+
+def test_compact_keeps_latest_exchange():
+    state = ConversationState()
+    state.record_turn("y" * 1000, {"message": "z" * 1000})
+    state.compact(token_budget=10)
+    assert len(state.turns) == 2
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_round_trip_and_expiry():
+    store = InMemoryConversationStore(ttl_seconds=60)
+    state = ConversationState()
+    state.record_turn("hi", {"message": "hello"})
+    await store.save(state)
+
+    loaded = await store.get(state.conversation_id)
+    assert loaded == state
+    loaded.turns.clear()
+    assert (await store.get(state.conversation_id)).turns
+
+    with patch("app.services.conversation_store.time.time", return_value=state.updated_at + 61):
+        assert await store.get(state.conversation_id) is None
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_caps_live_conversations():
+    store = InMemoryConversationStore(max_conversations=2)
+    states = [ConversationState() for _ in range(3)]
+    for state in states:
+        await store.save(state)
+
+    assert await store.get(states[0].conversation_id) is None
+    assert await store.get(states[2].conversation_id) is not None
+
+    await store.delete(states[2].conversation_id)
+    assert await store.get(states[2].conversation_id) is None
+
+
+def test_completed_booking_resets_slots():
+    state = ConversationState()
+    state.record_turn("Board room tomorrow", {"message": "What time?", "booking_data": {"room_name": "Board Room", "date": "2030-01-01"}})
+    state.record_turn("10am", {
+        "message": "Booking Board Room for 2030-01-01 at 10:00",
+        "booking_ready": True,
+        "booking_data": {"start_time": "10:00", "end_time": "11:00"},
+    })
+
+    assert state.slots == {}
+    assert "Completed booking: room_name=Board Room, date=2030-01-01, start_time=10:00" in state.summary
+
+    state.record_turn("Now the annex", {"message": "Which day?", "booking_data": {"room_name": "Annex"}})
+    assert state.slots == {"room_name": "Annex"}
+    assert "Booking details gathered so far: room_name=Annex." in state.context()
@@ -0,0 +1,19 @@
+"""
+Tests for deriving the asyncio database URL.
+"""
+
+from app.database import to_async_database_url
+
+
+def test_sqlite_urls_use_aiosqlite():
+    assert to_async_database_url("sqlite:///./booking.db") == "sqlite+aiosqlite:///./booking.db"
+    assert to_async_database_url("sqlite+pysqlite://") == "sqlite+aiosqlite://"
+
+
+def test_postgres_urls_translate_libpq_options_for_asyncpg():
+    url = to_async_database_url(
+        "postgresql+psycopg2://user:p%40ss@db:5432/booking_db"
+        "?sslmode=require&connect_timeout=10&application_name=api"
+    )
+
+    assert url == "postgresql+asyncpg://user:p%40ss@db:5432/booking_db?ssl=require"
@@ -0,0 +1,238 @@
+"""
+Tests for the conversational agent's LLM reply cache and streaming replies.
+
+These run offline: the chat model is replaced by a mock.
+"""
+
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.ai_parser import AIBookingParser, _rooms_fingerprint
+from app.services.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def ai_parser():
+    """Parser whose chat model is a mock returning a fixed JSON reply."""
+    with patch.dict(os.environ, {"AI_PROVIDER": "openai", "OPENAI_API_KEY": "test-key"}):
+        parser = AIBookingParser()
+    parser.llm = MagicMock()
+    parser.llm.ainvoke = AsyncMock(return_value=MagicMock(
+        content='{"message": "Which day?", "booking_ready": false, "booking_data": null}'
+    ))
+    return parser
+
+
+@pytest.fixture
+def sample_rooms():
+    return [{"name": "Board Room", "capacity": 20}]
+
+
+def test_cache_key_normalises_message_and_history():
+    key = LLMResponseCache.make_key("Book  the Board Room", [], "v1", "2030-01-01", "m")
+    assert key == LLMResponseCache.make_key(" book the board room ", [], "v1", "2030-01-01", "m")
+    assert key != LLMResponseCache.make_key("book the board room", [], "v2", "2030-01-01", "m")
+    assert key != LLMResponseCache.make_key("book the board room", [], "v1", "2030-01-02", "m")
+    assert key != LLMResponseCache.make_key(
+        "book the board room", [{"role": "user", "content": "hi"}], "v1", "2030-01-01", "m"
+    )
+
+
+def test_cache_lru_eviction():
+    cache = LLMResponseCache(max_entries=2)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}
+    cache.set("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("c") == {"n": 3}
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_ttl_expiry():
+    cache = LLMResponseCache(ttl_seconds=60)
+    with patch("app.services.llm_cache.time.time", return_value=1000.0):
+        cache.set("a", {"n": 1})
+    with patch("app.services.llm_cache.time.time", return_value=1059.0):
+        assert cache.get("a") == {"n": 1}
+    with patch("app.services.llm_cache.time.time", return_value=1061.0):
+        assert cache.get("a") is None
+
+
+def test_cache_disk_backend_survives_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = LLMResponseCache(disk_path=path)
+    cache.set("a", {"n": 1})
+    cache.close()
+
+    reopened = LLMResponseCache(disk_path=path)
+    assert reopened.get("a") == {"n": 1}
+    reopened.close()
+
+
+def test_cache_returns_copies():
+    cache = LLMResponseCache()
+    cache.set("a", {"booking_data": {"room_name": "Board Room"}})
+    cache.get("a")["booking_data"]["room_id"] = 7
+    assert cache.get("a") == {"booking_data": {"room_name": "Board Room"}}
+
+
+@pytest.mark.asyncio
+async def test_converse_serves_repeated_turns_from_cache(ai_parser, sample_rooms):
+    first = await ai_parser.converse("Book a room", [], sample_rooms)
+    second = await ai_parser.converse("book a  room", [], sample_rooms)
+
+    assert first == second
+    assert ai_parser.llm.ainvoke.await_count == 1
+    assert ai_parser.stats()["cache"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_converse_does_not_cache_errors(ai_parser, sample_rooms):
+    ai_parser.llm.ainvoke.side_effect = RuntimeError("provider down")
+    result = await ai_parser.converse("Book a room", [], sample_rooms)
+    assert "error" in result
+
+    ai_parser.llm.ainvoke.side_effect = None
+    result = await ai_parser.converse("Book a room", [], sample_rooms)
+    assert "error" not in result
+    assert ai_parser.llm.ainvoke.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_converse_stream_yields_message_deltas(ai_parser, sample_rooms):
+    reply = '{"message": "Which \\"day\\"?", "booking_ready": false, "booking_data": null}'
+
+    async def astream(messages):
+        for i in range(0, len(reply), 5):
+            yield MagicMock(content=reply[i:i + 5])
+
+    ai_parser.llm.astream = astream
+    events = [event async for event in ai_parser.converse_stream("Book a room", [], sample_rooms)]
+
+    assert "".join(text for kind, text in events if kind == "message") == 'Which "day"?'
+    assert events[-1] == ("result", {"message": 'Which "day"?', "booking_ready": False, "booking_data": None})
+
+    # The streamed reply was cached like a regular one
+    assert await ai_parser.converse("Book a room", [], sample_rooms) == events[-1][1]
+    ai_parser.llm.ainvoke.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_closing_converse_stream_closes_the_model_stream(ai_parser, sample_rooms):
+    closed = []
+
+    async def astream(messages):
+        try:
+            while True:
+                yield MagicMock(content='{"message": "still typing')
+        finally:
+            closed.append(True)
+
+    ai_parser.llm.astream = astream
+    events = ai_parser.converse_stream("Book a room", [], sample_rooms)
+    assert (await events.__anext__())[0] == "message"
+
+    await events.aclose()
+
+    assert closed == [True]
+    assert ai_parser.scheduler.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_turns_share_one_model_call(ai_parser, sample_rooms):
+    import asyncio
+    ai_parser.cache = None
+    release = asyncio.Event()
+
+    async def slow_reply(messages):
+        await release.wait()
+        return MagicMock(content='{"message": "Which day?", "booking_ready": false, "booking_data": null}')
+
+    ai_parser.llm.ainvoke = AsyncMock(side_effect=slow_reply)
+    calls = [asyncio.ensure_future(ai_parser.converse("Book a room", [], sample_rooms)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert ai_parser.llm.ainvoke.await_count == 1
+    assert all(r == results[0] for r in results)
+    assert len({id(r) for r in results}) == 5
+    assert ai_parser.stats()["coalesced_requests"] == 4
+    assert ai_parser.stats()["in_flight_requests"] == 0
+
+
+def test_system_prompt_starts_with_static_prefix(ai_parser, sample_rooms):
+    from app.services.ai_parser import SYSTEM_PROMPT_PREFIX
+
+    prompt = ai_parser._build_system_prompt(sample_rooms)
+    other = ai_parser._build_system_prompt([{"name": "Annex", "capacity": 4}])
+
+    assert prompt.startswith(SYSTEM_PROMPT_PREFIX)
+    assert other.startswith(SYSTEM_PROMPT_PREFIX)
+    assert "- Board Room (capacity: 20)" in prompt
+    assert "- Annex (capacity: 4)" in other
+
+
+def test_room_block_is_rebuilt_only_when_rooms_change(ai_parser, sample_rooms):
+    rooms = sample_rooms + [{"name": "Annex", "capacity": 4, "amenities": ["whiteboard"]}]
+    first = ai_parser._room_block(rooms, _rooms_fingerprint(rooms))
+    assert first == "- Board Room (capacity: 20)\n- Annex (capacity: 4; amenities: whiteboard)"
+    # Filtered lists get their own entry without evicting the full list
+    filtered = ai_parser._room_block(rooms[1:], _rooms_fingerprint(rooms[1:]))
+    assert filtered == "- Annex (capacity: 4; amenities: whiteboard)"
+
+    same = [dict(r) for r in rooms]
+    assert ai_parser._room_block(same, _rooms_fingerprint(same)) is first
+    renamed = [{**rooms[0], "name": "Boardroom"}, rooms[1]]
+    assert ai_parser._room_block(renamed, _rooms_fingerprint(renamed)) is not first
+
+
+@pytest.mark.asyncio
+async def test_converse_stream_raises_when_shed(ai_parser, sample_rooms):
+    from app.services.llm_scheduler import LLMOverloadedError
+
+    async def shed(messages, primary, secondary=None):
+        raise LLMOverloadedError("Too many AI requests queued")
+        yield
+
+    ai_parser.scheduler.stream = shed
+    with pytest.raises(LLMOverloadedError):
+        async for _ in ai_parser.converse_stream("Book a room", [], sample_rooms):
+            pass
+
+
+def test_ollama_fallback_honours_fallback_model():
+    env = {
+        "AI_PROVIDER": "openai", "OPENAI_API_KEY": "test-key",
+        "AI_FALLBACK_PROVIDER": "ollama", "AI_FALLBACK_MODEL": "llama3:8b", "OLLAMA_MODEL": "gemma3:1b",
+    }
+    with patch.dict(os.environ, env):
+        parser = AIBookingParser()
+    assert parser.fallback_llm.model == "llama3:8b"
+    assert parser.fallback_llm.callbacks[0].model == "ollama:llama3:8b"
+
+
+@pytest.mark.asyncio
+async def test_async_disk_tier_runs_off_the_event_loop(tmp_path):
+    import threading
+    cache = LLMResponseCache(disk_path=str(tmp_path / "llm_cache.sqlite"))
+    loop_thread = threading.get_ident()
+    disk_threads = []
+    disk_get, disk_put = cache._disk_get, cache._disk_put
+    cache._disk_get = lambda *a: disk_threads.append(threading.get_ident()) or disk_get(*a)
+    cache._disk_put = lambda *a: disk_threads.append(threading.get_ident()) or disk_put(*a)
+
+    await cache.aset("a", {"n": 1})
+    cache._entries.clear()
+    assert await cache.aget("a") == {"n": 1}
+    # Served from memory now, without touching disk
+    assert await cache.aget("a") == {"n": 1}
+
+    assert len(disk_threads) == 2
+    assert loop_thread not in disk_threads
+    cache.close()
@@ -0,0 +1,168 @@
+"""
+Tests for the LLM call scheduler: concurrency cap, shedding, deadlines,
+fallback and hedging. Providers are simulated with coroutines.
+"""
+
+import asyncio
+import pytest
+
+from app.services.llm_scheduler import LLMOverloadedError, LLMScheduler, LLMTimeoutError
+
+
+class FakeProvider:
+    """Chat model stand-in answering after `delay` seconds (or failing)."""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.running = 0
+        self.peak_running = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.running += 1
+        self.peak_running = max(self.peak_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if self.error:
+            raise self.error
+        return self.name
+
+
+@pytest.mark.asyncio
+async def test_caps_concurrent_calls():
+    scheduler = LLMScheduler(max_in_flight=2, max_queue=10)
+    provider = FakeProvider("primary", delay=0.01)
+
+    results = await asyncio.gather(*(scheduler.invoke([], provider) for _ in range(6)))
+
+    assert results == ["primary"] * 6
+    assert provider.peak_running == 2
+
+
+@pytest.mark.asyncio
+async def test_sheds_calls_when_queue_is_full():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=1)
+    provider = FakeProvider("primary", delay=0.05)
+
+    results = await asyncio.gather(
+        *(scheduler.invoke([], provider) for _ in range(3)), return_exceptions=True
+    )
+
+    assert results[:2] == ["primary", "primary"]
+    assert isinstance(results[2], LLMOverloadedError)
+    assert scheduler.stats()["shed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_enforces_deadline():
+    scheduler = LLMScheduler(deadline_seconds=0.05)
+
+    with pytest.raises(LLMTimeoutError):
+        await scheduler.invoke([], FakeProvider("primary", delay=1))
+    assert scheduler.stats()["timeouts"] == 1
+    assert scheduler.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_secondary_on_error():
+    scheduler = LLMScheduler()
+    secondary = FakeProvider("secondary")
+
+    result = await scheduler.invoke([], FakeProvider("primary", error=RuntimeError("down")), secondary)
+
+    assert result == "secondary"
+    assert scheduler.stats()["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedges_slow_primary():
+    scheduler = LLMScheduler(hedge=True, hedge_min_delay=0.01, deadline_seconds=0.04)
+    primary = FakeProvider("primary", delay=1)
+    secondary = FakeProvider("secondary", delay=0.001)
+
+    result = await scheduler.invoke([], primary, secondary)
+
+    assert result == "secondary"
+    assert scheduler.stats()["hedged"] == 1
+    assert scheduler.stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    scheduler = LLMScheduler(hedge=True, hedge_min_delay=0.5)
+    secondary = FakeProvider("secondary")
+
+    result = await scheduler.invoke([], FakeProvider("primary"), secondary)
+
+    assert result == "primary"
+    assert secondary.calls == 0
+
+
+class FakeStreamingProvider:
+    """Streams `chunks`, raising `error` after `fail_after` of them."""
+
+    def __init__(self, chunks, error=None, fail_after=0):
+        self.chunks = chunks
+        self.error = error
+        self.fail_after = fail_after
+
+    async def astream(self, messages):
+        for i, chunk in enumerate(self.chunks):
+            if self.error and i == self.fail_after:
+                raise self.error
+            yield chunk
+        if self.error and self.fail_after >= len(self.chunks):
+            raise self.error
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_before_first_chunk():
+    scheduler = LLMScheduler()
+    primary = FakeStreamingProvider(["a"], error=RuntimeError("down"))
+    secondary = FakeStreamingProvider(["b", "c"])
+
+    chunks = [chunk async for chunk in scheduler.stream([], primary, secondary)]
+
+    assert chunks == ["b", "c"]
+    assert scheduler.stats()["fallbacks"] == 1
+    assert scheduler.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_does_not_fall_back_mid_stream():
+    scheduler = LLMScheduler()
+    primary = FakeStreamingProvider(["a", "b"], error=RuntimeError("down"), fail_after=1)
+    chunks = []
+
+    with pytest.raises(RuntimeError):
+        async for chunk in scheduler.stream([], primary, FakeStreamingProvider(["x"])):
+            chunks.append(chunk)
+    assert chunks == ["a"]
+    assert scheduler.stats()["fallbacks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_closing_a_stream_closes_the_provider_stream_and_frees_the_slot():
+    scheduler = LLMScheduler(max_in_flight=1)
+    closed = []
+
+    class EndlessProvider:
+        async def astream(self, messages):
+            try:
+                while True:
+                    yield "chunk"
+            finally:
+                closed.append(True)
+
+    stream = scheduler.stream([], EndlessProvider())
+    assert await stream.__anext__() == "chunk"
+
+    await stream.aclose()
+
+    assert closed == [True]
+    assert scheduler.stats()["running"] == 0
@@ -0,0 +1,70 @@
+"""
+Tests for startup schema migrations.
+"""
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.migrations import run_migrations
+import app.models  # noqa: F401  (registers tables on Base.metadata)
+
+
+def test_migrations_upgrade_old_schema_and_are_idempotent():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        # bookings as created before recurring bookings existed
+        connection.execute(text(
+            "CREATE TABLE bookings (id INTEGER PRIMARY KEY, room_id INTEGER NOT NULL, "
+            "title VARCHAR(200), booked_by VARCHAR(100) NOT NULL, booking_date DATE NOT NULL, "
+            "start_time TIME NOT NULL, end_time TIME NOT NULL, created_at DATETIME)"
+        ))
+    Base.metadata.create_all(bind=engine)
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    columns = {c["name"] for c in inspect(engine).get_columns("bookings")}
+    assert "series_id" in columns
+    indexes = {i["name"] for i in inspect(engine).get_indexes("bookings")}
+    assert {"ix_bookings_room_date_start", "ix_bookings_date_start_id", "ix_bookings_booked_by_date"} <= indexes
+
+
+def test_utilisation_rollup_is_backfilled_once():
+    from datetime import date, time
+    from sqlalchemy.orm import Session
+    from app.models import Booking, Room, RoomDailyUsage
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(Room(id=1, name="Test Room", capacity=10))
+        session.add(Booking(room_id=1, booked_by="user", booking_date=date(2030, 1, 1),
+                            start_time=time(9, 0), end_time=time(10, 30)))
+        session.commit()
+
+    run_migrations(engine)
+
+    with Session(engine) as session:
+        usage = session.query(RoomDailyUsage).one()
+        assert (usage.booked_minutes, usage.booking_count, usage.peak_hour) == (90, 1, 9)
+
+
+def test_room_amenities_are_backfilled():
+    from sqlalchemy.orm import Session
+    from app.models import RoomAmenity
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # Rooms written before the amenity table existed
+        connection.execute(text(
+            "INSERT INTO rooms (id, name, capacity, amenities) VALUES "
+            "(1, 'Studio', 12, '[\"projector\", \"Video Conferencing\"]'), (2, 'Huddle', 4, '[]')"
+        ))
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    with Session(engine) as session:
+        rows = session.query(RoomAmenity.room_id, RoomAmenity.amenity).order_by(RoomAmenity.amenity).all()
+    assert rows == [(1, "projector"), (1, "video_conferencing")]
@@ -0,0 +1,96 @@
+"""
+Query plan regression tests: the hot booking queries must use the indexes
+declared on the Booking model instead of scanning the table.
+
+SQLite always runs. PostgreSQL runs when TEST_POSTGRES_URL points at a
+scratch database (its tables are dropped afterwards).
+"""
+
+import os
+from datetime import date, time
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Booking, Room
+from app.routers.bookings import build_booking_listing_query
+from app.services.booking_writes import overlap_filter
+from app.services.room_search import room_filter_statement
+
+DAY = date(2030, 1, 1)
+
+HOT_QUERIES = {
+    "conflict check": (
+        lambda db: select(Booking.id).where(overlap_filter(1, DAY, time(9, 0), time(10, 0))),
+        "ix_bookings_room_date_start",
+    ),
+    "listing by room": (
+        lambda db: build_booking_listing_query(db, room_id=1).statement,
+        "ix_bookings_room_date_start",
+    ),
+    "listing by date": (
+        lambda db: build_booking_listing_query(db, booking_date=DAY).statement,
+        "ix_bookings_date_start_id",
+    ),
+    "listing by booker": (
+        lambda db: build_booking_listing_query(db, booked_by="alice@example.com").statement,
+        "ix_bookings_booked_by_date",
+    ),
+    "availability load": (
+        lambda db: select(Booking.room_id, Booking.start_time, Booking.end_time, Booking.id)
+        .where(Booking.booking_date == DAY),
+        "ix_bookings_date_start_id",
+    ),
+    "rooms by amenity": (
+        lambda db: room_filter_statement(amenities=["projector"]),
+        "ix_room_amenities_amenity",
+    ),
+    "rooms by capacity": (
+        lambda db: select(Room.id).where(Room.capacity >= 12),
+        "ix_rooms_capacity",
+    ),
+    "series occurrences": (
+        lambda db: select(Booking.id).where(Booking.series_id == 1),
+        "ix_bookings_series_id",
+    ),
+}
+
+
+def engines():
+    yield pytest.param("sqlite://", id="sqlite")
+    yield pytest.param(
+        os.getenv("TEST_POSTGRES_URL"),
+        id="postgresql",
+        marks=pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set"),
+    )
+
+
+@pytest.fixture(params=list(engines()))
+def db(request):
+    engine = create_engine(request.param)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    if engine.dialect.name == "postgresql":
+        # Tiny test tables are cheapest to scan; ask whether an index can be used
+        session.execute(text("SET enable_seqscan = off"))
+    yield session
+    session.close()
+    if engine.dialect.name == "postgresql":
+        Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def explain(db, statement) -> str:
+    dialect = db.get_bind().dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+    return "\n".join(str(row[-1]) for row in db.execute(text(prefix + sql)))
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_index(db, name):
+    build, index_name = HOT_QUERIES[name]
+    plan = explain(db, build(db))
+    assert index_name in plan, f"{name} does not use {index_name}:\n{plan}"
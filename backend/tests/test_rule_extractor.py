@@ -0,0 +1,86 @@
+"""
+Tests for the deterministic fast path that answers structured booking
+requests without calling the LLM.
+"""
+
+import os
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.ai_parser import AIBookingParser, RuleBasedExtractor
+
+# Wednesday morning
+NOW = datetime(2030, 1, 2, 8, 0)
+
+
+@pytest.fixture
+def sample_rooms():
+    return [
+        {"name": "Conference Room A", "capacity": 10},
+        {"name": "Board Room", "capacity": 20},
+        {"name": "Meeting Room 1", "capacity": 4},
+    ]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("book Board Room tomorrow 2-3pm for 8 people",
+     ("Board Room", "2030-01-03", "14:00", "15:00")),
+    ("Book Conference Room A tomorrow at 2pm for 1 hour",
+     ("Conference Room A", "2030-01-03", "14:00", "15:00")),
+    ("Reserve the Board Room for a 2-hour meeting on Friday at 10am",
+     ("Board Room", "2030-01-04", "10:00", "12:00")),
+    ("meeting room 1 on 2030-01-05 from 09:00 to 10:30",
+     ("Meeting Room 1", "2030-01-05", "09:00", "10:30")),
+    ("a room for 6 people jan 10th at 3:30pm",
+     ("Conference Room A", "2030-01-10", "15:30", "16:30")),
+    ("board room tomorrow 11-1pm",
+     ("Board Room", "2030-01-03", "11:00", "13:00")),
+])
+def test_extracts_fully_structured_requests(sample_rooms, text, expected):
+    result = RuleBasedExtractor().extract(text, sample_rooms, NOW)
+    assert result is not None
+    assert (result["room_name"], result["date"], result["start_time"], result["end_time"]) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Book a room sometime",
+    "I need a room for 6 people next Monday at 10am",  # "next Monday" is ambiguous
+    "board room tomorrow at 2",                        # am or pm?
+    "board room or meeting room 1 tomorrow at 2pm",
+    "meeting room 1 tomorrow at 2pm for 8 people",     # too small
+    "don't book the board room tomorrow at 2pm",
+    "board room today at 7am",                         # already past
+])
+def test_leaves_unresolved_requests_to_the_model(sample_rooms, text):
+    assert RuleBasedExtractor().extract(text, sample_rooms, NOW) is None
+
+
+@pytest.fixture
+def ai_parser():
+    with patch.dict(os.environ, {"AI_PROVIDER": "openai", "OPENAI_API_KEY": "test-key"}):
+        parser = AIBookingParser()
+    parser.llm = MagicMock()
+    parser.llm.ainvoke = AsyncMock(return_value=MagicMock(
+        content='{"message": "Which room?", "booking_ready": false, "booking_data": null}'
+    ))
+    return parser
+
+
+@pytest.mark.asyncio
+async def test_parse_skips_model_for_structured_request(ai_parser, sample_rooms):
+    result = await ai_parser.parse("Book Board Room tomorrow 2-3pm", sample_rooms)
+
+    assert result["confidence"] == "high"
+    assert result["room_name"] == "Board Room"
+    assert result["start_time"] == "14:00"
+    ai_parser.llm.ainvoke.assert_not_awaited()
+    assert ai_parser.stats()["fast_path_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_converse_calls_model_when_unresolved(ai_parser, sample_rooms):
+    result = await ai_parser.converse("Book a room sometime", [], sample_rooms)
+
+    assert result["booking_ready"] is False
+    ai_parser.llm.ainvoke.assert_awaited_once()
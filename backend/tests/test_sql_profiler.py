@@ -0,0 +1,101 @@
+"""
+Tests for the opt-in per-request SQL profiler: statement shapes, the
+summary header, N+1 flagging and trace files.
+"""
+
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.services.sql_profiler import SQLProfilingMiddleware, enable_sql_profiling, normalize_sql
+
+
+def test_normalize_sql_replaces_literals_and_collapses_lists():
+    assert normalize_sql(
+        "SELECT id FROM bookings\n  WHERE room_id = 3 AND title = 'it''s' AND id IN (?, ?, ?) LIMIT 10"
+    ) == "SELECT id FROM bookings WHERE room_id = ? AND title = ? AND id IN (?...) LIMIT ?"
+    assert normalize_sql("SELECT * FROM rooms_v2 WHERE id = %(id_1)s") == "SELECT * FROM rooms_v2 WHERE id = ?"
+    assert normalize_sql("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)") == "INSERT INTO t (a, b) VALUES (?...), ..."
+
+
+def _profiled_app(tmp_path, repeat_threshold=3, build="current"):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE rooms (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO rooms (name) VALUES ('A'), ('B'), ('C'), ('D')"))
+    enable_sql_profiling(engine)
+
+    app = FastAPI()
+    app.add_middleware(
+        SQLProfilingMiddleware, trace_dir=str(tmp_path), repeat_threshold=repeat_threshold, build=build
+    )
+
+    @app.get("/rooms")
+    def rooms():
+        with engine.connect() as conn:
+            ids = [row.id for row in conn.execute(text("SELECT id FROM rooms"))]
+            # One lookup per room: the N+1 shape the profiler should flag
+            return [
+                conn.execute(text("SELECT name FROM rooms WHERE id = :id"), {"id": i}).scalar()
+                for i in ids
+            ]
+
+    @app.get("/rooms/count")
+    def count():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT count(*) FROM rooms")).scalar()
+
+    @app.get("/rooms/{room_id}")
+    def room(room_id: int):
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT name FROM rooms WHERE id = :id"), {"id": room_id}).scalar()
+
+    return TestClient(app)
+
+
+def test_repeated_statement_shapes_are_flagged(tmp_path):
+    client = _profiled_app(tmp_path)
+
+    response = client.get("/rooms")
+
+    header = dict(part.split("=", 1) for part in response.headers["x-sql-profile"].split("; "))
+    assert header["queries"] == "5"
+    assert header["repeated"] == "1"
+    trace = json.loads((tmp_path / f"{header['trace']}.json").read_text())
+    assert trace["request"] == {"method": "GET", "path": "/rooms", "status": 200}
+    assert trace["repeated_shapes"] == [{"sql": "SELECT name FROM rooms WHERE id = ?", "count": 4}]
+    assert [s["sql"] for s in trace["statements"]][:2] == [
+        "SELECT id FROM rooms", "SELECT name FROM rooms WHERE id = ?",
+    ]
+
+
+def test_requests_are_profiled_separately(tmp_path):
+    client = _profiled_app(tmp_path)
+    client.get("/rooms")
+
+    response = client.get("/rooms/count")
+
+    assert response.headers["x-sql-profile"].startswith("queries=1; ")
+    assert "repeated=0" in response.headers["x-sql-profile"]
+    assert len(list(tmp_path.glob("current/*.json"))) == 2
+
+
+def test_trace_names_pair_up_across_builds(tmp_path):
+    for build in ("v1", "v2"):
+        client = _profiled_app(tmp_path, build=build)
+        client.get("/rooms")
+        client.get("/rooms")
+        client.get("/rooms/count")
+        # Numbered per route template, not per concrete path
+        client.get("/rooms/1")
+        client.get("/rooms/2")
+        client.get("/nowhere")
+
+    names = {build: sorted(p.name for p in (tmp_path / build).iterdir()) for build in ("v1", "v2")}
+    assert names["v1"] == names["v2"] == [
+        "GET-rooms-0001.json", "GET-rooms-0002.json", "GET-rooms_count-0001.json",
+        "GET-rooms_room_id-0001.json", "GET-rooms_room_id-0002.json", "GET-unmatched-0001.json",
+    ]
@@ -0,0 +1,90 @@
+"""
+Tests for the offline stub chat model behind AI_PROVIDER=stub.
+"""
+
+import os
+import random
+import pytest
+from unittest.mock import patch
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.services.ai_parser import AIBookingParser
+from app.services.stub_llm import StubChatModel, StubProviderError, parse_latency
+
+PROMPT = SystemMessage(content="Available Rooms:\n- Board Room (capacity: 20)\n- Annex (capacity: 4)")
+
+
+def test_parse_latency_specs():
+    rng = random.Random(1)
+    assert parse_latency("fixed:250")(rng) == 0.25
+    assert all(0.1 <= parse_latency("uniform:100,200")(rng) <= 0.2 for _ in range(50))
+    assert parse_latency("lognormal:0,0.5")(rng) == 0.0
+    # Median in ms, sigma used as given
+    assert parse_latency("lognormal:300,0")(rng) == pytest.approx(0.3)
+    samples = sorted(parse_latency("lognormal:300,0.5")(rng) for _ in range(2001))
+    assert 0.25 < samples[1000] < 0.35 and samples[-1] < 3
+    assert parse_latency("exponential:10")(rng) > 0
+    for spec in ("fixed", "uniform:1", "gamma:1,2", "fixed:abc"):
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+
+@pytest.mark.asyncio
+async def test_stub_follows_reply_script_per_turn():
+    model = StubChatModel(latency="fixed:0")
+    first = await model.ainvoke([PROMPT, HumanMessage(content="I need a room")])
+    assert '"room_name": "Board Room"' in first.content
+    assert '"booking_ready": false' in first.content
+
+    turns = [PROMPT] + [HumanMessage(content=str(i)) for i in range(5)]
+    last = await model.ainvoke(turns)
+    assert '"booking_ready": true' in last.content
+    chunks = [chunk.content async for chunk in model.astream(turns)]
+    assert "".join(chunks) == last.content
+
+
+@pytest.mark.asyncio
+async def test_stub_injects_errors():
+    model = StubChatModel(latency="fixed:0", error_rate=1.0)
+    with pytest.raises(StubProviderError):
+        await model.ainvoke([PROMPT, HumanMessage(content="hi")])
+
+
+@pytest.mark.asyncio
+async def test_parser_uses_stub_provider():
+    env = {"AI_PROVIDER": "stub", "AI_STUB_LATENCY": "fixed:0", "AI_CACHE_ENABLED": "false"}
+    with patch.dict(os.environ, env):
+        parser = AIBookingParser()
+    rooms = [{"name": "Board Room", "capacity": 20}]
+
+    result = await parser.converse("I need a room", [], rooms)
+
+    assert parser.model_id.startswith("stub:")
+    assert result["booking_data"]["room_name"] == "Board Room"
+    await parser.aclose()
+
+
+@pytest.mark.asyncio
+async def test_model_calls_and_reply_parsing_are_measured():
+    from prometheus_client import REGISTRY
+    from app.services.metrics import LLMMetricsCallback
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    model = StubChatModel(latency="fixed:0", callbacks=[LLMMetricsCallback("stub:test")])
+    await model.ainvoke([PROMPT, HumanMessage(content="hi")])
+    model.error_rate = 1.0
+    with pytest.raises(StubProviderError):
+        await model.ainvoke([PROMPT, HumanMessage(content="hi")])
+
+    assert sample("llm_call_duration_seconds_count", model="stub:test", outcome="ok") == 1
+    assert sample("llm_call_duration_seconds_count", model="stub:test", outcome="error") == 1
+    assert sample("llm_provider_errors_total", model="stub:test", error="StubProviderError") == 1
+    assert sample("llm_tokens_total", model="stub:test", kind="completion", source="estimated") > 0
+
+    with patch.dict(os.environ, {"AI_PROVIDER": "stub"}):
+        parser = AIBookingParser()
+    raw_before = sample("llm_reply_parse_total", method="raw")
+    assert parser._parse_response("Sure, which day?")["message"] == "Sure, which day?"
+    assert sample("llm_reply_parse_total", method="raw") == raw_before + 1
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Room, Booking, BookingCreate, AIParseResponse } from '../types';
+import { Room, Booking, BookingCreate, AIParseResponse, Schedule } from '../types';
 
 const getApiUrl = () => {
   let url = import.meta.env.VITE_API_URL || 'http://localhost:8000';
@@ -23,10 +23,15 @@ const api = axios.create({
 });
 
 /**
- * Fetch all available rooms from the API.
+ * Fetch rooms from the API, optionally filtered server-side.
+ * @param minCapacity Only rooms holding at least this many people
+ * @param amenities Amenities every returned room must have
  */
-export const fetchRooms = async (): Promise<Room[]> => {
-  const response = await api.get('/rooms');
+export const fetchRooms = async (minCapacity?: number, amenities?: string[]): Promise<Room[]> => {
+  const params: any = {};
+  if (minCapacity) params.min_capacity = minCapacity;
+  if (amenities?.length) params.amenities = amenities.join(',');
+  const response = await api.get('/rooms', { params });
   return response.data;
 };
 
@@ -43,6 +48,26 @@ export const fetchBookings = async (roomId?: number, date?: string): Promise<Boo
   return response.data;
 };
 
+/**
+ * Fetch the occupancy grid: one packed slot bitmap per room per day.
+ * @param from First date (YYYY-MM-DD)
+ * @param to Last date, inclusive (YYYY-MM-DD)
+ * @param granularity Minutes per slot (5, 10, 15, 30 or 60)
+ */
+export const fetchSchedule = async (from: string, to: string, granularity = 15): Promise<Schedule> => {
+  const response = await api.get('/schedule', { params: { from, to, granularity } });
+  return response.data;
+};
+
+/**
+ * Whether a slot is booked in a schedule bitmap (missing days are free).
+ */
+export const isSlotBooked = (bitmap: string | undefined, slot: number): boolean => {
+  if (!bitmap) return false;
+  const byte = atob(bitmap).charCodeAt(slot >> 3);
+  return (byte & (0x80 >> (slot & 7))) !== 0;
+};
+
 /**
  * Submit a new booking request.
  */
@@ -1,5 +1,6 @@
 import { useState, useRef, useEffect } from 'react';
 import { converseWithAgent, submitBooking, ConversationMessage, ConversationResponse } from '@/api/client';
+import { BookingSuggestion } from '@/types';
 import { Button } from './ui/button';
 import { Input } from './ui/input';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
@@ -134,10 +135,16 @@ export function AIBookingChat({ onBookingSuccess }: AIBookingChatProps) {
             setTimeout(() => setBookingStatus('idle'), 2000);
         } catch (error: any) {
             setBookingStatus('error');
+            const suggestions: BookingSuggestion[] = error.response?.data?.suggestions || [];
+            const alternatives = suggestions.length
+                ? ` Available instead: ${suggestions
+                    .map(s => `${s.room_name} at ${formatTime(s.start_time)}-${formatTime(s.end_time)}`)
+                    .join(', ')}.`
+                : '';
             const errorMessage: Message = {
                 id: Date.now(),
                 role: 'assistant',
-                content: `Booking failed: ${error.response?.data?.detail || 'Please try again.'}`
+                content: `Booking failed: ${error.response?.data?.detail || 'Please try again.'}${alternatives}`
             };
             setMessages(prev => [...prev, errorMessage]);
         } finally {
@@ -26,6 +26,15 @@ export interface BookingCreate {
   end_time: string;
 }
 
+// Alternative slot returned with a 409 booking conflict
+export interface BookingSuggestion {
+  room_id: number;
+  room_name: string;
+  booking_date: string;
+  start_time: string;
+  end_time: string;
+}
+
 export interface AIParseResponse {
   room_name: string | null;
   room_requirements: { min_capacity: number } | null;
@@ -38,3 +47,16 @@ export interface AIParseResponse {
   clarification_needed: string | null;
   raw_text?: string;
 }
+
+export interface RoomSchedule {
+  room_id: number;
+  days: Record<string, string>; // YYYY-MM-DD -> base64 slot bitmap
+}
+
+export interface Schedule {
+  from_date: string;
+  to_date: string;
+  granularity: number; // minutes per slot
+  slots_per_day: number;
+  rooms: RoomSchedule[];
+}